@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: event-loop responsiveness under RSA-SHA1 verification load.
+#
+# Requests needing an RSA-SHA1 verification arrive at a fixed rate while
+# a 1 ms ticker measures how late the event loop runs its callbacks. The
+# request column is the time from a request's arrival to its verdict.
+# Verification runs either inline on the loop (verify_rsa_sha1_signature),
+# in the loop's default thread pool or in a process pool through
+# AsyncSignatureVerifier.
+#
+# Usage::
+#
+#     python benchmarks/bench_async_verify_latency.py [rate [seconds [bits]]]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.aio import asyncio, AsyncSignatureVerifier
+from pyoauth.crypto.rsa import generate_key_pair, write_key_blob
+from pyoauth.protocol import generate_rsa_sha1_signature, verify_rsa_sha1_signature
+from pyoauth.types.number import BACKEND
+
+URL = "http://photos.example.net/photos?file=vacation.jpg&size=original"
+OAUTH_PARAMS = dict(oauth_consumer_key="printer",
+                    oauth_signature_method="RSA-SHA1",
+                    oauth_timestamp="1196666512",
+                    oauth_nonce="13917289812797014437")
+
+
+def run(label, rate, seconds, make_verify):
+    loop = asyncio.new_event_loop()
+    verify, close = make_verify(loop)
+    lags = []
+    latencies = []
+    results = []
+    start = time.time()
+    tick = 0.001
+
+    def ticker(expected):
+        now = time.time()
+        lags.append(now - expected)
+        if now - start < seconds:
+            loop.call_at(loop.time() + tick, ticker, now + tick)
+
+    def finish(scheduled, result):
+        latencies.append(loop.time() - scheduled)
+        results.append(result)
+
+    def arrive(n):
+        scheduled = begin + n / float(rate)
+        future = verify()
+        if future is True or future is False:
+            finish(scheduled, future)
+        else:
+            future.add_done_callback(lambda f: finish(scheduled, f.result()))
+        if n + 1 < rate * seconds:
+            loop.call_at(begin + (n + 1) / float(rate), arrive, n + 1)
+
+    begin = loop.time()
+    loop.call_soon(ticker, time.time())
+    loop.call_soon(arrive, 0)
+    loop.run_until_complete(asyncio.sleep(seconds + 0.5, loop=loop))
+    while len(results) < rate * seconds and time.time() - start < seconds * 10:
+        loop.run_until_complete(asyncio.sleep(0.05, loop=loop))
+    elapsed = time.time() - start
+    close()
+    loop.close()
+
+    assert all(results)
+    lags.sort()
+    latencies.sort()
+    print("%-10s %10.0f %12.1f %12.1f %12.1f %14.1f" % (
+        label, len(results) / elapsed,
+        lags[len(lags) // 2] * 1000, lags[int(len(lags) * 0.99)] * 1000, lags[-1] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000))
+
+
+def main(argv):
+    rate = int(argv[1]) if len(argv) > 1 else 1000
+    seconds = float(argv[2]) if len(argv) > 2 else 3
+    bits = int(argv[3]) if len(argv) > 3 else 2048
+
+    private_key, public_key = generate_key_pair(bits, processes=1)
+    certificate = public_key.encoded_key
+    signature = generate_rsa_sha1_signature(private_key.encoded_key, "GET", URL, OAUTH_PARAMS)
+    directory = tempfile.mkdtemp()
+    blob_path = os.path.join(directory, "keys.blob")
+    write_key_blob(blob_path, dict(printer=certificate))
+
+    print("backend %s, %d-bit key, %d verifications/s offered for %g s, %d CPUs"
+          % (BACKEND, bits, rate, seconds, os.sysconf("SC_NPROCESSORS_ONLN")))
+    print("%-10s %10s %12s %12s %12s %14s" % ("mode", "verified/s", "median lag",
+                                              "p99 lag", "max lag", "p99 request"))
+    print("%-10s %10s %12s %12s %12s %14s" % ("", "", "ms", "ms", "ms", "ms"))
+    def inline(loop):
+        return (lambda: verify_rsa_sha1_signature(certificate, signature,
+                                                  "GET", URL, OAUTH_PARAMS),
+                lambda: None)
+
+    def threads(loop):
+        verifier = AsyncSignatureVerifier(loop=loop)
+        return (lambda: verifier.verify_rsa_sha1_signature(certificate, signature,
+                                                           "GET", URL, OAUTH_PARAMS),
+                verifier.close)
+
+    def processes(loop):
+        verifier = AsyncSignatureVerifier(processes=2, key_blob=blob_path, loop=loop)
+        return (lambda: verifier.verify_rsa_sha1_signature("printer", signature,
+                                                           "GET", URL, OAUTH_PARAMS),
+                verifier.close)
+
+    try:
+        for label, make_verify in (("inline", inline), ("threads", threads),
+                                   ("processes", processes)):
+            run(label, rate, seconds, make_verify)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
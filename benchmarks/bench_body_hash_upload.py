@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: signing large non-form uploads.
+#
+# Compares building a signed resource request for a file upload the old
+# way, with the file read into memory and sent as a payload parameter,
+# with signing the open file through the ``oauth_body_hash`` extension.
+# Each run happens in a forked child so that its peak resident memory can
+# be reported; the figure is the growth over an idle child.
+#
+# Usage::
+#
+#     python benchmarks/bench_body_hash_upload.py [size_in_mb ...]
+#
+# Sizes default to 1, 4 and 16 MB. Percent-encoding binary data into the
+# signature base string and body takes tens of times the file size, so the
+# form payload method runs out of memory well before 128 MB.
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.oauth1 import Credentials
+from pyoauth.oauth1.client import Client
+
+CLIENT = Client(Credentials(identifier="dpf43f3p2l4k3l03", shared_secret="kd94hf93k423kf44"),
+                temporary_credentials_request_uri="https://photos.example.net/initiate",
+                resource_owner_authorization_uri="https://photos.example.net/authorize",
+                token_credentials_request_uri="https://photos.example.net/token")
+TOKEN = Credentials(identifier="nnch734d00sl2jdk", shared_secret="pfkkdhi9sl3r4s00")
+URL = "https://photos.example.net/photos"
+
+
+def form_payload(path):
+    with open(path, "rb") as f:
+        return CLIENT.build_resource_request(TOKEN, "POST", URL,
+                                             payload_params=dict(file=f.read()))
+
+
+def body_hash(path):
+    with open(path, "rb") as f:
+        return CLIENT.build_resource_request(TOKEN, "POST", URL,
+                                             headers={"Content-Type": "image/jpeg"},
+                                             body=f)
+
+
+METHODS = (
+    ("form payload", form_payload),
+    ("body hash", body_hash),
+)
+
+
+def run_in_child(func, path):
+    """
+    Returns (seconds, peak RSS in KB) of func(path) run in a forked child.
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if not pid:
+        os.close(read_end)
+        start = time.time()
+        if func is not None:
+            func(path)
+        os.write(write_end, repr(time.time() - start).encode("ascii"))
+        os._exit(0)
+    os.close(write_end)
+    elapsed = float(os.read(read_end, 64))
+    os.close(read_end)
+    _, _, usage = os.wait4(pid, 0)
+    return elapsed, usage.ru_maxrss
+
+
+def make_file(size):
+    f = tempfile.NamedTemporaryFile(delete=False)
+    block = os.urandom(1 << 20)
+    for i in range(size >> 20):
+        f.write(block)
+    f.close()
+    return f.name
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv[1:]] or [1, 4, 16]
+    _, idle_rss = run_in_child(None, None)
+    print("%8s %-14s %10s %12s" % ("size MB", "method", "seconds", "+RSS MB"))
+    for size in sizes:
+        path = make_file(size << 20)
+        try:
+            for label, func in METHODS:
+                # Warm the page cache so that both methods read from memory.
+                run_in_child(body_hash, path)
+                elapsed, rss = run_in_child(func, path)
+                print("%8d %-14s %10.3f %12.1f" % (size, label, elapsed,
+                                                   max(0, rss - idle_rss) / 1024.0))
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
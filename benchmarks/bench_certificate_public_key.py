@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: extracting the RSA public key from X.509 certificates.
+#
+# Compares decoding the whole certificate with pyasn1 (the previous
+# X509Certificate.public_key) with the DER walk to the
+# SubjectPublicKeyInfo, for certificates carrying an increasing number
+# of extensions.
+#
+# Usage::
+#
+#     python benchmarks/bench_certificate_public_key.py [extensions ...]
+
+import os
+import struct
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.codec import public_key_pem_decode
+from pyoauth.crypto.codec.der import read_tlv, TAG_SEQUENCE
+from pyoauth.crypto.codec.pem import pem_to_der_certificate, der_to_pem_certificate
+from pyoauth.crypto.codec.pem.x509 import X509Certificate, TEST_CERTIFICATES
+
+
+def encode_der(tag, content):
+    length = len(content)
+    if length < 0x80:
+        header = struct.pack("BB", tag, length)
+    else:
+        octets = struct.pack(">I", length).lstrip(b"\x00")
+        header = struct.pack("BB", tag, 0x80 | len(octets)) + octets
+    return header + content
+
+
+def children(der, start, stop):
+    data = bytearray(der)
+    while start < stop:
+        _, _, end = read_tlv(data, start, stop)
+        yield der[start:end]
+        start = end
+
+
+def make_certificate(num_extensions):
+    """
+    Re-encodes the OAuth test certificate with ``num_extensions``
+    private-use extensions of 48 bytes each.
+    """
+    der = pem_to_der_certificate(TEST_CERTIFICATES[1])
+    data = bytearray(der)
+    _, start, stop = read_tlv(data, 0)
+    tbs, algorithm, signature = list(children(der, start, stop))
+    _, start, stop = read_tlv(bytearray(tbs), 0)
+    fields = list(children(tbs, start, stop))
+    if num_extensions:
+        extensions = b"".join(
+            encode_der(TAG_SEQUENCE,
+                       encode_der(0x06, b"\x2b\x06\x01\x04\x01\x82\x37\x15" +
+                                  struct.pack("B", i & 0x7f)) +
+                       encode_der(0x04, os.urandom(48)))
+            for i in range(num_extensions))
+        fields.append(encode_der(0xa3, encode_der(TAG_SEQUENCE, extensions)))
+    tbs = encode_der(TAG_SEQUENCE, b"".join(fields))
+    return der_to_pem_certificate(encode_der(TAG_SEQUENCE, tbs + algorithm + signature))
+
+
+def pyasn1_public_key(pem_certificate):
+    certificate = X509Certificate(pem_certificate)
+    info = certificate.subject_public_key_info
+    return X509Certificate.parse_public_rsa_key_bits(info.getComponentByName('subjectPublicKey'))
+
+
+def per_second(func, pem_certificate, number):
+    return number / min(timeit.repeat(lambda: func(pem_certificate), number=number, repeat=3))
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv[1:]] or [0, 10, 100, 1000]
+    print("%10s %10s %12s %12s %8s" % ("extensions", "der bytes", "pyasn1/s", "der/s", "speedup"))
+    for count in counts:
+        pem_certificate = make_certificate(count)
+        key = public_key_pem_decode(pem_certificate)
+        assert pyasn1_public_key(pem_certificate) == (key["modulus"], key["exponent"])
+        size = len(pem_to_der_certificate(pem_certificate))
+        number = max(5, 2000 // (count + 1))
+        old = per_second(pyasn1_public_key, pem_certificate, number)
+        new = per_second(public_key_pem_decode, pem_certificate, number * 20)
+        print("%10d %10d %12.0f %12.0f %7.0fx" % (count, size, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
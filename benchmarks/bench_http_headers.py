@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Microbenchmark: header lookups on responses with many headers.
+#
+# Compares the previous ``ResponseProxy.get_header`` strategy (exact match,
+# lower-case match, then a linear case-insensitive scan of a plain dict)
+# with lookups in :class:`pyoauth.http.Headers`.
+#
+# Usage::
+#
+#     python benchmarks/bench_http_headers.py [header_count ...]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.http import Headers
+
+
+def linear_get_header(headers, name):
+    if name in headers:
+        return headers[name]
+    elif name.lower() in headers:
+        return headers[name.lower()]
+    else:
+        header_lowercased = name.lower()
+        for k, v in headers.items():
+            if k.lower() == header_lowercased:
+                return v
+        return None
+
+
+def make_headers(count):
+    headers = [("X-Custom-Header-%d" % i, "value-%d" % i) for i in range(count - 2)]
+    headers.append(("Content-Type", "application/x-www-form-urlencoded"))
+    headers.append(("WWW-Authenticate", 'OAuth realm="http://example.com/"'))
+    return headers
+
+
+def bench(count, number=20000):
+    pairs = make_headers(count)
+    plain = dict(pairs)
+    mapped = Headers(pairs)
+    # Names as a client typically spells them, which differ in case from
+    # what the server sent, plus one missing header.
+    names = ["content-type", "Www-Authenticate", "x-custom-header-0", "Date"]
+
+    def old():
+        for name in names:
+            linear_get_header(plain, name)
+
+    def new():
+        for name in names:
+            mapped.get(name)
+
+    old_time = min(timeit.repeat(old, number=number, repeat=3))
+    new_time = min(timeit.repeat(new, number=number, repeat=3))
+    per_lookup = float(number * len(names))
+    print("%3d headers: linear %7.3f us/lookup  map %7.3f us/lookup  (%.1fx)" % (
+        count, old_time / per_lookup * 1e6, new_time / per_lookup * 1e6,
+        old_time / new_time))
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv[1:]] or [10, 30, 50]
+    for count in counts:
+        bench(count)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
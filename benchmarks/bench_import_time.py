@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: module import time in a fresh interpreter.
+#
+# Every measurement starts a new interpreter, the way short-lived CLI
+# workers and serverless handlers do. On Python 3.7+ the cumulative time
+# reported by ``python -X importtime`` is used; older interpreters time
+# the import statement with time.time() instead. Also lists the optional
+# heavyweight modules that the import pulled in.
+#
+# Usage::
+#
+#     python benchmarks/bench_import_time.py [module ...]
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+RUNS = 15
+
+HEAVY_MODULES = ("gmpy2", "gmpy", "Crypto", "pyasn1", "multiprocessing",
+                 "logging", "socket", "ssl")
+
+_TIMED_IMPORT = """
+import sys, time
+start = time.time()
+import %(module)s
+elapsed = time.time() - start
+print(elapsed * 1e6)
+print(" ".join(sorted(m for m in %(heavy)r if sys.modules.get(m) is not None)))
+"""
+
+
+def _run(args):
+    process = subprocess.Popen([sys.executable] + args, cwd=ROOT,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        raise RuntimeError(stderr.decode("utf-8", "replace"))
+    return stdout.decode("ascii"), stderr.decode("ascii", "replace")
+
+
+def importtime_us(module):
+    """
+    Cumulative microseconds for ``module`` from ``-X importtime``.
+    """
+    _, stderr = _run(["-X", "importtime", "-c", "import " + module])
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return float(fields[1])
+    raise RuntimeError("No -X importtime entry for %s" % module)
+
+
+def timed_import(module):
+    stdout, _ = _run(["-c", _TIMED_IMPORT % dict(module=module, heavy=HEAVY_MODULES)])
+    elapsed, heavy = (stdout.splitlines() + [""])[:2]
+    return float(elapsed), heavy
+
+
+def main(argv):
+    modules = argv[1:] or ["pyoauth.oauth1.client", "pyoauth.protocol",
+                           "pyoauth.crypto.rsa", "pyoauth.crypto.primes"]
+    use_importtime = sys.version_info >= (3, 7)
+    print("python %s, %s" % (sys.version.split()[0],
+                             "-X importtime" if use_importtime else "timed import"))
+    print("%-26s %12s %12s  %s" % ("module", "min ms", "median ms", "heavy modules loaded"))
+    for module in modules:
+        heavy = timed_import(module)[1]
+        if use_importtime:
+            samples = [importtime_us(module) for i in range(RUNS)]
+        else:
+            samples = [timed_import(module)[0] for i in range(RUNS)]
+        samples.sort()
+        print("%-26s %12.2f %12.2f  %s" % (module, samples[0] / 1000.0,
+                                          samples[len(samples) // 2] / 1000.0,
+                                          heavy or "-"))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
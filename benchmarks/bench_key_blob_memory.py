@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: memory of RSA keys shared by pre-forked workers.
+#
+# A master process loads the keys and forks the workers, like a
+# gunicorn-style pre-fork server. Each worker runs a garbage collection,
+# as any long-running worker eventually does, and uses a random sample of
+# keys. Two ways of loading the keys are compared:
+#
+# * keyring: a Keyring loaded from a PEM bundle in the master.
+# * blob: a KeyBlob memory-mapped in the master.
+#
+# A run without keys gives the baseline. For each, the script reports the master's resident size after loading,
+# the mean private memory (USS) of a worker and the total proportional
+# set size (PSS) of master and workers together, from
+# /proc/<pid>/smaps_rollup (Linux only).
+#
+# Usage::
+#
+#     python benchmarks/bench_key_blob_memory.py [keys [workers [keys used per worker]]]
+
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.codec import public_key_pem_encode
+from pyoauth.crypto.random import generate_random_long
+from pyoauth.crypto.rsa import Keyring, KeyBlob, write_key_blob, \
+    get_implementation
+
+
+def memory(pid="self"):
+    """
+    Returns (RSS, PSS, USS) in KB.
+    """
+    values = {}
+    with open("/proc/%s/smaps_rollup" % pid) as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return (values["Rss"], values["Pss"],
+            values["Private_Clean"] + values["Private_Dirty"])
+
+
+def make_keys(count):
+    keys = []
+    for i in range(count):
+        modulus = generate_random_long(1 << 1023, 1 << 1024) | 1
+        keys.append(("partner-%05d" % i,
+                     public_key_pem_encode(dict(modulus=modulus, exponent=65537))))
+    return keys
+
+
+def worker(get, names, sample, release):
+    gc.collect()
+    for name in random.sample(names, sample):
+        key = get(name)
+        if key is not None:
+            key.size
+    # Stay alive until the master has measured every worker.
+    os.read(release, 1)
+    os._exit(0)
+
+
+def run_master(load, names, workers, sample, report):
+    # Import the codecs and the RSA implementation before forking, as a
+    # pre-fork server would, so that workers share them in every mode.
+    import pyoauth.crypto.codec
+    get_implementation()
+    keys = load()
+    get = keys.get
+    gc.collect()
+    master_rss = memory()[0]
+    release_read, release_write = os.pipe()
+    pids = []
+    for i in range(workers):
+        pid = os.fork()
+        if not pid:
+            os.close(release_write)
+            worker(get, names, sample, release_read)
+        pids.append(pid)
+    os.close(release_read)
+    # Give the workers time to finish their lookups.
+    time.sleep(1.0 + 0.002 * sample)
+    worker_memory = [memory(pid) for pid in pids]
+    total_pss = memory()[1] + sum(pss for _, pss, _ in worker_memory)
+    mean_uss = sum(uss for _, _, uss in worker_memory) / float(workers)
+    os.close(release_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    os.write(report, ("%d %d %d" % (master_rss, mean_uss, total_pss)).encode("ascii"))
+
+
+def measure(load, names, workers, sample):
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if not pid:
+        os.close(read_end)
+        run_master(load, names, workers, sample, write_end)
+        os._exit(0)
+    os.close(write_end)
+    result = os.read(read_end, 128)
+    os.waitpid(pid, 0)
+    return [int(value) for value in result.split()]
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 5000
+    workers = int(argv[2]) if len(argv) > 2 else 16
+    sample = int(argv[3]) if len(argv) > 3 else 200
+
+    directory = tempfile.mkdtemp()
+    try:
+        keys = make_keys(count)
+        names = [name for name, _ in keys]
+        bundle_path = os.path.join(directory, "partners.pem")
+        with open(bundle_path, "w") as bundle:
+            for name, pem_key in keys:
+                begin, rest = pem_key.split("\n", 1)
+                bundle.write("%s\nConsumer-Key: %s\n\n%s" % (begin, name, rest))
+        blob_path = os.path.join(directory, "partners.blob")
+        write_key_blob(blob_path, keys)
+        del keys
+
+        print("%d keys, %d workers, %d keys used per worker" % (count, workers, sample))
+        print("bundle %.1f MB, blob %.1f MB" % (os.path.getsize(bundle_path) / 1048576.0,
+                                                os.path.getsize(blob_path) / 1048576.0))
+        print("%-8s %14s %16s %14s" % ("", "master RSS MB", "worker USS MB", "total PSS MB"))
+        for label, load in (("no keys", dict),
+                            ("keyring", lambda: Keyring([bundle_path])),
+                            ("blob", lambda: KeyBlob(blob_path))):
+            master_rss, mean_uss, total_pss = measure(load, names, workers, sample)
+            print("%-8s %14.1f %16.1f %14.1f" % (label, master_rss / 1024.0,
+                                                 mean_uss / 1024.0, total_pss / 1024.0))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: nonces and verification codes per second.
+#
+# Compares generate_nonce and generate_verification_code (one OS
+# randomness call and one conversion per value) with NonceGenerator and
+# VerificationCodeGenerator handing out values from per-thread blocks.
+#
+# Usage::
+#
+#     python benchmarks/bench_nonce_generators.py [block_size]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.protocol import generate_nonce, generate_verification_code, \
+    NonceGenerator, VerificationCodeGenerator
+
+
+def rate(func, number=20000):
+    return number / min(timeit.repeat(func, number=number, repeat=3))
+
+
+def main(argv):
+    block_size = int(argv[1]) if len(argv) > 1 else 256
+    cases = [
+        ("nonce decimal", lambda: generate_nonce(64, 10),
+         NonceGenerator(64, "decimal", block_size).generate),
+        ("nonce hex", lambda: generate_nonce(64, 16),
+         NonceGenerator(64, "hex", block_size).generate),
+        ("nonce base64url", lambda: generate_nonce(64, 64),
+         NonceGenerator(64, "base64url", block_size).generate),
+        ("verifier hex", generate_verification_code,
+         VerificationCodeGenerator(8, "hex", block_size).generate),
+        ("verifier decimal", None,
+         VerificationCodeGenerator(8, "decimal", block_size).generate),
+    ]
+    print("block size: %d" % block_size)
+    print("%-18s %14s %14s %8s" % ("value", "function/s", "generator/s", "speedup"))
+    for label, function, generator in cases:
+        new = rate(generator)
+        if function is None:
+            print("%-18s %14s %14.0f %8s" % (label, "-", new, "-"))
+            continue
+        old = rate(function)
+        print("%-18s %14.0f %14.0f %7.1fx" % (label, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: big-integer arithmetic backends in pyoauth.types.number.
+#
+# Times pow_mod with a full-size exponent (an RSA private-key operation),
+# pow_mod with e=65537 (an RSA public-key operation), inverse_mod and gcd
+# for every available backend.
+#
+# Usage::
+#
+#     python benchmarks/bench_number_backends.py [bits ...]
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.types.number import BACKEND, available_backends, get_backend
+
+
+def best_time(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def bench(bits, rng):
+    modulus = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    base = rng.getrandbits(bits) % modulus
+    power = rng.getrandbits(bits)
+    other = rng.getrandbits(bits)
+    # Fewer repetitions for big private-key operations.
+    number = max(1, 20 * 1024 // bits)
+    print("%d bits" % bits)
+    for name in available_backends():
+        backend = get_backend(name)
+        results = [
+            best_time(lambda: backend.pow_mod(base, power, modulus), number),
+            best_time(lambda: backend.pow_mod(base, 65537, modulus), number * 20),
+            best_time(lambda: backend.inverse_mod(base, modulus), number * 20),
+            best_time(lambda: backend.gcd(base, other), number * 20),
+        ]
+        print("  %-8s pow_mod %9.3f ms  pow_mod(e) %8.1f us  "
+              "inverse_mod %8.1f us  gcd %8.1f us" % (
+                  name, results[0] * 1e3, results[1] * 1e6,
+                  results[2] * 1e6, results[3] * 1e6))
+
+
+def main(argv):
+    bit_sizes = [int(arg) for arg in argv[1:]] or [1024, 2048, 3072, 4096]
+    print("active backend: %s" % BACKEND)
+    rng = random.Random(42)
+    for bits in bit_sizes:
+        bench(bits, rng)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: byte string <-> integer conversions.
+#
+# Compares the previous implementations (the struct loop in
+# pyoauth.types.number, the per-byte array walk in pyoauth.types.bytearray
+# and the hexadecimal bit_count) with the current conversion layer, for
+# sizes from 8-byte nonces to 512-byte RSA blocks.
+#
+# Usage::
+#
+#     python benchmarks/bench_number_conversions.py [size ...]
+
+import os
+import struct
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.types import bit_count, byte_count
+from pyoauth.types.bytearray import bytearray_to_long, long_to_bytearray
+from pyoauth.types.number import BACKEND, bytes_to_long, long_to_bytes
+
+
+def struct_bytes_to_long(byte_string):
+    acc = 0
+    unpack = struct.unpack
+    length = len(byte_string)
+    if length % 4:
+        extra = (4 - length % 4)
+        byte_string = b"\000" * extra + byte_string
+        length = length + extra
+    for i in range(0, length, 4):
+        acc = (acc << 32) + unpack(">I", byte_string[i:i+4])[0]
+    return acc
+
+
+def struct_long_to_bytes(num):
+    s = b""
+    pack = struct.pack
+    while num > 0:
+        s = pack(">I", num & 0xffffffff) + s
+        num >>= 32
+    return s.lstrip(b"\000") or b"\000"
+
+
+def hex_bit_count(num):
+    if not num:
+        return 0
+    s = "%x" % num
+    return ((len(s)-1)*4) + {
+        '0':0, '1':1, '2':2, '3':2, '4':3, '5':3, '6':3, '7':3,
+        '8':4, '9':4, 'a':4, 'b':4, 'c':4, 'd':4, 'e':4, 'f':4}[s[0]]
+
+
+def walk_bytearray_to_long(byte_array):
+    total = 0
+    multiplier = 1
+    for count in range(len(byte_array)-1, -1, -1):
+        total += multiplier * byte_array[count]
+        multiplier *= 256
+    return total
+
+
+def walk_long_to_bytearray(num):
+    bytes_count = (hex_bit_count(num) + 7) // 8
+    byte_array = array("B", [0] * bytes_count)
+    for count in range(bytes_count - 1, -1, -1):
+        byte_array[count] = int(num % 256)
+        num >>= 8
+    return byte_array
+
+
+def per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def bench(size):
+    byte_string = os.urandom(size - 1) + b"\x01"
+    byte_array = array("B", byte_string)
+    num = bytes_to_long(byte_string)
+    plain = struct_bytes_to_long(byte_string)
+    number = max(200, 200000 // size)
+    rows = [
+        ("bytes_to_long", lambda: struct_bytes_to_long(byte_string),
+         lambda: bytes_to_long(byte_string)),
+        ("long_to_bytes", lambda: struct_long_to_bytes(plain),
+         lambda: long_to_bytes(num)),
+        ("bytearray_to_long", lambda: walk_bytearray_to_long(byte_array),
+         lambda: bytearray_to_long(byte_array)),
+        ("long_to_bytearray", lambda: walk_long_to_bytearray(plain),
+         lambda: long_to_bytearray(plain)),
+        ("bit_count", lambda: hex_bit_count(plain), lambda: bit_count(plain)),
+        ("byte_count", lambda: (hex_bit_count(plain) + 7) // 8,
+         lambda: byte_count(plain)),
+    ]
+    print("%d bytes" % size)
+    for name, old, new in rows:
+        old_time = per_call(old, number)
+        new_time = per_call(new, number)
+        print("  %-18s old %9.2f us  new %8.2f us  (%.1fx)" % (
+            name, old_time, new_time, old_time / new_time))
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv[1:]] or [8, 16, 32, 128, 256, 512]
+    print("arithmetic backend: %s" % BACKEND)
+    for size in sizes:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Memory benchmark: bytes per RequestProxy, ResponseProxy and Credentials.
+#
+# Compares the slotted classes with dictionary-backed equivalents laid out
+# the way the classes were before they declared ``__slots__``. Each proxy
+# is measured together with its own header map: a Headers instance now,
+# a plain dictionary before. Field values and header strings are shared
+# between instances, so the figures are the per-object overhead a work
+# queue pays for each entry.
+#
+# Uses tracemalloc when it is available (Python 3.4+); otherwise sums
+# ``sys.getsizeof`` for each instance, its ``__dict__`` and the containers
+# of its header map.
+#
+# Usage::
+#
+#     python benchmarks/bench_object_memory.py [count]
+
+import gc
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from pyoauth.http import Headers, RequestProxy, ResponseProxy
+from pyoauth.oauth1 import Credentials
+
+
+class DictRequestProxy(object):
+    def __init__(self, method, url, body=None, headers=None):
+        self._method = method.upper()
+        self._url = url
+        self._body = body
+        self._headers = headers
+
+
+class DictResponseProxy(object):
+    def __init__(self, status_code, status, body, headers=None):
+        self._body = body
+        self._status_message = status
+        self._status_code = status_code
+        self._headers = headers
+
+
+class DictCredentials(object):
+    def __init__(self, identifier, shared_secret):
+        self._identifier = identifier
+        self._shared_secret = shared_secret
+
+
+URL = "http://photos.example.net/photos?file=vacation.jpg&size=original"
+HEADERS = {"Authorization": 'OAuth realm="Photos"'}
+
+
+def shallow_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def headers_size(headers):
+    if headers is None:
+        return 0
+    size = shallow_size(headers)
+    if isinstance(headers, Headers):
+        # name -> (name, [value, ...])
+        size += sys.getsizeof(headers._map)
+        for entry in headers._map.values():
+            size += sys.getsizeof(entry) + sys.getsizeof(entry[1])
+    return size
+
+
+def object_size(obj):
+    return shallow_size(obj) + headers_size(getattr(obj, "_headers", None))
+
+
+def measure(factory, count):
+    if tracemalloc is None:
+        return float(object_size(factory()))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Exclude the list holding the objects.
+    return float(after - before - sys.getsizeof(objects)) / count
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 100000
+    # Every proxy gets its own header map, as requests built by the client
+    # and responses read by the transports do.
+    cases = [
+        ("RequestProxy",
+         lambda: DictRequestProxy("GET", URL, "", dict(HEADERS)),
+         lambda: RequestProxy("GET", URL, "", HEADERS)),
+        ("ResponseProxy",
+         lambda: DictResponseProxy(200, "OK", "", dict(HEADERS)),
+         lambda: ResponseProxy(200, "OK", "", HEADERS)),
+        ("Credentials",
+         lambda: DictCredentials("dpf43f3p2l4k3l03", "kd94hf93k423kf44"),
+         lambda: Credentials("dpf43f3p2l4k3l03", "kd94hf93k423kf44")),
+    ]
+    print("bytes/object (%s)" % ("tracemalloc, %d objects" % count
+                                 if tracemalloc else "sys.getsizeof"))
+    for name, old, new in cases:
+        old_size = measure(old, count)
+        new_size = measure(new, count)
+        print("%-14s dict %7.1f  slots %7.1f  (%.0f%% smaller)" % (
+            name, old_size, new_size, 100.0 * (old_size - new_size) / old_size))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
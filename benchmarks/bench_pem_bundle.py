@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: PEM encoding and decoding of a large certificate bundle.
+#
+# Encodes the test certificates into a bundle with the former
+# textwrap-based der_to_pem and with the current 64-column slicing, then
+# decodes every block of the bundle file by splitting it and applying the
+# former strict pem_to_der to each piece, by reading it line by line, by
+# scanning the whole string and by scanning a memory map of the file.
+#
+# Usage::
+#
+#     python benchmarks/bench_pem_bundle.py [certificates]
+
+import os
+import sys
+import tempfile
+import textwrap
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.codec.pem import der_to_pem, iter_pem_blocks, \
+    iter_pem_file_blocks, pem_to_der_certificate, \
+    CERT_PEM_HEADER, CERT_PEM_FOOTER
+from pyoauth.crypto.codec.pem.x509 import TEST_CERTIFICATES
+from pyoauth.types.codec import base64_decode, base64_encode
+
+
+def textwrap_der_to_pem(der, header, footer):
+    return header + "\n" + textwrap.fill(base64_encode(der), 64) + "\n" + footer + "\n"
+
+
+def strict_pem_to_der(pem, header, footer):
+    pem = pem.strip()
+    if not pem.startswith(header) or not pem.endswith(footer):
+        raise ValueError("Invalid PEM encoding")
+    return base64_decode(pem[len(header):-len(footer)])
+
+
+def split_strict(path):
+    with open(path, "rb") as pem_file:
+        pieces = pem_file.read().split(CERT_PEM_FOOTER)[:-1]
+    return [strict_pem_to_der(piece + CERT_PEM_FOOTER, CERT_PEM_HEADER, CERT_PEM_FOOTER)
+            for piece in pieces]
+
+
+def lines(path):
+    with open(path, "rb") as pem_file:
+        return [der for _, _, der in iter_pem_blocks(pem_file)]
+
+
+def scan_string(path):
+    with open(path, "rb") as pem_file:
+        return [der for _, _, der in iter_pem_blocks(pem_file.read())]
+
+
+def scan_mmap(path):
+    return [der for _, _, der in iter_pem_file_blocks(path)]
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 10000
+    ders = [pem_to_der_certificate(TEST_CERTIFICATES[i % len(TEST_CERTIFICATES)])
+            for i in range(count)]
+
+    print("%d certificates" % count)
+    for label, encode in (("textwrap der_to_pem", textwrap_der_to_pem),
+                          ("sliced der_to_pem", der_to_pem)):
+        elapsed, pems = timed(lambda: [encode(der, CERT_PEM_HEADER, CERT_PEM_FOOTER)
+                                       for der in ders])
+        print("%-24s %8.3f s" % (label, elapsed))
+
+    fd, path = tempfile.mkstemp(suffix=".pem")
+    try:
+        os.write(fd, "".join(pems))
+        os.close(fd)
+        print("bundle: %.1f MB" % (os.path.getsize(path) / 1048576.0))
+        for label, decode in (("split + strict pem_to_der", split_strict),
+                              ("line iterator", lines),
+                              ("string scan", scan_string),
+                              ("mmap scan", scan_mmap)):
+            elapsed, result = timed(decode, path)
+            assert result == ders
+            print("%-24s %8.3f s" % (label, elapsed))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
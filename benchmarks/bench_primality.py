@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: primality tests per second.
+#
+# Compares the previous is_prime (trial division by every sieve prime, then
+# five Rabin-Miller rounds with random bases) with the current engine
+# (primorial gcd pre-filter, then Baillie-PSW) on random odd candidates,
+# which are mostly composites, and on primes, which pay for the full test.
+#
+# Usage::
+#
+#     python benchmarks/bench_primality.py [bits ...]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.primes import is_prime, get_sieve
+from pyoauth.crypto.random import generate_random_long
+from pyoauth.types.number import BACKEND, pow_mod
+
+
+sieve = get_sieve()
+
+
+def legacy_is_prime(n, iterations=5):
+    for x in sieve:
+        if x >= n: return True
+        if not n % x: return False
+    s, t = n-1, 0
+    while not s % 2:
+        s, t = s//2, t+1
+    a = 2
+    for count in range(iterations):
+        v = pow_mod(a, s, n)
+        if v==1:
+            continue
+        i = 0
+        while v != n-1:
+            if i == t-1:
+                return False
+            else:
+                v, i = pow_mod(v, 2, n), i+1
+        a = generate_random_long(2, n)
+    return True
+
+
+def rate(func, numbers, min_time=0.5):
+    count = 0
+    start = time.time()
+    while True:
+        for n in numbers:
+            func(n)
+        count += len(numbers)
+        elapsed = time.time() - start
+        if elapsed >= min_time:
+            return count / elapsed
+
+
+def find_primes(bits, count, rng):
+    found = []
+    while len(found) < count:
+        n = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if is_prime(n):
+            found.append(n)
+    return found
+
+
+def main(argv):
+    bit_sizes = [int(arg) for arg in argv[1:]] or [512, 1024, 2048]
+    rng = random.Random(2048)
+    print("arithmetic backend: %s" % BACKEND)
+    print("%6s %-10s %14s %14s %8s" % ("bits", "input", "legacy/s", "engine/s", "speedup"))
+    for bits in bit_sizes:
+        candidates = [rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+                      for i in range(200)]
+        primes = find_primes(bits, 3, rng)
+        for label, numbers in (("candidates", candidates), ("primes", primes)):
+            old = rate(legacy_is_prime, numbers)
+            new = rate(is_prime, numbers)
+            print("%6d %-10s %14.1f %14.1f %7.1fx" % (bits, label, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: prime candidate search.
+#
+# Compares the previous search (step through numbers = 29 mod 30 and call
+# is_prime on each) with the sieved window search. Reports, per prime
+# found, how many candidates were handed to is_prime (each paying for its
+# own trial division), how many reached the probable-prime test, and the
+# time taken.
+#
+# Usage::
+#
+#     python benchmarks/bench_prime_search.py [bits ...]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto import primes
+from pyoauth.crypto.random import generate_random_long
+from pyoauth.types.number import BACKEND
+
+
+class Counter(object):
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.func(*args)
+
+
+def legacy_generate_random_prime(bits):
+    low = (2 ** (bits-1)) * 3 // 2
+    high = 2 ** bits - 30
+    p = generate_random_long(low, high)
+    p += 29 - (p % 30)
+    while 1:
+        p += 30
+        if p >= high:
+            p = generate_random_long(low, high)
+            p += 29 - (p % 30)
+        if primes.is_prime(p):
+            return p
+
+
+def measure(search, bits, count):
+    original_is_prime = primes.is_prime
+    original_test = primes._is_probable_prime
+    primes.is_prime = is_prime = Counter(original_is_prime)
+    primes._is_probable_prime = test = Counter(original_test)
+    try:
+        start = time.time()
+        for i in range(count):
+            search(bits)
+        elapsed = time.time() - start
+    finally:
+        primes.is_prime = original_is_prime
+        primes._is_probable_prime = original_test
+    return (float(is_prime.calls) / count, float(test.calls) / count,
+            elapsed * 1000.0 / count)
+
+
+def main(argv):
+    bit_sizes = [int(arg) for arg in argv[1:]] or [512, 1024]
+    print("arithmetic backend: %s" % BACKEND)
+    print("%6s %-8s %14s %14s %10s" % ("bits", "search", "is_prime/p", "prp tests/p", "ms/p"))
+    for bits in bit_sizes:
+        count = max(10, 131072 // bits)
+        for label, search in (("legacy", legacy_generate_random_prime),
+                              ("sieved", primes.generate_random_prime)):
+            print("%6d %-8s %14.1f %14.1f %10.2f" % ((bits, label) + measure(search, bits, count)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: decoding PEM RSA private keys.
+#
+# Compares the pyasn1 decoder (RSAPrivateKey(pem).private_key) with
+# private_key_pem_decode, which reads the DER with the strict reader in
+# pyoauth.crypto.codec.der, for PKCS#8 and PKCS#1 keys.
+#
+# Usage::
+#
+#     python benchmarks/bench_private_key_decode.py [bits ...]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyasn1.codec.der import encoder
+from pyoauth.crypto.codec import private_key_pem_decode
+from pyoauth.crypto.codec.pem import der_to_pem_rsa_private_key
+from pyoauth.crypto.codec.pem.rsa import RSAPrivateKey, TEST_RSA_PRIVATE_KEYS
+from pyoauth.crypto.rsa import generate_key_pair
+
+
+def pyasn1_decode(pem_key):
+    return RSAPrivateKey(pem_key).private_key
+
+
+def per_second(func, pem_key, number):
+    return number / min(timeit.repeat(lambda: func(pem_key), number=number, repeat=3))
+
+
+def main(argv):
+    bit_sizes = [int(arg) for arg in argv[1:]] or [2048, 4096]
+    keys = [("1024 (test)", TEST_RSA_PRIVATE_KEYS[0])]
+    for bits in bit_sizes:
+        keys.append(("%d" % bits, generate_key_pair(bits, processes=1)[0].encoded_key))
+
+    print("%-12s %-7s %12s %12s %8s" % ("bits", "format", "pyasn1/s", "der/s", "speedup"))
+    for label, pkcs8_key in keys:
+        pkcs1_key = der_to_pem_rsa_private_key(
+            encoder.encode(RSAPrivateKey(pkcs8_key)._private_key_asn1))
+        for name, pem_key in (("PKCS#8", pkcs8_key), ("PKCS#1", pkcs1_key)):
+            assert private_key_pem_decode(pem_key) == pyasn1_decode(pem_key)
+            old = per_second(pyasn1_decode, pem_key, 200)
+            new = per_second(private_key_pem_decode, pem_key, 2000)
+            print("%-12s %-7s %12.0f %12.0f %7.1fx" % (label, name, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: random long integers per second.
+#
+# Compares the previous generate_random_long (one random read, top-byte
+# masking and a byte-by-byte conversion per attempt, rejecting anything
+# below low) with generate_random_longs drawing one buffer per batch.
+#
+# Usage::
+#
+#     python benchmarks/bench_random_longs.py [count]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.random import generate_random_bytes, generate_random_longs
+from pyoauth.types import bit_count, byte_count
+
+
+def legacy_bytearray_to_long(byte_array):
+    total = 0
+    multiplier = 1
+    for count in range(len(byte_array) - 1, -1, -1):
+        byte = byte_array[count]
+        total += multiplier * byte
+        multiplier *= 256
+    return total
+
+
+def legacy_generate_random_long(low, high):
+    num_bits = bit_count(high)
+    num_bytes = byte_count(high)
+    last_bits = num_bits % 8
+    while 1:
+        byte_array = bytearray(generate_random_bytes(num_bytes))
+        if last_bits:
+            byte_array[0] = byte_array[0] % (1 << last_bits)
+        n = legacy_bytearray_to_long(byte_array)
+        if n >= low and n < high:
+            return n
+
+
+def rate(func, count, min_time=0.5):
+    done = 0
+    start = time.time()
+    while True:
+        func(count)
+        done += count
+        elapsed = time.time() - start
+        if elapsed >= min_time:
+            return done / elapsed
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 100
+    ranges = (
+        ("MR bases, 1024-bit n", 2, 2 ** 1024 - 1),
+        ("prime starts, 512-bit", 3 * 2 ** 510, 2 ** 512),
+        ("prime starts, 1024-bit", 3 * 2 ** 1022, 2 ** 1024),
+        ("small, [1000, 2000)", 1000, 2000),
+    )
+    print("%-24s %14s %14s %8s" % ("range", "legacy/s", "batched/s", "speedup"))
+    for label, low, high in ranges:
+        old = rate(lambda n: [legacy_generate_random_long(low, high) for i in range(n)], count)
+        new = rate(lambda n: generate_random_longs(low, high, n), count)
+        print("%-24s %14.0f %14.0f %7.1fx" % (label, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
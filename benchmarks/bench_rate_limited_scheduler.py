@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: rate-limited resource requests, naive versus scheduled.
+#
+# Simulates a batch of users fetching from two endpoints of a provider that
+# allows each token a fixed number of requests per endpoint per window.
+# The provider is the local stand-in server from the test suite.
+#
+# naive       sends requests in submission order and, on 429, sleeps for
+#             Retry-After, signs the request again and resends it.
+# scheduled   RequestScheduler learning budgets from response headers.
+# quotas      RequestScheduler with the limits also configured up front.
+#
+# Refused counts the signed requests the server answered with 429.
+#
+# Usage::
+#
+#     python benchmarks/bench_rate_limited_scheduler.py [tokens] [requests_per_token] [limit] [window]
+#
+# Defaults to 4 tokens, 20 requests each, 5 requests per token and
+# endpoint per 1 s window.
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.oauth1 import Credentials
+from pyoauth.oauth1.client.scheduler import RateLimiter, RequestScheduler, \
+    request_endpoint
+from pyoauth.transport import HttpTransport
+from tests.stand_in_server import StandInOAuthServer
+
+PATHS = ("/statuses/home_timeline.json", "/statuses/mentions.json")
+
+
+def workload(server, tokens, per_token):
+    """
+    Each user's requests are queued together, alternating between the
+    endpoints, as when a batch job syncs one account after another.
+    """
+    return [(token, server.url(PATHS[i % len(PATHS)]))
+            for token in tokens for i in range(per_token)]
+
+
+def run_naive(server, client, transport, work):
+    sent = 0
+    for token, url in work:
+        while True:
+            sent += 1
+            response = transport.execute(client.build_resource_request(token, "GET", url))
+            if response.status_code != 429:
+                break
+            time.sleep(int(response.get_header("Retry-After")))
+    return sent
+
+
+def run_scheduled(server, client, transport, work, limiter=None):
+    scheduler = RequestScheduler(client, transport, limiter=limiter, max_attempts=10)
+    for token, url in work:
+        scheduler.submit(token, "GET", url)
+    completed = scheduler.run()
+    assert all(s.response.status_code == 200 for s in completed)
+    return sum(s.attempts for s in completed)
+
+
+def main(argv):
+    args = [int(arg) for arg in argv[1:]]
+    num_tokens, per_token, limit, window = args + [4, 20, 5, 1][len(args):]
+    tokens = [Credentials(identifier="token%d" % i, shared_secret="secret%d" % i)
+              for i in range(num_tokens)]
+
+    print("%d tokens x %d requests over %d endpoints, limit %d per token and endpoint per %d s" % (
+        num_tokens, per_token, len(PATHS), limit, window))
+    print("%-10s %10s %8s %8s %10s" % ("mode", "seconds", "sent", "refused", "requests/s"))
+    modes = (
+        ("naive", lambda s, c, t, w: run_naive(s, c, t, w)),
+        ("scheduled", lambda s, c, t, w: run_scheduled(s, c, t, w)),
+        ("quotas", lambda s, c, t, w: run_scheduled(s, c, t, w, RateLimiter(
+            quotas=dict((request_endpoint(s.url(path)), (limit, window)) for path in PATHS)))),
+    )
+    for label, run in modes:
+        server = StandInOAuthServer(rate_limit=(limit, window)).start()
+        for token in tokens:
+            server.add_token(token)
+        transport = HttpTransport()
+        client = server.create_client()
+        work = workload(server, tokens, per_token)
+        # Start on a window boundary so that every mode sees the same windows.
+        time.sleep(window - time.time() % window)
+        start = time.time()
+        sent = run(server, client, transport, work)
+        elapsed = time.time() - start
+        print("%-10s %10.2f %8d %8d %10.1f" % (label, elapsed, sent, server.rate_limited,
+                                               len(work) / elapsed))
+        transport.close()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: RSA key pairs generated per minute.
+#
+# Compares generating keys one at a time in the calling process with
+# generate_key_pairs spreading the prime searches over a process pool.
+#
+# Usage::
+#
+#     python benchmarks/bench_rsa_keygen.py [bits ...]
+
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.rsa import get_implementation, generate_key_pair, generate_key_pairs
+from pyoauth.types.number import BACKEND
+
+
+def serial(count, bits):
+    for i in range(count):
+        generate_key_pair(bits, processes=1)
+
+
+def pooled(count, bits):
+    generate_key_pairs(count, bits)
+
+
+def keys_per_minute(func, count, bits):
+    start = time.time()
+    func(count, bits)
+    return count * 60.0 / (time.time() - start)
+
+
+def main(argv):
+    bit_sizes = [int(arg) for arg in argv[1:]] or [1024, 2048]
+    cpus = multiprocessing.cpu_count()
+    print("arithmetic backend: %s, rsa: %s, cpus: %d" % (BACKEND, get_implementation(), cpus))
+    print("%6s %8s %14s %14s %8s" % ("bits", "keys", "serial/min", "pooled/min", "speedup"))
+    for bits in bit_sizes:
+        count = max(cpus, 16384 // bits)
+        old = keys_per_minute(serial, count, bits)
+        new = keys_per_minute(pooled, count, bits)
+        print("%6d %8d %14.1f %14.1f %7.1fx" % (bits, count, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
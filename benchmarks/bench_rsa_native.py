@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: integer conversions and time per RSA-SHA1 signature.
+#
+# Compares the native RSA keys, which keep their components in the
+# arithmetic backend's integer type, with the previous arrangement: key
+# components held as Python longs, and a gmpy pow_mod that wrapped every
+# argument in mpz() and converted the result back with long().
+#
+# Usage::
+#
+#     python benchmarks/bench_rsa_native.py [iterations]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.codec import private_key_pem_decode, public_key_pem_decode
+from pyoauth.crypto.codec.pem.rsa import TEST_RSA_PRIVATE_KEYS, \
+    TEST_PUBLIC_PEM_KEYS
+from pyoauth.crypto.hash import sha1_digest
+from pyoauth.crypto.rsa import keys, native
+from pyoauth.types import number
+
+
+class Counter(object):
+    count = 0
+
+    def wrap(self, func):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return func(*args, **kwargs)
+        return counted
+
+
+def legacy_pow_mod(counter, mpz):
+    # The pow_mod that used to be defined when gmpy was importable.
+    def pow_mod(base, power, modulus):
+        counter.count += 4
+        return long(pow(mpz(base), mpz(power), mpz(modulus)))
+    return pow_mod
+
+
+def legacy_long_to_bytes(counter):
+    # Key.sign and pkcs1_v1_5_encode converted to Python longs first.
+    def long_to_bytes(num, blocksize=0):
+        counter.count += 1
+        return number.long_to_bytes(long(num), blocksize)
+    return long_to_bytes
+
+
+def run(private_key, public_key, digest, counter, patches):
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+    try:
+        counter.count = 0
+        signature = private_key.pkcs1_v1_5_sign(digest)
+        sign_conversions = counter.count
+        counter.count = 0
+        assert public_key.pkcs1_v1_5_verify(digest, signature)
+        verify_conversions = counter.count
+        sign_time = min(timeit.repeat(lambda: private_key.pkcs1_v1_5_sign(digest),
+                                      number=ITERATIONS, repeat=3)) / ITERATIONS
+        verify_time = min(timeit.repeat(lambda: public_key.pkcs1_v1_5_verify(digest, signature),
+                                        number=ITERATIONS, repeat=3)) / ITERATIONS
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+    return sign_conversions, verify_conversions, sign_time, verify_time
+
+
+ITERATIONS = 200
+
+
+def main(argv):
+    global ITERATIONS
+    if len(argv) > 1:
+        ITERATIONS = int(argv[1])
+    backend = number.get_backend()
+    if backend.name not in ("gmpy2", "gmpy"):
+        print("Arithmetic backend is %r: native integers are already Python "
+              "longs, so there are no conversions to save." % backend.name)
+        return
+
+    private_pem = TEST_RSA_PRIVATE_KEYS[0].strip()
+    public_pem = TEST_PUBLIC_PEM_KEYS[0].strip()
+    private_info = private_key_pem_decode(private_pem)
+    public_info = public_key_pem_decode(public_pem)
+    digest = sha1_digest("GET&http%3A%2F%2Fphotos.example.net%2Fphotos")
+    counter = Counter()
+
+    # Boundary conversions only: bytes in, bytes out.
+    native_results = run(
+        native.PrivateKey(private_info, private_pem, "PEM"),
+        native.PublicKey(public_info, public_pem, "PEM"),
+        digest, counter, [
+            (native, "bytes_to_long", counter.wrap(number.bytes_to_long)),
+            (keys, "bytes_to_long", counter.wrap(number.bytes_to_long)),
+            (keys, "long_to_bytes", counter.wrap(number.long_to_bytes)),
+        ])
+
+    # Key components as longs, converting around every operation.
+    legacy_private = native.PrivateKey(private_info, private_pem, "PEM")
+    legacy_public = native.PublicKey(public_info, public_pem, "PEM")
+    for key in (legacy_private, legacy_public):
+        for name, value in list(vars(key).items()):
+            if isinstance(value, backend.mpz):
+                setattr(key, name, long(value))
+    legacy_results = run(
+        legacy_private, legacy_public, digest, counter, [
+            (native, "pow_mod", legacy_pow_mod(counter, backend.mpz)),
+            (native, "bytes_to_long", counter.wrap(number.bytes_to_long_original)),
+            (keys, "bytes_to_long", counter.wrap(number.bytes_to_long_original)),
+            (keys, "long_to_bytes", legacy_long_to_bytes(counter)),
+        ])
+
+    print("backend: %s, 1024-bit key, %d iterations" % (backend.name, ITERATIONS))
+    print("%-8s %18s %18s %12s %12s" % ("", "sign conversions", "verify conversions",
+                                        "sign", "verify"))
+    for label, (sc, vc, st, vt) in (("legacy", legacy_results), ("native", native_results)):
+        print("%-8s %18d %18d %9.1f us %9.1f us" % (label, sc, vc, st * 1e6, vt * 1e6))
+    print("saved per signature: %d conversions; per verification: %d" % (
+        legacy_results[0] - native_results[0], legacy_results[1] - native_results[1]))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: SHA-1 and HMAC-SHA1 of large files.
+#
+# Compares reading the whole file into memory and calling sha1_digest with
+# the streaming helpers on the file object and on an mmap of it. Each run
+# happens in a forked child so that its peak resident memory can be
+# reported; the figure is the growth over an idle child.
+#
+# Usage::
+#
+#     python benchmarks/bench_stream_hash.py [size_in_mb ...]
+#
+# Sizes default to 1, 16 and 256 MB; pass 1024 for the 1 GB case.
+
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.crypto.hash import sha1_digest, sha1_stream_digest, \
+    hmac_sha1_digest, hmac_sha1_stream_digest
+
+KEY = b"kd94hf93k423kf44&pfkkdhi9sl3r4s00"
+
+
+def read_whole(path):
+    with open(path, "rb") as f:
+        return sha1_digest(f.read())
+
+
+def stream_file(path):
+    with open(path, "rb") as f:
+        return sha1_stream_digest(f)
+
+
+def stream_mmap(path):
+    with open(path, "rb") as f:
+        region = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return sha1_stream_digest(region)
+        finally:
+            region.close()
+
+
+def hmac_read_whole(path):
+    with open(path, "rb") as f:
+        return hmac_sha1_digest(KEY, f.read())
+
+
+def hmac_stream_file(path):
+    with open(path, "rb") as f:
+        return hmac_sha1_stream_digest(KEY, f)
+
+
+METHODS = (
+    ("sha1 read()", read_whole),
+    ("sha1 stream", stream_file),
+    ("sha1 mmap", stream_mmap),
+    ("hmac read()", hmac_read_whole),
+    ("hmac stream", hmac_stream_file),
+)
+
+
+def run_in_child(func, path):
+    """
+    Returns (seconds, peak RSS in KB) of func(path) run in a forked child.
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if not pid:
+        os.close(read_end)
+        start = time.time()
+        if func is not None:
+            func(path)
+        os.write(write_end, repr(time.time() - start).encode("ascii"))
+        os._exit(0)
+    os.close(write_end)
+    elapsed = float(os.read(read_end, 64))
+    os.close(read_end)
+    _, _, usage = os.wait4(pid, 0)
+    return elapsed, usage.ru_maxrss
+
+
+def make_file(size):
+    f = tempfile.NamedTemporaryFile(delete=False)
+    block = os.urandom(1 << 20)
+    for i in range(size >> 20):
+        f.write(block)
+    f.close()
+    return f.name
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv[1:]] or [1, 16, 256]
+    _, idle_rss = run_in_child(None, None)
+    print("%8s %-12s %10s %12s" % ("size MB", "method", "MB/s", "+RSS MB"))
+    for size in sizes:
+        path = make_file(size << 20)
+        try:
+            for label, func in METHODS:
+                # Warm the page cache so that every method reads from memory.
+                run_in_child(stream_file, path)
+                elapsed, rss = run_in_child(func, path)
+                print("%8d %-12s %10.0f %12.1f" % (size, label, size / elapsed,
+                                                   max(0, rss - idle_rss) / 1024.0))
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
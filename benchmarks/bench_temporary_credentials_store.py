@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Benchmark: temporary credentials stores during a login spike.
+#
+# Puts N pending flows, looks each one up and pops it, as the callback
+# handler would. For the in-memory stores each run happens in a forked
+# child so that the memory held by N pending entries can be reported.
+# "dict" keeps the Credentials objects in a plain dictionary, with no
+# expiry or bound, for comparison; those objects exist before the fork,
+# so its figure is only the dictionary's own overhead. The SQLite store
+# is also run with several worker processes popping from one database.
+#
+# Usage::
+#
+#     python benchmarks/bench_temporary_credentials_store.py [entries] [workers]
+#
+# Defaults to 200000 entries and 2 workers.
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyoauth.oauth1 import Credentials
+from pyoauth.oauth1.client.store import TemporaryCredentialsStore, \
+    SQLiteTemporaryCredentialsStore
+from pyoauth.protocol import NonceGenerator
+
+
+class DictStore(object):
+    def __init__(self):
+        self._entries = {}
+
+    def put(self, credentials):
+        self._entries[credentials.identifier] = credentials
+
+    def get(self, oauth_token):
+        return self._entries.get(oauth_token)
+
+    def pop(self, oauth_token):
+        return self._entries.pop(oauth_token, None)
+
+
+def make_credentials(count):
+    tokens = NonceGenerator(encoding="hex")
+    return [Credentials(tokens.generate(), tokens.generate()) for i in range(count)]
+
+
+def run_in_child(make_store, credentials):
+    """
+    Returns (put seconds, get seconds, pop seconds, peak RSS in KB) for a
+    store created by make_store() in a forked child.
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if not pid:
+        os.close(read_end)
+        times = [0, 0, 0]
+        if make_store is not None:
+            # Only the tokens stay referenced once the loop is done.
+            tokens = [c.identifier for c in credentials]
+            store = make_store()
+            start = time.time()
+            for c in credentials:
+                store.put(c)
+            del credentials[:]
+            times[0] = time.time() - start
+            start = time.time()
+            for token in tokens:
+                store.get(token)
+            times[1] = time.time() - start
+            start = time.time()
+            for token in tokens:
+                store.pop(token)
+            times[2] = time.time() - start
+        os.write(write_end, repr(times).encode("ascii"))
+        os._exit(0)
+    os.close(write_end)
+    times = eval(os.read(read_end, 256))
+    os.close(read_end)
+    _, _, usage = os.wait4(pid, 0)
+    return times + [usage.ru_maxrss]
+
+
+def pop_in_workers(path, tokens, workers):
+    """
+    Forks workers that each pop a share of the tokens; returns seconds.
+    """
+    start = time.time()
+    pids = []
+    for w in range(workers):
+        pid = os.fork()
+        if not pid:
+            store = SQLiteTemporaryCredentialsStore(path)
+            found = sum(1 for token in tokens[w::workers] if store.pop(token) is not None)
+            os._exit(0 if found == len(tokens[w::workers]) else 1)
+        pids.append(pid)
+    for pid in pids:
+        _, status = os.waitpid(pid, 0)
+        assert status == 0
+    return time.time() - start
+
+
+def main(argv):
+    args = [int(arg) for arg in argv[1:]]
+    count, workers = args + [200000, 2][len(args):]
+    credentials = make_credentials(count)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "temporary.db")
+        _, _, _, idle_rss = run_in_child(None, credentials)
+        print("%d entries" % count)
+        print("%-8s %10s %10s %10s %14s" % ("store", "put/s", "get/s", "pop/s", "bytes/entry"))
+        stores = (
+            ("dict", DictStore),
+            ("memory", lambda: TemporaryCredentialsStore(max_size=count)),
+            ("sqlite", lambda: SQLiteTemporaryCredentialsStore(
+                os.path.join(directory, "single.db"), max_size=count)),
+        )
+        for label, make_store in stores:
+            put, get, pop, rss = run_in_child(make_store, credentials)
+            per_entry = "%14.0f" % ((rss - idle_rss) * 1024.0 / count) if label != "sqlite" else "%14s" % "on disk"
+            print("%-8s %10.0f %10.0f %10.0f %s" % (label, count / put, count / get,
+                                                    count / pop, per_entry))
+
+        store = SQLiteTemporaryCredentialsStore(path, max_size=count)
+        for c in credentials:
+            store.put(c)
+        store.close()
+        tokens = [c.identifier for c in credentials]
+        elapsed = pop_in_workers(path, tokens, workers)
+        print("sqlite, %d worker processes: %.0f pops/s" % (workers, count / elapsed))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
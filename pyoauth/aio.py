@@ -0,0 +1,665 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Asynchronous HTTP transports.
+#
+# Copyright (C) 2011 Yesudeep Mangalapilly <yesudeep@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+:module: pyoauth.aio
+:synopsis: asyncio transports that execute request proxies.
+
+Requires :mod:`asyncio` (Python 3) or its Python 2 backport ``trollius``.
+Every asynchronous operation returns an :class:`asyncio.Future`, so the
+API can be used with callbacks, ``yield From(...)`` under trollius, or
+``await`` under Python 3.
+
+Classes
+-------
+.. autoclass:: AsyncTransport
+   :members:
+.. autoclass:: StreamTransport
+   :members:
+.. autoclass:: AsyncSignatureVerifier
+   :members:
+
+Functions
+---------
+.. autofunction:: chain_future
+"""
+
+import time
+
+try:
+    # Python 3.
+    import asyncio
+except ImportError:
+    try:
+        # Python 2 backport.
+        import trollius as asyncio
+    except ImportError:
+        raise ImportError("pyoauth.aio requires asyncio or trollius.")
+
+try:
+    # Python 3.
+    from urllib.parse import urlparse
+except ImportError:
+    # Python 2.5+
+    from urlparse import urlparse
+
+from pyoauth.crypto.hash import STREAM_BLOCK_SIZE
+from pyoauth.error import InvalidUrlError, InvalidHttpResponseError
+from pyoauth.http import Headers, ResponseProxy
+from pyoauth.types.unicode import to_utf8_if_unicode
+
+
+_DEFAULT_PORTS = {
+    "http": 80,
+    "https": 443,
+}
+
+
+def chain_future(future, func, loop=None):
+    """
+    Creates a future that resolves to ``func(result)`` once ``future``
+    resolves.
+
+    Exceptions raised by ``future`` or by ``func`` are propagated to the
+    returned future; cancellation is propagated as well.
+
+    :param future:
+        The future whose result will be transformed.
+    :param func:
+        A callable taking the result of ``future``.
+    :param loop:
+        The event loop to attach the new future to.
+    :returns:
+        A new :class:`asyncio.Future`.
+    """
+    chained = asyncio.Future(loop=loop)
+
+    def done(f):
+        if chained.done():
+            return
+        if f.cancelled():
+            chained.cancel()
+            return
+        exception = f.exception()
+        if exception is not None:
+            chained.set_exception(exception)
+            return
+        try:
+            result = func(f.result())
+        except Exception as e:
+            chained.set_exception(e)
+        else:
+            chained.set_result(result)
+    future.add_done_callback(done)
+    return chained
+
+
+def _split_url(url):
+    """
+    Splits an absolute HTTP URL into a pool key and a request target.
+
+    :param url:
+        Absolute ``http`` or ``https`` URL.
+    :returns:
+        Tuple of the form ``((scheme, host, port), request_target)``.
+    """
+    parts = urlparse(url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        raise InvalidUrlError("Absolute http or https URL required: got `%r`" % (url, ))
+    port = parts.port or _DEFAULT_PORTS[scheme]
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+    return (scheme, parts.hostname.lower(), port), target
+
+
+def _serialize_request(request, host, port, scheme, target):
+    """
+    Serializes a request proxy into an HTTP/1.1 request head and body.
+
+    File bodies (objects with ``read``, ``seek`` and ``tell``, such as the
+    spooled files built for ``oauth_body_hash`` requests) are returned as
+    they are, to be streamed from their current position; their length is
+    taken with ``seek`` and ``tell``.
+
+    :returns:
+        Tuple of the form ``(head, body)``.
+    """
+    body = request.body
+    if hasattr(body, "read"):
+        position = body.tell()
+        body.seek(0, 2)
+        length = body.tell() - position
+        body.seek(position)
+    else:
+        body = to_utf8_if_unicode(body) or b""
+        length = len(body)
+    headers = request.headers
+    if not isinstance(headers, Headers):
+        headers = Headers(headers)
+
+    lines = ["%s %s HTTP/1.1" % (request.method, target)]
+    if "host" not in headers:
+        if port == _DEFAULT_PORTS[scheme]:
+            lines.append("Host: %s" % host)
+        else:
+            lines.append("Host: %s:%d" % (host, port))
+    for name, value in headers.all_items():
+        lines.append("%s: %s" % (name, value))
+    if "content-length" not in headers and (length or request.method in ("POST", "PUT")):
+        lines.append("Content-Length: %d" % length)
+    head = to_utf8_if_unicode("\r\n".join(lines) + "\r\n\r\n")
+    return head, body
+
+
+class _HttpResponseProtocol(asyncio.Protocol):
+    """
+    Reads HTTP/1.1 responses from a single persistent connection.
+
+    Only one request may be outstanding on a connection at any time.
+    """
+    def __init__(self, loop):
+        self._loop = loop
+        self.transport = None
+        self.closed = False
+        self.requests_sent = 0
+        self._waiter = None
+        self._buffer = b""
+        self._body = None
+        self._writing_paused = False
+        self._reset()
+
+    def _reset(self):
+        self.response_started = False
+        self._head_request = False
+        self._status = None
+        self._headers = None
+        self._chunks = []
+        self._remaining = None
+        self._chunked = False
+        self._keep_alive = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.closed = True
+        self._body = None
+        waiter, self._waiter = self._waiter, None
+        if waiter is None or waiter.done():
+            return
+        if self._headers is not None and self._remaining is None \
+           and not self._chunked:
+            # Body delimited by connection close.
+            self._chunks.append(self._buffer)
+            self._buffer = b""
+            waiter.set_result((self._build_response(), False))
+        else:
+            waiter.set_exception(exc or InvalidHttpResponseError(
+                "Connection closed before a complete response was read."))
+
+    def send(self, head, body, head_request=False):
+        """
+        Writes a request onto the connection.
+
+        :returns:
+            Future that resolves to ``(response, keep_alive)``.
+        """
+        self._reset()
+        self._head_request = head_request
+        self._waiter = asyncio.Future(loop=self._loop)
+        self.requests_sent += 1
+        self.transport.write(head)
+        if hasattr(body, "read"):
+            self._body = body
+            self._write_body()
+        elif body:
+            self.transport.write(body)
+        return self._waiter
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        self._write_body()
+
+    def _write_body(self):
+        # Streams a file body one block at a time, following the
+        # transport's flow control so it is never buffered whole.
+        while self._body is not None and not self._writing_paused:
+            block = self._body.read(STREAM_BLOCK_SIZE)
+            if not block:
+                self._body = None
+                return
+            self.transport.write(block)
+
+    def close(self):
+        self.closed = True
+        if self.transport is not None:
+            self.transport.close()
+
+    def data_received(self, data):
+        self.response_started = True
+        self._buffer += data
+        if self._waiter is None:
+            # Unsolicited data; the connection cannot be reused.
+            self.close()
+            return
+        try:
+            self._process()
+        except Exception as e:
+            waiter, self._waiter = self._waiter, None
+            self.close()
+            if not waiter.done():
+                waiter.set_exception(e)
+
+    def _process(self):
+        if self._headers is None:
+            index = self._buffer.find(b"\r\n\r\n")
+            if index < 0:
+                return
+            head, self._buffer = self._buffer[:index], self._buffer[index+4:]
+            self._parse_head(head)
+        while self._waiter is not None:
+            if self._chunked:
+                if not self._read_chunk():
+                    return
+            elif self._remaining is not None:
+                if len(self._buffer) < self._remaining:
+                    return
+                self._chunks.append(self._buffer[:self._remaining])
+                self._buffer = self._buffer[self._remaining:]
+                self._finish()
+            else:
+                # Read until the server closes the connection.
+                return
+
+    def _parse_head(self, head):
+        lines = head.split(b"\r\n")
+        status_line = lines[0].split(None, 2)
+        if len(status_line) < 2 or not status_line[0].startswith(b"HTTP/"):
+            raise InvalidHttpResponseError("Malformed status line: `%r`" % (lines[0], ))
+        version = status_line[0]
+        code = int(status_line[1])
+        reason = status_line[2] if len(status_line) > 2 else b""
+        headers = Headers()
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            headers.add(name.strip(), value.strip())
+        connection = headers.get(b"connection", b"").lower()
+        if version == b"HTTP/1.0":
+            self._keep_alive = connection == b"keep-alive"
+        else:
+            self._keep_alive = connection != b"close"
+
+        self._status = (code, reason)
+        self._headers = headers
+        if self._head_request or code in (204, 304) or 100 <= code < 200:
+            self._remaining = 0
+        elif b"chunked" in headers.get(b"transfer-encoding", b"").lower():
+            self._chunked = True
+            self._remaining = None
+        elif b"content-length" in headers:
+            self._remaining = int(headers[b"content-length"])
+        else:
+            self._remaining = None
+            self._keep_alive = False
+
+    def _read_chunk(self):
+        if self._remaining is None:
+            index = self._buffer.find(b"\r\n")
+            if index < 0:
+                return False
+            size = int(self._buffer[:index].split(b";", 1)[0], 16)
+            self._buffer = self._buffer[index+2:]
+            if not size:
+                # Last chunk; skip any trailers.
+                self._remaining = -1
+            else:
+                self._remaining = size
+        if self._remaining < 0:
+            if self._buffer.startswith(b"\r\n"):
+                end = 2
+            else:
+                index = self._buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    return False
+                end = index + 4
+            self._buffer = self._buffer[end:]
+            self._finish()
+            return True
+        if len(self._buffer) < self._remaining + 2:
+            return False
+        self._chunks.append(self._buffer[:self._remaining])
+        self._buffer = self._buffer[self._remaining+2:]
+        self._remaining = None
+        return True
+
+    def _build_response(self):
+        code, reason = self._status
+        return ResponseProxy(code, reason, b"".join(self._chunks), self._headers)
+
+    def _finish(self):
+        waiter, self._waiter = self._waiter, None
+        response = self._build_response()
+        # A response that arrives before the whole body was sent leaves
+        # the connection unusable.
+        keep_alive = self._keep_alive and not self._buffer and self._body is None
+        self._body = None
+        if not waiter.done():
+            waiter.set_result((response, keep_alive))
+
+
+class AsyncTransport(object):
+    """
+    Abstract asynchronous transport.
+
+    Subclasses execute :class:`pyoauth.http.RequestProxy` objects and
+    resolve futures with :class:`pyoauth.http.ResponseProxy` objects.
+    Implement :meth:`fetch` to plug in another HTTP library.
+    """
+    def fetch(self, request):
+        """
+        Executes a request.
+
+        :param request:
+            An instance of :class:`pyoauth.http.RequestProxy`.
+        :returns:
+            An :class:`asyncio.Future` that resolves to an instance of
+            :class:`pyoauth.http.ResponseProxy`.
+        """
+        raise NotImplementedError("Override this method.")
+
+    def close(self):
+        """
+        Releases any resources held by the transport.
+        """
+        pass
+
+
+class StreamTransport(AsyncTransport):
+    """
+    HTTP/1.1 transport built on asyncio with per-host keep-alive
+    connection pooling.
+
+    :param loop:
+        The event loop to use. Defaults to the current event loop.
+    :param max_idle_per_host:
+        Maximum number of idle connections kept open per
+        ``(scheme, host, port)``. Default 4.
+    :param idle_timeout:
+        Seconds after which an idle connection is discarded instead of
+        being reused. Default 30.
+    :param ssl_context:
+        An optional :class:`ssl.SSLContext` used for ``https`` URLs.
+    :param timeout:
+        Seconds allowed for each fetch, from connecting until the whole
+        response is read. When they run out, the future fails with
+        :class:`asyncio.TimeoutError` and the connection is closed.
+        Default ``None`` (no timeout).
+    """
+    def __init__(self, loop=None, max_idle_per_host=4, idle_timeout=30,
+                 ssl_context=None, timeout=None):
+        self._loop = loop or asyncio.get_event_loop()
+        self._max_idle_per_host = max_idle_per_host
+        self._idle_timeout = idle_timeout
+        self._ssl_context = ssl_context
+        self._timeout = timeout
+        self._idle = {}
+        self._connections_opened = 0
+
+    @property
+    def connections_opened(self):
+        """
+        Number of TCP connections opened so far.
+        """
+        return self._connections_opened
+
+    def fetch(self, request, timeout=None):
+        """
+        Executes a request.
+
+        :param request:
+            An instance of :class:`pyoauth.http.RequestProxy`.
+        :param timeout:
+            Seconds allowed for this request. Defaults to the transport's
+            ``timeout``.
+        :returns:
+            An :class:`asyncio.Future` that resolves to an instance of
+            :class:`pyoauth.http.ResponseProxy`.
+        """
+        key, target = _split_url(request.url)
+        scheme, host, port = key
+        head, body = _serialize_request(request, host, port, scheme, target)
+        future = asyncio.Future(loop=self._loop)
+        if timeout is None:
+            timeout = self._timeout
+        if timeout is not None:
+            timer = self._loop.call_later(timeout, _time_out, future, timeout)
+            future.add_done_callback(lambda f: timer.cancel())
+        self._dispatch(future, key, head, body, request.method == "HEAD")
+        return future
+
+    def close(self):
+        for connections in self._idle.values():
+            for protocol, _ in connections:
+                protocol.close()
+        self._idle.clear()
+
+    def _acquire(self, key):
+        connections = self._idle.get(key)
+        deadline = time.time() - self._idle_timeout
+        while connections:
+            protocol, released_at = connections.pop()
+            if protocol.closed or released_at < deadline:
+                protocol.close()
+                continue
+            return protocol
+        return None
+
+    def _release(self, key, protocol):
+        connections = self._idle.setdefault(key, [])
+        if protocol.closed or len(connections) >= self._max_idle_per_host:
+            protocol.close()
+        else:
+            connections.append((protocol, time.time()))
+
+    def _dispatch(self, future, key, head, body, head_request):
+        protocol = self._acquire(key)
+        if protocol is not None:
+            self._send(future, key, protocol, head, body, head_request, True)
+            return
+
+        scheme, host, port = key
+        ssl = (self._ssl_context or True) if scheme == "https" else None
+        connecting = asyncio.ensure_future(
+            self._loop.create_connection(lambda: _HttpResponseProtocol(self._loop),
+                                         host, port, ssl=ssl),
+            loop=self._loop)
+
+        def connected(f):
+            if future.done():
+                # Timed out or cancelled while connecting.
+                if not f.cancelled() and f.exception() is None:
+                    f.result()[1].close()
+                return
+            if f.cancelled():
+                future.cancel()
+                return
+            if f.exception() is not None:
+                future.set_exception(f.exception())
+                return
+            self._connections_opened += 1
+            self._send(future, key, f.result()[1], head, body, head_request, False)
+        connecting.add_done_callback(connected)
+        future.add_done_callback(lambda f: connecting.cancel())
+
+    def _send(self, future, key, protocol, head, body, head_request, reused):
+        position = body.tell() if hasattr(body, "read") else None
+        sending = protocol.send(head, body, head_request)
+
+        def done(f):
+            if position is not None:
+                # Rewind so that a retry sends the whole body again.
+                body.seek(position)
+            if future.done():
+                protocol.close()
+                return
+            exception = f.exception()
+            if exception is not None:
+                protocol.close()
+                if reused and not protocol.response_started:
+                    # The server may have dropped an idle keep-alive
+                    # connection; retry once on a fresh connection.
+                    self._dispatch(future, key, head, body, head_request)
+                else:
+                    future.set_exception(exception)
+                return
+            response, keep_alive = f.result()
+            if keep_alive:
+                self._release(key, protocol)
+            else:
+                protocol.close()
+            future.set_result(response)
+        sending.add_done_callback(done)
+
+        def abandoned(f):
+            # Timed out or cancelled while waiting for the response; the
+            # connection is closed instead of being returned to the pool.
+            if not sending.done():
+                protocol.close()
+        future.add_done_callback(abandoned)
+
+
+def _time_out(future, timeout):
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError(
+            "Request timed out after %s seconds." % (timeout, )))
+
+
+# Keys decoded by this process, shared by all verifiers that run here.
+_worker_keys = {}
+_worker_key_blobs = {}
+_WORKER_KEY_CACHE_SIZE = 4096
+
+
+def _get_worker_key(key_blob, client_certificate):
+    """
+    Returns a public key object, decoding each key once per process.
+    """
+    if key_blob is not None:
+        blob = _worker_key_blobs.get(key_blob)
+        if blob is None:
+            from pyoauth.crypto.rsa import KeyBlob
+            blob = _worker_key_blobs[key_blob] = KeyBlob(key_blob)
+        return blob.get(client_certificate)
+    key = _worker_keys.get(client_certificate)
+    if key is None:
+        from pyoauth.crypto.rsa import create_public_key
+        if len(_worker_keys) >= _WORKER_KEY_CACHE_SIZE:
+            _worker_keys.clear()
+        key = _worker_keys[client_certificate] = create_public_key(client_certificate)
+    return key
+
+
+def _verify_rsa_sha1(key_blob, client_certificate, signature, base_string):
+    """
+    Runs in executor workers.
+    """
+    from pyoauth.crypto.hash import sha1_digest
+    from pyoauth.types.codec import base64_decode
+    key = _get_worker_key(key_blob, client_certificate)
+    if key is None:
+        return False
+    return key.pkcs1_v1_5_verify(sha1_digest(base_string),
+                                 base64_decode(signature))
+
+
+class AsyncSignatureVerifier(object):
+    """
+    Verifies RSA-SHA1 signatures in an executor so that the public-key
+    arithmetic and key decoding never block the event loop.
+
+    Every worker decodes a key once and keeps it for later calls. With
+    a process pool, pass ``key_blob`` to let workers share one
+    memory-mapped key file (see :func:`pyoauth.crypto.rsa.write_key_blob`)
+    and refer to keys by name instead of sending PEM text with every
+    call.
+
+    Usage::
+
+        verifier = AsyncSignatureVerifier(processes=4, key_blob="/var/lib/oauth/keys.blob")
+        valid = yield From(verifier.verify_rsa_sha1_signature(
+            oauth_params["oauth_consumer_key"], oauth_params["oauth_signature"],
+            method, url, oauth_params))
+
+    :param executor:
+        A :class:`concurrent.futures.Executor`. By default a
+        :class:`concurrent.futures.ProcessPoolExecutor` is created when
+        ``processes`` is given, and the loop's default thread pool is
+        used otherwise.
+    :param processes:
+        Number of worker processes for the executor created by default.
+    :param key_blob:
+        Optional path of a key blob. Keys are then looked up in it by the
+        name passed as ``client_certificate``.
+    :param loop:
+        The event loop. Defaults to the current event loop.
+    """
+    def __init__(self, executor=None, processes=None, key_blob=None, loop=None):
+        self._loop = loop or asyncio.get_event_loop()
+        self._owns_executor = executor is None and processes is not None
+        if self._owns_executor:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(processes)
+        self._executor = executor
+        self._key_blob = key_blob
+
+    def verify_rsa_sha1_signature(self, client_certificate, signature,
+                                  method, url, oauth_params=None):
+        """
+        Verifies a RSA-SHA1 OAuth signature.
+
+        Takes the arguments of
+        :func:`pyoauth.protocol.verify_rsa_sha1_signature`. The signature
+        base string is built on the calling thread; only the key lookup
+        and the verification run in the executor.
+
+        :param client_certificate:
+            PEM-encoded X.509 certificate or RSA public key, or the key's
+            name when the verifier has a key blob.
+        :returns:
+            An :class:`asyncio.Future` that resolves to ``True`` if the
+            signature is valid and ``False`` otherwise, including when
+            the key blob has no key of that name.
+        """
+        from pyoauth.protocol import generate_signature_base_string
+        base_string = generate_signature_base_string(method, url,
+                                                     oauth_params or {})
+        return self._loop.run_in_executor(self._executor, _verify_rsa_sha1,
+                                          self._key_blob, client_certificate,
+                                          signature, base_string)
+
+    def close(self):
+        """
+        Shuts down the executor if the verifier created it.
+        """
+        if self._owns_executor:
+            self._executor.shutdown()
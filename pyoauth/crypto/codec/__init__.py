@@ -11,12 +11,22 @@ Functions:
 ----------
 .. autofunction:: public_key_pem_decode
 .. autofunction:: private_key_pem_decode
+.. autofunction:: public_key_der_decode
+.. autofunction:: private_key_der_decode
+.. autofunction:: public_key_pem_encode
+.. autofunction:: private_key_pem_encode
 
 """
 
+from pyoauth.crypto.codec.der import decode_private_key_info, \
+    decode_rsa_private_key, decode_public_key_info, \
+    decode_certificate_public_key
 from pyoauth.crypto.codec.pem import \
     CERT_PEM_HEADER, PUBLIC_KEY_PEM_HEADER, \
-    PRIVATE_KEY_PEM_HEADER, RSA_PRIVATE_KEY_PEM_HEADER
+    PRIVATE_KEY_PEM_HEADER, RSA_PRIVATE_KEY_PEM_HEADER, \
+    pem_to_der_private_key, pem_to_der_rsa_private_key, \
+    pem_to_der_public_key, der_to_pem_certificate, der_to_pem_public_key, \
+    der_to_pem_private_key, der_to_pem_rsa_private_key
 from pyoauth.crypto.codec.pem.x509 import X509Certificate
 from pyoauth.crypto.codec.pem.rsa import RSAPrivateKey, RSAPublicKey
 
@@ -25,6 +35,10 @@ def public_key_pem_decode(pem_key):
     """
     Decodes a PEM-encoded public key/X.509 certificate string into internal representation.
 
+    Only the SubjectPublicKeyInfo is read, with the strict DER reader in
+    :mod:`pyoauth.crypto.codec.der`; input it rejects is decoded with
+    pyasn1 instead.
+
     :param pem_key:
         The PEM-encoded key. Must be one of:
         1. RSA public key.
@@ -32,11 +46,14 @@ def public_key_pem_decode(pem_key):
     :returns:
         A dictionary of key information.
     """
-    pem_key = pem_key.strip()
+    pem_key = _strip_pem_preamble(pem_key)
     if pem_key.startswith(CERT_PEM_HEADER):
         key = X509Certificate(pem_key).public_key
     elif pem_key.startswith(PUBLIC_KEY_PEM_HEADER):
-        key = RSAPublicKey(pem_key).public_key
+        try:
+            key = decode_public_key_info(pem_to_der_public_key(pem_key))
+        except ValueError:
+            key = RSAPublicKey(pem_key).public_key
     else:
         raise NotImplementedError("Only PEM-encoded X.509 certificates and public RSA keys can be read.")
     return key
@@ -46,14 +63,117 @@ def private_key_pem_decode(pem_key):
     """
     Decodes a PEM-encoded private key string into internal representation.
 
+    PKCS#1 and PKCS#8 keys are read with the strict DER reader in
+    :mod:`pyoauth.crypto.codec.der`; keys it rejects are decoded with
+    pyasn1 instead.
+
     :param pem_key:
         The PEM-encoded RSA private key.
     :returns:
         A dictionary of key information.
     """
-    pem_key = pem_key.strip()
-    if pem_key.startswith(PRIVATE_KEY_PEM_HEADER) or pem_key.startswith(RSA_PRIVATE_KEY_PEM_HEADER):
-        key = RSAPrivateKey(pem_key).private_key
+    pem_key = _strip_pem_preamble(pem_key)
+    if pem_key.startswith(RSA_PRIVATE_KEY_PEM_HEADER):
+        der_decode = decode_rsa_private_key
+        der = pem_to_der_rsa_private_key(pem_key)
+    elif pem_key.startswith(PRIVATE_KEY_PEM_HEADER):
+        der_decode = decode_private_key_info
+        der = pem_to_der_private_key(pem_key)
     else:
         raise NotImplementedError("Only PEM-encoded private RSA keys can be read.")
-    return key
+    try:
+        return der_decode(der)
+    except ValueError:
+        return RSAPrivateKey(pem_key).private_key
+
+
+def public_key_der_decode(der, label="PUBLIC KEY"):
+    """
+    Decodes a DER-encoded public key/X.509 certificate, as read from a PEM
+    block, into internal representation.
+
+    The strict DER reader in :mod:`pyoauth.crypto.codec.der` is used
+    directly; only input it rejects is re-encoded as PEM for pyasn1.
+
+    :param der:
+        The DER-encoded key or certificate bytes.
+    :param label:
+        The PEM label of the block. Must be one of:
+        1. ``"PUBLIC KEY"`` (default).
+        2. ``"CERTIFICATE"``.
+    :returns:
+        A dictionary of key information.
+    """
+    if label == "CERTIFICATE":
+        try:
+            return decode_certificate_public_key(der)
+        except ValueError:
+            return X509Certificate(der_to_pem_certificate(der)).public_key
+    elif label == "PUBLIC KEY":
+        try:
+            return decode_public_key_info(der)
+        except ValueError:
+            return RSAPublicKey(der_to_pem_public_key(der)).public_key
+    raise NotImplementedError("Only X.509 certificates and public RSA keys can be read.")
+
+
+def private_key_der_decode(der, label="PRIVATE KEY"):
+    """
+    Decodes a DER-encoded private key, as read from a PEM block, into
+    internal representation.
+
+    :param der:
+        The DER-encoded key bytes.
+    :param label:
+        The PEM label of the block: ``"PRIVATE KEY"`` (PKCS#8, default) or
+        ``"RSA PRIVATE KEY"`` (PKCS#1).
+    :returns:
+        A dictionary of key information.
+    """
+    if label == "RSA PRIVATE KEY":
+        der_decode, der_to_pem = decode_rsa_private_key, der_to_pem_rsa_private_key
+    elif label == "PRIVATE KEY":
+        der_decode, der_to_pem = decode_private_key_info, der_to_pem_private_key
+    else:
+        raise NotImplementedError("Only private RSA keys can be read.")
+    try:
+        return der_decode(der)
+    except ValueError:
+        return RSAPrivateKey(der_to_pem(der)).private_key
+
+
+def public_key_pem_encode(key_info):
+    """
+    Encodes RSA public key information into a PEM-encoded public key string.
+
+    :param key_info:
+        A dictionary of key information as returned by
+        :func:`public_key_pem_decode`.
+    :returns:
+        The PEM-encoded RSA public key.
+    """
+    return RSAPublicKey.encode_public_key_info(key_info)
+
+
+def private_key_pem_encode(key_info):
+    """
+    Encodes RSA private key information into a PEM-encoded private key string.
+
+    :param key_info:
+        A dictionary of key information as returned by
+        :func:`private_key_pem_decode`.
+    :returns:
+        The PEM-encoded (PKCS#8) RSA private key.
+    """
+    return RSAPrivateKey.encode_private_key_info(key_info)
+
+
+def _strip_pem_preamble(pem_key):
+    """
+    Drops text before the first PEM block, e.g. ``openssl x509 -text``
+    output.
+    """
+    start = pem_key.find("-----BEGIN ")
+    if start > 0:
+        pem_key = pem_key[start:]
+    return pem_key.strip()
@@ -19,12 +19,22 @@ ASN.1 Syntax::
      coefficient INTEGER -- (inverse of q) mod p }
 
    Version ::= INTEGER
+
+   RSAPublicKey ::= SEQUENCE {
+     modulus INTEGER, -- n
+     publicExponent INTEGER -- e }
+
+   PrivateKeyInfo ::= SEQUENCE {
+     version Version,
+     privateKeyAlgorithm AlgorithmIdentifier,
+     privateKey OCTET STRING }
 """
 
 # Read unencrypted PKCS#1/PKIX-compliant, PEM & DER encoded private keys.
 # Private keys can be generated with "openssl genrsa|gendsa" commands.
 
 from pyasn1.type import univ, namedtype, namedval, constraint
+from pyoauth.crypto.codec.asn1.x509 import AlgorithmIdentifier
 
 class DSAPrivateKey(univ.Sequence):
     """PKIX compliant DSA private key structure"""
@@ -65,3 +75,18 @@ class RSAPrivateKey(univ.Sequence):
         namedtype.NamedType('coefficient', univ.Integer()),
         namedtype.OptionalNamedType('otherPrimeInfos', OtherPrimeInfos())
         )
+
+class RSAPublicKey(univ.Sequence):
+    """PKCS#1 compliant RSA public key structure"""
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType('modulus', univ.Integer()),
+        namedtype.NamedType('publicExponent', univ.Integer())
+        )
+
+class PrivateKeyInfo(univ.Sequence):
+    """PKCS#8 compliant unencrypted private key structure"""
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType('version', univ.Integer(namedValues=namedval.NamedValues(('v1', 0)))),
+        namedtype.NamedType('privateKeyAlgorithm', AlgorithmIdentifier()),
+        namedtype.NamedType('privateKey', univ.OctetString())
+        )
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Released into public domain.
+
+"""
+:module: pyoauth.crypto.codec.der
+:synopsis: Minimal strict DER reader for RSA keys and certificates.
+
+Reads the handful of ASN.1 structures needed for RSA keys directly by
+tag and length, without pyasn1. Certificates are not decoded: the
+reader skips over the fields that precede the SubjectPublicKeyInfo and
+parses only the RSA modulus and exponent. Only definite, minimally-encoded
+lengths and positive, minimally-encoded integers are accepted; anything
+else raises :class:`ValueError`, and callers fall back to the pyasn1
+codecs in :mod:`pyoauth.crypto.codec.pem`.
+
+Functions:
+----------
+.. autofunction:: read_tlv
+.. autofunction:: read_integer
+.. autofunction:: decode_rsa_private_key
+.. autofunction:: decode_private_key_info
+.. autofunction:: decode_rsa_public_key
+.. autofunction:: decode_public_key_info
+.. autofunction:: decode_certificate_public_key
+"""
+
+from pyoauth.types import bytes_to_int
+
+try:
+    # Python 2: key components are longs, as with the pyasn1 decoders.
+    _integer = long
+except NameError:
+    # Python 3.
+    _integer = int
+
+TAG_INTEGER = 0x02
+TAG_BIT_STRING = 0x03
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OBJECT_IDENTIFIER = 0x06
+TAG_SEQUENCE = 0x30
+TAG_EXPLICIT_0 = 0xa0
+
+# 1.2.840.113549.1.1.1 (rsaEncryption), DER-encoded without tag and length.
+RSA_ENCRYPTION_OID = bytearray(b"\x2a\x86\x48\x86\xf7\x0d\x01\x01\x01")
+
+_RSA_PRIVATE_KEY_FIELDS = (
+    "version",
+    "modulus",
+    "publicExponent",
+    "privateExponent",
+    "prime1",
+    "prime2",
+    "exponent1",
+    "exponent2",
+    "coefficient",
+)
+
+
+def read_tlv(data, offset, end=None):
+    """
+    Reads the tag and length of a DER element.
+
+    :param data:
+        A :class:`bytearray` of DER.
+    :param offset:
+        Offset of the element's tag byte.
+    :param end:
+        Offset the element must not extend past. Defaults to the end of
+        ``data``.
+    :returns:
+        Tuple of the form ``(tag, content start, content end)``.
+    """
+    if end is None:
+        end = len(data)
+    if offset + 2 > end:
+        raise ValueError("DER element truncated at offset %d." % offset)
+    element = offset
+    tag = data[offset]
+    if tag & 0x1f == 0x1f:
+        raise ValueError("High-tag-number DER tags are not supported.")
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        num_octets = length & 0x7f
+        if not num_octets or num_octets > 4:
+            raise ValueError("Indefinite or oversized DER length at offset %d." % element)
+        if offset + num_octets > end or not data[offset]:
+            raise ValueError("Invalid DER length at offset %d." % element)
+        length = 0
+        for octet in data[offset:offset + num_octets]:
+            length = (length << 8) | octet
+        if length < 0x80:
+            raise ValueError("Non-minimal DER length at offset %d." % element)
+        offset += num_octets
+    if offset + length > end:
+        raise ValueError("DER element at offset %d overruns its container." % element)
+    return tag, offset, offset + length
+
+
+def _expect(data, offset, end, tag):
+    actual, start, stop = read_tlv(data, offset, end)
+    if actual != tag:
+        raise ValueError("Expected DER tag 0x%02x at offset %d: got 0x%02x." % (tag, offset, actual))
+    return start, stop
+
+
+def read_integer(data, offset, end=None):
+    """
+    Reads a non-negative DER INTEGER.
+
+    :param data:
+        A :class:`bytearray` of DER.
+    :param offset:
+        Offset of the INTEGER tag.
+    :param end:
+        Offset the element must not extend past.
+    :returns:
+        Tuple of the form ``(value, offset of the next element)``.
+    """
+    start, stop = _expect(data, offset, end, TAG_INTEGER)
+    if start == stop:
+        raise ValueError("Empty DER INTEGER at offset %d." % offset)
+    if data[start] & 0x80:
+        raise ValueError("Negative DER INTEGER at offset %d." % offset)
+    if stop - start > 1 and not data[start] and not data[start + 1] & 0x80:
+        raise ValueError("Non-minimal DER INTEGER at offset %d." % offset)
+    return _integer(bytes_to_int(data[start:stop])), stop
+
+
+def decode_rsa_private_key(der):
+    """
+    Decodes a PKCS#1 ``RSAPrivateKey``.
+
+    :param der:
+        DER-encoded key bytes.
+    :returns:
+        A dictionary of key information in the form returned by
+        :attr:`pyoauth.crypto.codec.pem.rsa.RSAPrivateKey.private_key`.
+    """
+    data = _as_bytearray(der)
+    start, stop = _expect(data, 0, None, TAG_SEQUENCE)
+    if stop != len(data):
+        raise ValueError("Trailing data after DER RSAPrivateKey.")
+    return _read_rsa_private_key(data, start, stop)
+
+
+def decode_private_key_info(der):
+    """
+    Decodes a PKCS#8 ``PrivateKeyInfo`` wrapping an RSA private key.
+
+    :param der:
+        DER-encoded key bytes.
+    :returns:
+        A dictionary of key information in the form returned by
+        :attr:`pyoauth.crypto.codec.pem.rsa.RSAPrivateKey.private_key`.
+    """
+    data = _as_bytearray(der)
+    offset, stop = _expect(data, 0, None, TAG_SEQUENCE)
+    if stop != len(data):
+        raise ValueError("Trailing data after DER PrivateKeyInfo.")
+    version, offset = read_integer(data, offset, stop)
+    if version != 0:
+        raise ValueError("Unsupported PrivateKeyInfo version %d." % version)
+
+    algorithm_stop = _read_rsa_algorithm(data, offset, stop)
+    key_start, key_stop = _expect(data, algorithm_stop, stop, TAG_OCTET_STRING)
+    # Optional context-specific attributes may follow; they are ignored.
+    offset = key_stop
+    while offset < stop:
+        tag, _, offset = read_tlv(data, offset, stop)
+        if not tag & 0x80:
+            raise ValueError("Unexpected DER tag 0x%02x in PrivateKeyInfo." % tag)
+
+    sequence_start, sequence_stop = _expect(data, key_start, key_stop, TAG_SEQUENCE)
+    if sequence_stop != key_stop:
+        raise ValueError("Trailing data after DER RSAPrivateKey.")
+    return _read_rsa_private_key(data, sequence_start, sequence_stop)
+
+
+def decode_rsa_public_key(der):
+    """
+    Decodes a PKCS#1 ``RSAPublicKey``.
+
+    :param der:
+        DER-encoded key bytes.
+    :returns:
+        A dictionary of the form ``dict(modulus=n, exponent=e)``.
+    """
+    data = _as_bytearray(der)
+    return _read_rsa_public_key(data, 0, len(data))
+
+
+def decode_public_key_info(der):
+    """
+    Decodes an X.509 ``SubjectPublicKeyInfo`` holding an RSA public key,
+    as found in ``-----BEGIN PUBLIC KEY-----`` PEM blocks.
+
+    :param der:
+        DER-encoded key bytes.
+    :returns:
+        A dictionary of the form ``dict(modulus=n, exponent=e)``.
+    """
+    data = _as_bytearray(der)
+    start, stop = _expect(data, 0, None, TAG_SEQUENCE)
+    if stop != len(data):
+        raise ValueError("Trailing data after DER SubjectPublicKeyInfo.")
+    return _read_public_key_info(data, start, stop)
+
+
+def decode_certificate_public_key(der):
+    """
+    Extracts the RSA public key from an X.509 certificate.
+
+    Walks ``Certificate`` and ``TBSCertificate`` by tag and length up
+    to ``subjectPublicKeyInfo``; names, validity and extensions are
+    skipped without being decoded.
+
+    :param der:
+        DER-encoded certificate bytes. A :class:`bytearray` is read in
+        place.
+    :returns:
+        A dictionary of the form ``dict(modulus=n, exponent=e)``.
+    """
+    data = _as_bytearray(der)
+    offset, stop = _expect(data, 0, None, TAG_SEQUENCE)
+    if stop != len(data):
+        raise ValueError("Trailing data after DER Certificate.")
+    offset, stop = _expect(data, offset, stop, TAG_SEQUENCE)
+    tag, _, version_stop = read_tlv(data, offset, stop)
+    if tag == TAG_EXPLICIT_0:
+        offset = version_stop
+    # serialNumber, signature, issuer, validity, subject.
+    for tag in (TAG_INTEGER, TAG_SEQUENCE, TAG_SEQUENCE, TAG_SEQUENCE, TAG_SEQUENCE):
+        offset = _expect(data, offset, stop, tag)[1]
+    start, stop = _expect(data, offset, stop, TAG_SEQUENCE)
+    return _read_public_key_info(data, start, stop)
+
+
+def _as_bytearray(der):
+    if isinstance(der, bytearray):
+        return der
+    return bytearray(der)
+
+
+def _read_rsa_algorithm(data, offset, stop):
+    """
+    Checks an ``AlgorithmIdentifier`` for rsaEncryption and returns the
+    offset that follows it.
+    """
+    algorithm_start, algorithm_stop = _expect(data, offset, stop, TAG_SEQUENCE)
+    oid_start, oid_stop = _expect(data, algorithm_start, algorithm_stop,
+                                  TAG_OBJECT_IDENTIFIER)
+    if data[oid_start:oid_stop] != RSA_ENCRYPTION_OID:
+        raise ValueError("Only RSA encryption is currently supported.")
+    if oid_stop != algorithm_stop:
+        null_start, null_stop = _expect(data, oid_stop, algorithm_stop, TAG_NULL)
+        if null_start != null_stop or null_stop != algorithm_stop:
+            raise ValueError("Invalid RSA algorithm parameters.")
+    return algorithm_stop
+
+
+def _read_public_key_info(data, offset, stop):
+    offset = _read_rsa_algorithm(data, offset, stop)
+    bits_start, bits_stop = _expect(data, offset, stop, TAG_BIT_STRING)
+    if bits_stop != stop:
+        raise ValueError("Unexpected data after subjectPublicKey.")
+    if bits_start == bits_stop or data[bits_start]:
+        raise ValueError("subjectPublicKey is not a whole number of octets.")
+    return _read_rsa_public_key(data, bits_start + 1, bits_stop)
+
+
+def _read_rsa_public_key(data, offset, stop):
+    start, end = _expect(data, offset, stop, TAG_SEQUENCE)
+    if end != stop:
+        raise ValueError("Trailing data after DER RSAPublicKey.")
+    modulus, start = read_integer(data, start, end)
+    exponent, start = read_integer(data, start, end)
+    if start != end:
+        raise ValueError("Unexpected data after RSAPublicKey exponent.")
+    return dict(modulus=modulus, exponent=exponent)
+
+
+def _read_rsa_private_key(data, offset, stop):
+    key_info = {}
+    for name in _RSA_PRIVATE_KEY_FIELDS:
+        key_info[name], offset = read_integer(data, offset, stop)
+    if offset != stop:
+        raise ValueError("Unexpected data after RSAPrivateKey coefficient.")
+    if key_info["version"] != 0:
+        raise ValueError("Multi-prime RSA private keys are not supported.")
+    return key_info
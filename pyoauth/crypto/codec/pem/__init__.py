@@ -10,11 +10,14 @@ Functions:
 ----------
 .. autofunction:: pem_to_der
 .. autofunction:: der_to_pem
+.. autofunction:: iter_pem_blocks
+.. autofunction:: iter_pem_file_blocks
 .. autofunction:: cert_time_to_seconds
 """
 
+import mmap
+import re
 import time
-import textwrap
 from functools import partial
 from pyoauth.types.codec import base64_decode, base64_encode
 
@@ -51,7 +54,9 @@ def pem_to_der(pem_cert_string, pem_header, pem_footer):
     Extracts the DER as a byte sequence out of an ASCII PEM formatted
     certificate or key.
 
-    Taken from the Python SSL module.
+    Text before the header and after the footer, such as other PEM
+    blocks or ``openssl x509 -text`` output, is ignored, as are RFC 1421
+    style ``Name: value`` headers inside the block.
 
     :param pem_cert_string:
         The PEM certificate or key string.
@@ -60,16 +65,16 @@ def pem_to_der(pem_cert_string, pem_header, pem_footer):
     :param pem_footer:
         The PEM footer to find.
     """
-    # Be a little lenient.
-    pem_cert_string = pem_cert_string.strip()
-    if not pem_cert_string.startswith(pem_header):
+    start = pem_cert_string.find(pem_header)
+    if start < 0:
         raise ValueError("Invalid PEM encoding; must start with %s"
                          % pem_header)
-    if not pem_cert_string.endswith(pem_footer):
+    start += len(pem_header)
+    end = pem_cert_string.find(pem_footer, start)
+    if end < 0:
         raise ValueError("Invalid PEM encoding; must end with %s"
                          % pem_footer)
-    d = pem_cert_string[len(pem_header):-len(pem_footer)]
-    return base64_decode(d)
+    return _decode_pem_body(pem_cert_string[start:end])[1]
 
 
 def der_to_pem(der_cert_bytes, pem_header, pem_footer):
@@ -77,8 +82,6 @@ def der_to_pem(der_cert_bytes, pem_header, pem_footer):
     Takes a certificate in binary DER format and returns the
     PEM version of it as a string.
 
-    Taken from the Python SSL module.
-
     :param der_cert_bytes:
         A byte string of the DER.
     :param pem_header:
@@ -88,9 +91,148 @@ def der_to_pem(der_cert_bytes, pem_header, pem_footer):
     """
     # Does what base64.b64encode without the `altchars` argument does.
     f = base64_encode(der_cert_bytes)
-    return (pem_header + '\n' +
-            textwrap.fill(f, 64) + '\n' +
-            pem_footer + '\n')
+    lines = [f[i:i + 64] for i in range(0, len(f), 64)]
+    lines.insert(0, pem_header)
+    lines.append(pem_footer)
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def _decode_pem_body(body):
+    """
+    Decodes the text between a PEM header and footer.
+
+    :returns:
+        Tuple of the form ``(headers, der)``.
+    """
+    headers = {}
+    # Base64 text never contains a colon.
+    if ":" in body:
+        lines = body.splitlines()
+        header_name = None
+        for i, line in enumerate(lines):
+            if header_name and line[:1] in (" ", "\t") and line.strip():
+                # Folded header value.
+                headers[header_name] += " " + line.strip()
+            elif ":" in line:
+                header_name, _, value = line.partition(":")
+                header_name = header_name.strip()
+                headers[header_name] = value.strip()
+            elif line.strip() or header_name:
+                break
+        else:
+            i = len(lines)
+        body = "".join(lines[i:])
+    # a2b_base64 skips the line breaks.
+    return headers, base64_decode(body)
+
+
+_PEM_BEGIN_PATTERN = re.compile(r"^-----BEGIN ([^-]+)-----$")
+_PEM_END_PATTERN = re.compile(r"^-----END ([^-]+)-----$")
+
+
+_PEM_BEGIN = "-----BEGIN "
+_PEM_DASHES = "-----"
+
+
+def iter_pem_blocks(data):
+    """
+    Reads every PEM block from a bundle.
+
+    Text outside the blocks (comments, ``openssl x509 -text`` dumps) is
+    ignored. RFC 1421 style headers (``Name: value`` lines between the
+    ``BEGIN`` line and the base64 text) are returned with each block.
+
+    Strings and memory maps are scanned with ``find``; only the text of
+    one block at a time is copied out of them.
+
+    :param data:
+        A PEM string, an :class:`mmap.mmap`, or an iterable of lines such
+        as an open file. Files are read one line at a time.
+    :returns:
+        An iterator of ``(label, headers, der)`` tuples, where ``label``
+        is the text between ``BEGIN`` and the dashes, e.g.
+        ``"CERTIFICATE"``, and ``headers`` is a dictionary.
+    """
+    if hasattr(data, "find"):
+        return _scan_pem_blocks(data)
+    return _iter_pem_lines(data)
+
+
+def iter_pem_file_blocks(path):
+    """
+    Reads every PEM block from a file through a read-only memory map.
+
+    :param path:
+        Path of the PEM file.
+    :returns:
+        An iterator of ``(label, headers, der)`` tuples as returned by
+        :func:`iter_pem_blocks`.
+    """
+    with open(path, "rb") as pem_file:
+        if not pem_file.read(1):
+            # Empty files cannot be mapped.
+            return
+        region = mmap.mmap(pem_file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for block in _scan_pem_blocks(region):
+            yield block
+    finally:
+        region.close()
+
+
+def _scan_pem_blocks(data):
+    position = 0
+    while True:
+        begin = data.find(_PEM_BEGIN, position)
+        if begin < 0:
+            return
+        label_start = begin + len(_PEM_BEGIN)
+        label_end = data.find(_PEM_DASHES, label_start, label_start + 80)
+        if label_end < 0:
+            raise ValueError("Invalid PEM encoding; malformed BEGIN line at offset %d" % begin)
+        label = data[label_start:label_end]
+        start = label_end + len(_PEM_DASHES)
+        footer = "-----END %s-----" % label
+        end = data.find(footer, start)
+        if end < 0 or data.find(_PEM_BEGIN, start, end) >= 0:
+            raise ValueError("Invalid PEM encoding; %r block has no END line" % label)
+        headers, der = _decode_pem_body(data[start:end])
+        yield label, headers, der
+        position = end + len(footer)
+
+
+def _iter_pem_lines(lines):
+    if isinstance(lines, basestring):
+        lines = lines.splitlines()
+    label = None
+    for raw_line in lines:
+        line = raw_line.strip()
+        if label is None:
+            match = _PEM_BEGIN_PATTERN.match(line)
+            if match:
+                label = match.group(1)
+                headers = {}
+                header_name = None
+                chunks = []
+            continue
+        if line.startswith("-----END "):
+            match = _PEM_END_PATTERN.match(line)
+            if not match or match.group(1) != label:
+                raise ValueError("Invalid PEM encoding; %r block ends with %r" % (label, line))
+            yield label, headers, base64_decode("".join(chunks))
+            label = None
+        elif header_name and not chunks and line and raw_line[:1] in " \t":
+            # Folded header value.
+            headers[header_name] += " " + line
+        elif ":" in line and not chunks:
+            header_name, _, value = line.partition(":")
+            header_name = header_name.strip()
+            headers[header_name] = value.strip()
+        elif line:
+            chunks.append(line)
+    if label is not None:
+        raise ValueError("Invalid PEM encoding; %r block has no END line" % label)
 
 
 # Helper functions. Use these instead of using der_to_per and per_to_der.
@@ -31,24 +31,46 @@ Classes:
 
 from pyasn1.type import univ
 from pyasn1.codec.der import encoder, decoder
+from pyoauth.types import int_to_bytes
 from pyoauth.types.bitstring import bits_to_long
+from pyoauth.crypto.codec.der import decode_certificate_public_key, \
+    decode_rsa_public_key
 from pyoauth.crypto.codec.pem import der_to_pem_certificate, pem_to_der_certificate
 from pyoauth.crypto.codec.asn1.x509 import Certificate
 
 
 class X509Certificate(object):
+    """
+    X.509 certificate.
+
+    The certificate is decoded with pyasn1 only when one of its ASN.1
+    components is accessed. :attr:`public_key` walks the DER directly to
+    the SubjectPublicKeyInfo and uses pyasn1 only for certificates the
+    strict DER reader rejects.
+    """
     # http://tools.ietf.org/html/rfc3279 - Section 2.3.1
     _RSA_OID = univ.ObjectIdentifier('1.2.840.113549.1.1.1')
 
     def __init__(self, certificate):
         self._certificate = certificate
-        self._certificate_asn1 = self.decode_from_pem_certificate(certificate)
+        self._certificate_der = pem_to_der_certificate(certificate)
+        self._asn1 = None
 
     def encode(self):
         return self.encode_to_pem_certificate(self._certificate_asn1)
 
+    @property
+    def _certificate_asn1(self):
+        if self._asn1 is None:
+            self._asn1 = self.decode_from_der_certificate(self._certificate_der)
+        return self._asn1
+
     @property
     def public_key(self):
+        try:
+            return decode_certificate_public_key(self._certificate_der)
+        except ValueError:
+            pass
         algorithm = self.subject_public_key_info.getComponentByName('algorithm')[0]
         if algorithm != self._RSA_OID:
             raise NotImplementedError("Only RSA encryption is currently supported: got algorithm `%r`" % algorithm)
@@ -76,9 +98,19 @@ class X509Certificate(object):
         :returns:
             Tuple of (modulus, exponent)
         """
-        public_key_long = bits_to_long(public_key_bitstring)
-        public_key_hex = hex(public_key_long)[2:-1]
-        public_key_asn1 = decoder.decode(public_key_hex.decode('hex'))
+        try:
+            public_key_der = public_key_bitstring.asOctets()
+        except AttributeError:
+            # pyasn1 < 0.1.4.
+            public_key_der = int_to_bytes(bits_to_long(public_key_bitstring),
+                                          len(public_key_bitstring) >> 3)
+        try:
+            key = decode_rsa_public_key(public_key_der)
+            return key["modulus"], key["exponent"]
+        except ValueError:
+            pass
+
+        public_key_asn1 = decoder.decode(public_key_der)
 
         if len(public_key_asn1) < 1:
             raise ValueError("Problem ASN.1 decoding public key bytes")
@@ -90,8 +122,11 @@ class X509Certificate(object):
 
     @classmethod
     def decode_from_pem_certificate(cls, certificate):
+        return cls.decode_from_der_certificate(pem_to_der_certificate(certificate))
+
+    @classmethod
+    def decode_from_der_certificate(cls, der):
         certType = Certificate()
-        der = pem_to_der_certificate(certificate)
         cert_asn1 = decoder.decode(der, asn1Spec=certType)[0]
         if len(cert_asn1) < 1:
             raise ValueError("No X.509 certificate found after ASN.1 decoding.")
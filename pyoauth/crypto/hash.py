@@ -18,12 +18,45 @@ Functions:
 .. autofunction:: hmac_sha1_digest
 .. autofunction:: hmac_sha1_base64_digest
 
+Streaming
+---------
+Each ``source`` below may be:
+
+1. A file object opened in binary mode. It is read from its current
+   position to the end in blocks of ``block_size`` bytes into one reused
+   buffer when it supports ``readinto``.
+2. A byte string, ``bytearray``, ``memoryview`` or :class:`mmap.mmap`.
+   These are hashed in place without copying.
+3. Any other iterable of byte strings (chunks), such as a generator or a
+   WSGI ``wsgi.input`` wrapper.
+
+.. autofunction:: hash_update_from_stream
+.. autofunction:: sha1_stream_digest
+.. autofunction:: sha1_stream_hex_digest
+.. autofunction:: sha1_stream_base64_digest
+.. autofunction:: md5_stream_digest
+.. autofunction:: md5_stream_hex_digest
+.. autofunction:: hmac_sha1_stream_digest
+.. autofunction:: hmac_sha1_stream_base64_digest
+
 """
 
 import hmac
+import mmap
 from hashlib import sha1, md5
+from pyoauth.types import bytes, buffer_types
 from pyoauth.types.codec import bytes_to_base64, bytes_to_hex
 
+#: Default number of bytes read from a file object at a time.
+STREAM_BLOCK_SIZE = 1 << 20
+
+try:
+    # Python 2.
+    _REGION_TYPES = (bytes, buffer, mmap.mmap) + buffer_types
+except NameError:
+    # Python 3.
+    _REGION_TYPES = (bytes, mmap.mmap) + buffer_types
+
 
 def sha1_digest(*inputs):
     """
@@ -53,7 +86,7 @@ def sha1_hex_digest(*inputs):
     return bytes_to_hex(sha1_digest(*inputs))
 
 
-def sha1_base64_digest(value):
+def sha1_base64_digest(*inputs):
     """
     Calculates Base-64-encoded SHA-1 digest of a variable
     number of inputs.
@@ -63,7 +96,7 @@ def sha1_base64_digest(value):
     :returns:
         Base-64-encoded SHA-1 digest.
     """
-    return bytes_to_base64(sha1_digest(value))
+    return bytes_to_base64(sha1_digest(*inputs))
 
 
 def md5_digest(*inputs):
@@ -121,3 +154,142 @@ def hmac_sha1_base64_digest(key, data):
     """
     return bytes_to_base64(hmac_sha1_digest(key, data))
 
+
+def hash_update_from_stream(md, source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Feeds a stream into a hash or HMAC object without loading it into
+    memory at once.
+
+    :param md:
+        An object with an ``update`` method, such as a :mod:`hashlib`
+        hash or an :mod:`hmac` object.
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        ``md``
+    """
+    if isinstance(source, _REGION_TYPES):
+        md.update(source)
+    elif hasattr(source, "readinto"):
+        buf = bytearray(block_size)
+        view = memoryview(buf)
+        while True:
+            count = source.readinto(buf)
+            if not count:
+                break
+            md.update(view[:count])
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(block_size)
+            if not chunk:
+                break
+            md.update(chunk)
+    else:
+        for chunk in source:
+            md.update(chunk)
+    return md
+
+
+def sha1_stream_digest(source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates the SHA-1 digest of a stream.
+
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        A byte string containing the SHA-1 message digest.
+    """
+    return hash_update_from_stream(sha1(), source, block_size).digest()
+
+
+def sha1_stream_hex_digest(source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates hexadecimal representation of the SHA-1 digest of a stream.
+
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        Hexadecimal representation of the SHA-1 digest.
+    """
+    return bytes_to_hex(sha1_stream_digest(source, block_size))
+
+
+def sha1_stream_base64_digest(source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates Base-64-encoded SHA-1 digest of a stream.
+
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        Base-64-encoded SHA-1 digest.
+    """
+    return bytes_to_base64(sha1_stream_digest(source, block_size))
+
+
+def md5_stream_digest(source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates the MD5 digest of a stream.
+
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        A byte string containing the MD5 message digest.
+    """
+    return hash_update_from_stream(md5(), source, block_size).digest()
+
+
+def md5_stream_hex_digest(source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates hexadecimal representation of the MD5 digest of a stream.
+
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        Hexadecimal representation of the MD5 digest.
+    """
+    return bytes_to_hex(md5_stream_digest(source, block_size))
+
+
+def hmac_sha1_stream_digest(key, source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates a HMAC SHA-1 digest of a stream.
+
+    :param key:
+        The key for the digest.
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        HMAC SHA-1 Digest.
+    """
+    md = hmac.new(key, None, sha1)
+    return hash_update_from_stream(md, source, block_size).digest()
+
+
+def hmac_sha1_stream_base64_digest(key, source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Calculates a base64-encoded HMAC SHA-1 signature of a stream.
+
+    :param key:
+        The key for the signature.
+    :param source:
+        A file object, a buffer or an iterable of chunks.
+    :param block_size:
+        Number of bytes read from a file object at a time. Default 1 MB.
+    :returns:
+        Base64-encoded HMAC SHA-1 signature.
+    """
+    return bytes_to_base64(hmac_sha1_stream_digest(key, source, block_size))
@@ -10,14 +10,16 @@
 Functions:
 ----------
 .. autofunction:: make_prime_sieve
+.. autofunction:: get_sieve
 .. autofunction:: is_prime
 .. autofunction:: generate_random_prime
 .. autofunction:: generate_random_safe_prime
 """
 
 import math
-from pyoauth.crypto.random import generate_random_long
-from pyoauth.types.number import pow_mod
+from pyoauth.crypto.random import generate_random_longs
+from pyoauth.types.module import lazy_module_attributes
+from pyoauth.types.number import BACKEND, get_backend, gcd, inverse_mod, pow_mod
 
 
 def make_prime_sieve(n):
@@ -29,8 +31,8 @@ def make_prime_sieve(n):
     :returns:
         Prime sieve.
     """
-    sieve = range(n)
-    for count in range(2, int(math.sqrt(n))):
+    sieve = list(range(n))
+    for count in range(2, int(math.sqrt(n)) + 1):
         #if sieve[count] == 0:
         if not sieve[count]:
             continue
@@ -41,50 +43,348 @@ def make_prime_sieve(n):
     sieve = [x for x in sieve[2:] if x]
     return sieve
 
-sieve = make_prime_sieve(1000)
+# The sieve and the tables derived from it are built on first use, so
+# importing this module costs nothing until a prime is needed. The
+# ``sieve`` module attribute reads get_sieve().
+_sieve = None
+_SMALL_PRIMES = None
+_SMALL_PRIMES_LIMIT = None
+_PRIME_GROUPS = None
+_PRIMORIAL = None
+
+
+def get_sieve():
+    """
+    Returns the primes < 1000, computing them on first use.
+
+    :returns:
+        A list of the 168 primes below 1000.
+    """
+    if _sieve is None:
+        _init_tables()
+    return _sieve
+
+
+def _init_tables():
+    global _sieve, _SMALL_PRIMES, _SMALL_PRIMES_LIMIT, _PRIME_GROUPS, _PRIMORIAL
+    sieve = make_prime_sieve(1000)
+    _SMALL_PRIMES = frozenset(sieve)
+    _SMALL_PRIMES_LIMIT = sieve[-1]
+    _PRIME_GROUPS = _make_prime_groups(sieve)
+    # Most candidates have a factor among the first few primes, which is
+    # checked on a single-word residue. The rest of the sieve primes are
+    # checked with one gcd against their product when the arithmetic
+    # backend computes gcd in C.
+    _PRIMORIAL = _make_primorial(_PRIME_GROUPS[1:])
+    # Published last; get_sieve and is_prime test it.
+    _sieve = sieve
+
+
+def _make_prime_groups(sieve):
+    # Products of consecutive sieve primes that fit in a machine word, so
+    # that trial division works on small residues.
+    groups = []
+    product, primes = 1, []
+    for prime in sieve:
+        if product * prime >= 2 ** 62:
+            groups.append((product, tuple(primes)))
+            product, primes = 1, []
+        product *= prime
+        primes.append(prime)
+    groups.append((product, tuple(primes)))
+    return tuple(groups)
+
+
+def _make_primorial(groups):
+    product = 1
+    for group_product, _ in groups:
+        product *= group_product
+    return get_backend().mpz(product)
+
+_FAST_GCD = BACKEND in ("gmpy2", "gmpy") or \
+            getattr(gcd, "__module__", None) == "math"
+
+# Deterministic Miller-Rabin base sets: every composite below the bound
+# fails for at least one base (Jaeschke 1993; Sorenson and Webster 2015).
+_DETERMINISTIC_BASES = (
+    (2047, (2, )),
+    (1373653, (2, 3)),
+    (25326001, (2, 3, 5)),
+    (3215031751, (2, 3, 5, 7)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
+
+
+def _has_small_factor(n):
+    """
+    Determines whether n > 1000 is divisible by any of the sieve primes.
+    """
+    product, primes = _PRIME_GROUPS[0]
+    residue = n % product
+    for prime in primes:
+        if not residue % prime:
+            return True
+    if _FAST_GCD:
+        return gcd(n, _PRIMORIAL) != 1
+    for product, primes in _PRIME_GROUPS[1:]:
+        residue = n % product
+        for prime in primes:
+            if not residue % prime:
+                return True
+    return False
+
+
+def _python_is_strong_probable_prime(n, base, d, s):
+    """
+    Miller-Rabin round: n - 1 == d * 2**s with d odd.
+    """
+    x = pow_mod(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for r in range(1, s):
+        x = x * x % n
+        if x == n - 1:
+            return True
+        if x == 1:
+            return False
+    return False
+
+
+def _jacobi(a, n):
+    """
+    Jacobi symbol (a/n) for odd positive n.
+    """
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _is_square(n):
+    x = 1 << ((n.bit_length() + 1) >> 1)
+    while True:
+        y = (x + n // x) >> 1
+        if y >= x:
+            return x * x == n
+        x = y
+
+
+def _python_is_strong_lucas_probable_prime(n):
+    """
+    Strong Lucas probable-prime test with Selfridge's parameters.
+    """
+    # Find the first D in 5, -7, 9, -11, ... with Jacobi symbol (D/n) = -1.
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        if D == 13 and _is_square(n):
+            # No such D exists for perfect squares.
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+
+    # n + 1 == d * 2**s with d odd.
+    d, s = n + 1, 0
+    while not d & 1:
+        d, s = d >> 1, s + 1
+
+    # Binary Lucas chain for U_d, V_d with P = 1.
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == "1":
+            U, V = U + V, D * U + V
+            if U & 1:
+                U += n
+            if V & 1:
+                V += n
+            U, V = (U >> 1) % n, (V >> 1) % n
+            Qk = Qk * Q % n
+    if not U or not V:
+        return True
+    for r in range(1, s):
+        V = (V * V - 2 * Qk) % n
+        if not V:
+            return True
+        Qk = Qk * Qk % n
+    return False
+
+
+if BACKEND == "gmpy2":
+    import gmpy2
+
+    def _is_strong_probable_prime(n, base, d, s):
+        return gmpy2.is_strong_prp(n, base)
+
+    _is_strong_lucas_probable_prime = gmpy2.is_strong_selfridge_prp
+else:
+    _is_strong_probable_prime = _python_is_strong_probable_prime
+    _is_strong_lucas_probable_prime = _python_is_strong_lucas_probable_prime
 
 
 def is_prime(n, iterations=5):
     """
     Determines whether a number is prime.
 
+    Numbers are first checked against the sieve primes with a single gcd
+    (or grouped trial division without a C gcd). Numbers below
+    3317044064679887385961981 then get a deterministic set of Miller-Rabin
+    bases, and larger numbers get the Baillie-PSW test (a base-2 strong
+    probable-prime test plus a strong Lucas test). gmpy2's implementations
+    of both tests are used when gmpy2 is the arithmetic backend.
+
     :param n:
         Number
     :param iterations:
-        Number of iterations.
+        ``0`` performs only the small-prime check. Values above the
+        default 5 add that many extra Miller-Rabin rounds with random
+        bases to the Baillie-PSW test.
     :returns:
         ``True`` if prime; ``False`` otherwise.
     """
-    #Trial division with sieve
-    for x in sieve:
-        if x >= n: return True
-        if not n % x: return False
-    #Passed trial division, proceed to Rabin-Miller
-    #Rabin-Miller implemented per Ferguson & Schneier
-    #Compute s, t for Rabin-Miller
-    s, t = n-1, 0
-    while not s % 2:
-        s, t = s/2, t+1
-    #Repeat Rabin-Miller x times
-    a = 2 #Use 2 as a base for first iteration speedup, per HAC
-    for count in range(iterations):
-        v = pow_mod(a, s, n)
-        if v==1:
-            continue
-        i = 0
-        while v != n-1:
-            if i == t-1:
+    if _sieve is None:
+        _init_tables()
+    if n <= _SMALL_PRIMES_LIMIT:
+        return n in _SMALL_PRIMES
+    if not n & 1 or _has_small_factor(n):
+        return False
+    if not iterations:
+        return True
+    return _is_probable_prime(n, iterations)
+
+
+def _is_probable_prime(n, iterations=5):
+    """
+    The probable-prime stage of :func:`is_prime` for odd n without small
+    prime factors.
+    """
+    d, s = n - 1, 0
+    while not d & 1:
+        d, s = d >> 1, s + 1
+
+    for bound, bases in _DETERMINISTIC_BASES:
+        if n < bound:
+            for base in bases:
+                if not _is_strong_probable_prime(n, base, d, s):
+                    return False
+            return True
+
+    if not _is_strong_probable_prime(n, 2, d, s):
+        return False
+    if not _is_strong_lucas_probable_prime(n):
+        return False
+    if iterations > 5:
+        for base in generate_random_longs(2, n - 1, iterations - 5):
+            if not _is_strong_probable_prime(n, base, d, s):
                 return False
-            else:
-                v, i = pow_mod(v, 2, n), i+1
-        a = generate_random_long(2, n)
     return True
 
 
+# Odd primes used to sieve candidate windows. Sieving is cheap compared to
+# a probable-prime test, so this goes well beyond the trial-division table.
+_WINDOW_SIEVE_LIMIT = 1 << 14
+_window_sieves = {}
+
+
+def _get_window_sieve(step):
+    """
+    Returns ``(prime, inverse of step mod prime)`` pairs for the window
+    sieve, computed once per step.
+    """
+    try:
+        return _window_sieves[step]
+    except KeyError:
+        pairs = [(prime, int(inverse_mod(step, prime)))
+                 for prime in make_prime_sieve(_WINDOW_SIEVE_LIMIT)[1:]]
+        _window_sieves[step] = pairs
+        return pairs
+
+
+def _sieve_window(start, size, step=2, limit=_WINDOW_SIEVE_LIMIT):
+    """
+    Marks the numbers ``start + step * i`` for ``0 <= i < size`` that have
+    no odd prime factor below ``limit``.
+
+    Multiples of each prime are crossed off with one slice assignment.
+
+    :param start:
+        First number in the window.
+    :param size:
+        Number of entries in the window.
+    :param step:
+        Even difference between consecutive entries, coprime to the odd
+        sieve primes.
+    :param limit:
+        Sieve with the odd primes below this bound, at most
+        ``_WINDOW_SIEVE_LIMIT``.
+    :returns:
+        A ``bytearray`` with 1 at each surviving index and 0 elsewhere.
+    """
+    flags = bytearray(b"\x01") * size
+    for prime, inverse in _get_window_sieve(step):
+        if prime >= limit:
+            break
+        # Smallest i with start + step * i = 0 (mod prime).
+        i = (-(start % prime) * inverse) % prime
+        if start + step * i == prime:
+            # Do not cross off the prime itself.
+            i += prime
+        if i < size:
+            flags[i::prime] = bytearray((size - 1 - i) // prime + 1)
+    return flags
+
+
+# Window starts drawn per read of random bytes.
+_STARTS_PER_BATCH = 8
+
+
+def _window_size(bits):
+    # About six primes are expected among 2 * bits consecutive odd numbers.
+    return max(64, 2 * bits)
+
+
+def _window_sieve_limit(bits):
+    # A probable-prime test gets dearer with size much faster than a pass
+    # of the sieve, so larger numbers are worth sieving further.
+    return min(_WINDOW_SIEVE_LIMIT, max(1000, bits << 4))
+
+
+def _survivors(flags):
+    """
+    Yields the indices of the surviving numbers in a sieve window.
+    """
+    i = flags.find(b"\x01")
+    while i != -1:
+        yield i
+        i = flags.find(b"\x01", i + 1)
+
+
 def generate_random_prime(bits):
     """
     Generates a random prime number.
 
+    Candidates are taken from a window of odd numbers following a random
+    start. The window is sieved with the small primes and only the
+    survivors are given the probable-prime test.
+
     :param bits:
         Number of bits.
     :return:
@@ -94,27 +394,31 @@ def generate_random_prime(bits):
 
     #The 1.5 ensures the 2 MSBs are set
     #Thus, when used for p,q in RSA, n will have its MSB set
-    #
-    #Since 30 is lcm(2,3,5), we'll set our test numbers to
-    #29 % 30 and keep them there
-    low = (2L ** (bits-1)) * 3/2
-    high = 2L ** bits - 30
-    p = generate_random_long(low, high)
-    p += 29 - (p % 30)
+    low = (2 ** (bits-1)) * 3 // 2
+    high = 2 ** bits
+    size = _window_size(bits)
+    limit = _window_sieve_limit(bits)
     while 1:
-        p += 30
-        if p >= high:
-            p = generate_random_long(low, high)
-            p += 29 - (p % 30)
-        if is_prime(p):
-            return p
+        for start in generate_random_longs(low, high, _STARTS_PER_BATCH):
+            start |= 1
+            flags = _sieve_window(start, size, 2, limit)
+            for i in _survivors(flags):
+                p = start + 2 * i
+                if p >= high:
+                    break
+                if _is_probable_prime(p):
+                    return p
 
 
 def generate_random_safe_prime(bits):
     """
     Unused at the moment.
 
-    Generates a random prime number.
+    Generates a random safe prime number p = 2q + 1 with q prime.
+
+    Each window of candidates for q is sieved twice: once for q and once
+    for 2q + 1, so both are free of small factors before either is given
+    the probable-prime test.
 
     :param bits:
         Number of bits.
@@ -125,23 +429,27 @@ def generate_random_safe_prime(bits):
 
     #The 1.5 ensures the 2 MSBs are set
     #Thus, when used for p,q in RSA, n will have its MSB set
-    #
-    #Since 30 is lcm(2,3,5), we'll set our test numbers to
-    #29 % 30 and keep them there
-    low = (2 ** (bits-2)) * 3/2
-    high = (2 ** (bits-1)) - 30
-    q = generate_random_long(low, high)
-    q += 29 - (q % 30)
+    low = (2 ** (bits-2)) * 3 // 2
+    high = 2 ** (bits-1)
+    size = 4 * _window_size(bits)
+    limit = _window_sieve_limit(bits)
     while 1:
-        q += 30
-        if q >= high:
-            q = generate_random_long(low, high)
-            q += 29 - (q % 30)
-        #Ideas from Tom Wu's SRP code
-        #Do trial division on p and q before Rabin-Miller
-        if is_prime(q, 0):
-            p = (2 * q) + 1
-            if is_prime(p):
-                if is_prime(q):
+        for start in generate_random_longs(low, high, _STARTS_PER_BATCH):
+            start |= 1
+            flags = _sieve_window(start, size, 2, limit)
+            # p = 2q + 1 = (2 * start + 1) + 4i
+            p_flags = _sieve_window(2 * start + 1, size, 4, limit)
+            for i in _survivors(flags):
+                if not p_flags[i]:
+                    continue
+                q = start + 2 * i
+                if q >= high:
+                    break
+                #Ideas from Tom Wu's SRP code
+                #Test p before q; most q that pass fail on p.
+                p = (2 * q) + 1
+                if _is_probable_prime(p) and _is_probable_prime(q):
                     return p
 
+
+lazy_module_attributes(__name__, sieve=get_sieve)
@@ -12,16 +12,23 @@ Functions:
 ----------
 .. autofunction:: generate_random_bytes
 .. autofunction:: generate_random_long
+.. autofunction:: generate_random_longs
 .. autofunction:: generate_random_uint_string
 .. autofunction:: generate_random_hex_string
 .. autofunction:: generate_random_bytearray
+
+Classes:
+--------
+.. autoclass:: RandomStringGenerator
+   :members:
 """
 
 import os
-from pyoauth.types import byte_count, bit_count
-from pyoauth.types.bytearray import \
-    bytearray_to_long, bytes_to_bytearray
+import threading
+from pyoauth.types import bytes, bit_count, bytes_to_int
+from pyoauth.types.bytearray import bytes_to_bytearray
 from pyoauth.types.codec import\
+    base64url_encode, \
     bytes_to_base64, \
     bytes_to_decimal, \
     bytes_to_hex
@@ -95,18 +102,48 @@ def generate_random_long(low, high):
     :returns:
         Random long integer value.
     """
+    return generate_random_longs(low, high, 1)[0]
+
+
+def generate_random_longs(low, high, count):
+    """
+    Generates random long integers uniformly distributed in the range
+    ``[low, high)``.
+
+    Random bytes for a whole batch of fixed-width candidates are read at
+    once. Each candidate is an offset from ``low`` masked to the bit width
+    of the range and is rejected when it falls outside the range, which
+    happens less than half the time.
+
+    :param low:
+        Low (inclusive).
+    :param high:
+        High (exclusive).
+    :param count:
+        Number of values.
+    :returns:
+        A list of ``count`` random long integer values.
+    """
     if low >= high:
         raise ValueError("High must be greater than low.")
-    num_bits = bit_count(high)
-    num_bytes = byte_count(high)
-    last_bits = num_bits % 8
-    while 1:
-        byte_array = generate_random_bytearray(num_bytes)
-        if last_bits:
-            byte_array[0] = byte_array[0] % (1 << last_bits)
-        n = bytearray_to_long(byte_array)
-        if n >= low and n < high:
-            return n
+    span = high - low
+    num_bits = bit_count(span - 1)
+    if not num_bits:
+        return [low] * count
+    num_bytes = (num_bits + 7) >> 3
+    mask = (1 << num_bits) - 1
+    values = []
+    while len(values) < count:
+        # Expected number of candidates for the values still needed.
+        candidates = ((count - len(values)) << num_bits) // span + 1
+        random_bytes = generate_random_bytes(candidates * num_bytes)
+        for offset in range(0, len(random_bytes), num_bytes):
+            n = bytes_to_int(random_bytes[offset:offset + num_bytes]) & mask
+            if n < span:
+                values.append(low + n)
+                if len(values) == count:
+                    break
+    return values
 
 
 _BYTE_BASE_ENCODING_MAP = {
@@ -166,3 +203,136 @@ def generate_random_bytearray(count):
         A random byte array.
     """
     return bytes_to_bytearray(generate_random_bytes(count))
+
+
+def _encode_block_decimal(random_bytes, width):
+    return [bytes(bytes_to_int(random_bytes[i:i + width]))
+            for i in range(0, len(random_bytes), width)]
+
+
+def _encode_block_hex(random_bytes, width):
+    # Hex-encode the whole block at once and cut it up.
+    encoded = bytes_to_hex(random_bytes)
+    width <<= 1
+    return [encoded[i:i + width] for i in range(0, len(encoded), width)]
+
+
+def _encode_block_base64url(random_bytes, width):
+    if not width % 3:
+        # Values are whole 3-byte groups, so the block can be encoded
+        # at once and cut up.
+        encoded = base64url_encode(random_bytes)
+        width = (width // 3) << 2
+        return [encoded[i:i + width] for i in range(0, len(encoded), width)]
+    return [base64url_encode(random_bytes[i:i + width])
+            for i in range(0, len(random_bytes), width)]
+
+
+_BLOCK_ENCODERS = {
+    "decimal": _encode_block_decimal,
+    "hex": _encode_block_hex,
+    "base64url": _encode_block_base64url,
+}
+
+# Number of forks between the first process and this one. Queues filled
+# under an older count were inherited from the parent.
+_forks = 0
+
+
+def _after_fork_in_child():
+    global _forks
+    _forks += 1
+
+
+if hasattr(os, "register_at_fork"):
+    # Python 3.7+
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+    def _initialize_fork_hook():
+        pass
+else:
+    # Older versions have no fork hooks, but the interpreter calls
+    # threading._after_fork() in the child after os.fork() once thread
+    # support is initialized.
+    def _threading_after_fork(after_fork=threading._after_fork):
+        _after_fork_in_child()
+        after_fork()
+    threading._after_fork = _threading_after_fork
+    _fork_hook_initialized = False
+
+    def _initialize_fork_hook():
+        # Starting a thread initializes thread support.
+        global _fork_hook_initialized
+        if not _fork_hook_initialized:
+            try:
+                import thread
+            except ImportError:
+                # Python 3.
+                import _thread as thread
+            thread.start_new_thread(lambda: None, ())
+            _fork_hook_initialized = True
+
+
+class RandomStringGenerator(object):
+    """
+    Generates random ASCII strings in blocks.
+
+    One OS randomness call and one encoding pass make ``block_size``
+    values at a time. Each thread draws from its own queue, so
+    :meth:`generate` takes no locks and an instance can be shared between
+    threads. The queues are discarded in a child process after a fork, so
+    parent and child never hand out the same value.
+
+    :param num_bytes:
+        Number of random bytes in each value.
+    :param encoding:
+        One of:
+            1. ``"decimal"``: unsigned decimal integer.
+            2. ``"hex"`` (default): lowercase hexadecimal.
+            3. ``"base64url"``: URL-safe base 64 without padding. These
+               values never need percent-encoding.
+    :param block_size:
+        Number of values generated at a time. Default 256.
+    """
+    def __init__(self, num_bytes, encoding="hex", block_size=256):
+        if num_bytes <= 0:
+            raise ValueError("Number of bytes must be positive: got `%r`." % (num_bytes, ))
+        if block_size <= 0:
+            raise ValueError("Block size must be positive: got `%r`." % (block_size, ))
+        if encoding not in _BLOCK_ENCODERS:
+            raise ValueError("Encoding must be one of %r: got `%r`." % (
+                sorted(_BLOCK_ENCODERS.keys()), encoding))
+        self._num_bytes = num_bytes
+        self._encoding = encoding
+        self._block_size = block_size
+        self._local = threading.local()
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    def generate(self):
+        """
+        Returns the next random string.
+        """
+        local = self._local
+        try:
+            if local.forks == _forks:
+                return local.queue.pop()
+        except (AttributeError, IndexError):
+            pass
+        _initialize_fork_hook()
+        local.queue = self._generate_block()
+        local.forks = _forks
+        return local.queue.pop()
+
+    def _generate_block(self):
+        """
+        Generates a list of ``block_size`` random strings.
+        """
+        random_bytes = generate_random_bytes(self._num_bytes * self._block_size)
+        return _BLOCK_ENCODERS[self._encoding](random_bytes, self._num_bytes)
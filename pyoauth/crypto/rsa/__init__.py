@@ -7,37 +7,211 @@
 :module: pyoauth.crypto.rsa
 :synopsis: Factory functions for RSA public and private keys.
 
+The RSA implementation is chosen on first use and named by
+``IMPLEMENTATION``:
+
+* ``"native"`` (:mod:`pyoauth.crypto.rsa.native`) when the arithmetic
+  backend of :mod:`pyoauth.types.number` is gmpy2 or gmpy, or when
+  PyCrypto is not installed.
+* ``"pycrypto"`` (:mod:`pyoauth.crypto.rsa.pycrypto`) otherwise.
+
+Importing this module loads neither the implementation nor the ASN.1
+codecs, so HMAC-SHA1-only programs never pay for them. ``IMPLEMENTATION``
+and the implementation's ``PrivateKey`` and ``PublicKey`` classes are
+module attributes that load it when first read.
+
 Functions
 ---------
 .. autofunction:: create_private_key
 .. autofunction:: create_public_key
+.. autofunction:: generate_key_pair
+.. autofunction:: generate_key_pairs
+.. autofunction:: get_implementation
+
+Classes
+-------
+.. autoclass:: pyoauth.crypto.rsa.keyring.Keyring
+   :noindex:
+.. autoclass:: pyoauth.crypto.rsa.blob.KeyBlob
+   :noindex:
+.. autofunction:: pyoauth.crypto.rsa.blob.write_key_blob
+   :noindex:
 """
 
-from pyoauth.crypto.codec import private_key_pem_decode, public_key_pem_decode
+from pyoauth.crypto.rsa.blob import KeyBlob, write_key_blob
+from pyoauth.crypto.rsa.keyring import Keyring
+from pyoauth.types.module import lazy_module_attributes
+
+
+_implementation = None
+
 
-try:
-    from pyoauth.crypto.rsa.pycrypto import PrivateKey, PublicKey
-except ImportError:
-    PrivateKey = None
-    PublicKey = None
-    raise NotImplementedError("RSA implementation not found.")
+def _load_implementation():
+    """
+    Imports the RSA implementation once.
+
+    :returns:
+        A tuple of the form ``(name, PrivateKey class, PublicKey class)``.
+    """
+    global _implementation
+    if _implementation is None:
+        from pyoauth.types.number import BACKEND
+        if BACKEND in ("gmpy2", "gmpy"):
+            from pyoauth.crypto.rsa.native import PrivateKey, PublicKey
+            name = "native"
+        else:
+            try:
+                from pyoauth.crypto.rsa.pycrypto import PrivateKey, PublicKey
+                name = "pycrypto"
+            except ImportError:
+                from pyoauth.crypto.rsa.native import PrivateKey, PublicKey
+                name = "native"
+        _implementation = (name, PrivateKey, PublicKey)
+    return _implementation
+
+
+def get_implementation():
+    """
+    Returns the name of the RSA implementation, loading it if necessary.
+
+    :returns:
+        ``"native"`` or ``"pycrypto"``.
+    """
+    return _load_implementation()[0]
 
 
 def create_private_key(encoded_key, encoding="PEM"):
+    from pyoauth.crypto.codec import private_key_pem_decode
     encoding = encoding.upper()
     if encoding == "PEM":
         key_info = private_key_pem_decode(encoded_key)
     else:
         raise NotImplementedError("Key encoding not supported.")
-    key = PrivateKey(key_info, encoded_key, encoding)
+    key = _load_implementation()[1](key_info, encoded_key, encoding)
     return key
 
 
 def create_public_key(encoded_key, encoding="PEM"):
+    from pyoauth.crypto.codec import public_key_pem_decode
     encoding = encoding.upper()
     if encoding == "PEM":
         key_info = public_key_pem_decode(encoded_key)
     else:
         raise NotImplementedError("Key encoding not supported.")
-    key = PublicKey(key_info, encoded_key, encoding)
+    key = _load_implementation()[2](key_info, encoded_key, encoding)
     return key
+
+
+def generate_key_pair(bits=2048, public_exponent=65537, processes=None):
+    """
+    Generates a new RSA key pair.
+
+    The two prime searches run in parallel in a process pool.
+
+    :param bits:
+        Size of the modulus in bits. Default 2048.
+    :param public_exponent:
+        The public exponent. Default 65537.
+    :param processes:
+        Number of worker processes. ``None`` (default) uses one per CPU,
+        up to 2; ``1`` searches in the calling process.
+    :returns:
+        A tuple of the form ``(PrivateKey, PublicKey)``. Their
+        ``encoded_key`` properties hold the PKCS#8 PEM private key and the
+        PEM public key.
+    """
+    return generate_key_pairs(1, bits, public_exponent, processes)[0]
+
+
+def generate_key_pairs(count, bits=2048, public_exponent=65537, processes=None):
+    """
+    Generates RSA key pairs in bulk.
+
+    The ``2 * count`` prime searches are spread over one process pool,
+    which is cheaper than a pool per key.
+
+    :param count:
+        Number of key pairs.
+    :param bits:
+        Size of each modulus in bits. Default 2048.
+    :param public_exponent:
+        The public exponent. Default 65537.
+    :param processes:
+        Number of worker processes. ``None`` (default) uses one per CPU,
+        up to ``2 * count``; ``1`` searches in the calling process.
+    :returns:
+        A list of ``(PrivateKey, PublicKey)`` tuples.
+    """
+    import multiprocessing
+    if bits < 64:
+        raise ValueError("RSA keys must have at least 64 bits: got %r" % bits)
+    if public_exponent < 3 or not public_exponent & 1:
+        raise ValueError("RSA public exponent must be odd and at least 3: got %r" % public_exponent)
+    # The modulus of two primes with their two top bits set has exactly
+    # ``bits`` bits.
+    tasks = [((bits + 1) // 2, public_exponent),
+             (bits // 2, public_exponent)] * count
+    processes = min(processes or multiprocessing.cpu_count(), len(tasks))
+    if processes <= 1:
+        primes = [_generate_prime(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            primes = pool.map(_generate_prime, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    key_pairs = []
+    for i in range(count):
+        p, q = primes[2 * i], primes[2 * i + 1]
+        while p == q:
+            q = _generate_prime(tasks[1])
+        key_pairs.append(_make_key_pair(p, q, public_exponent))
+    return key_pairs
+
+
+def _generate_prime(task):
+    """
+    Finds a prime p of the given size with p - 1 coprime to the public
+    exponent. Runs in pool workers.
+    """
+    from pyoauth.crypto.primes import generate_random_prime
+    from pyoauth.types.number import gcd
+    bits, public_exponent = task
+    while 1:
+        p = generate_random_prime(bits)
+        if gcd(public_exponent, p - 1) == 1:
+            return long(p)
+
+
+def _make_key_pair(p, q, public_exponent):
+    from pyoauth.crypto.codec import private_key_pem_encode, public_key_pem_encode
+    from pyoauth.types.number import inverse_mod, lcm
+    _, PrivateKey, PublicKey = _load_implementation()
+    if p < q:
+        p, q = q, p
+    n = p * q
+    d = inverse_mod(public_exponent, lcm(p - 1, q - 1))
+    private_key_info = dict(
+        version=0,
+        modulus=n,
+        publicExponent=long(public_exponent),
+        privateExponent=long(d),
+        prime1=p,
+        prime2=q,
+        exponent1=long(d % (p - 1)),
+        exponent2=long(d % (q - 1)),
+        coefficient=long(inverse_mod(q, p)),
+    )
+    public_key_info = dict(modulus=n, exponent=long(public_exponent))
+    private_pem = private_key_pem_encode(private_key_info)
+    public_pem = public_key_pem_encode(public_key_info)
+    return (PrivateKey(private_key_info, private_pem, "PEM"),
+            PublicKey(public_key_info, public_pem, "PEM"))
+
+
+lazy_module_attributes(__name__,
+                       IMPLEMENTATION=get_implementation,
+                       PrivateKey=lambda: _load_implementation()[1],
+                       PublicKey=lambda: _load_implementation()[2])
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Released into public domain.
+
+"""
+:module: pyoauth.crypto.rsa.blob
+:synopsis: Read-only memory-mapped key files for pre-forked servers.
+
+Key objects loaded before ``fork()`` do not stay shared for long:
+reference counting and the cyclic garbage collector write to the pages
+that hold them, so every worker ends up with its own copy. A key blob
+keeps the keys' RSA integers inside one read-only memory-mapped file
+instead. Its pages stay shared by every worker, and each worker builds
+key objects only for the keys it actually uses, without parsing any
+ASN.1.
+
+Only the integers are stored: certificates lose their subject,
+extensions and signature, and the ``encoded_key`` of a key built from a
+blob is a ``PUBLIC KEY`` or PKCS#8 ``PRIVATE KEY`` PEM encoded from
+them when it is first read.
+
+Usage::
+
+    # Once, e.g. at deploy time:
+    write_key_blob("/var/lib/oauth/keys.blob",
+                   dict((consumer_key, keyring.get(consumer_key))
+                        for consumer_key in keyring.consumer_keys()))
+
+    # In the master, before forking workers:
+    keys = KeyBlob("/var/lib/oauth/keys.blob")
+
+    # In a worker:
+    public_key = keys.get(oauth_params["oauth_consumer_key"])
+
+File format
+-----------
+All integers are unsigned and big-endian::
+
+    header   magic "PYOAUTHK", format version (4 bytes), key count (4 bytes)
+    records  one per key, sorted by name: name offset, name length,
+             integers offset, integers length (4 bytes each) and kind
+             (1 byte: 0 public, 1 private)
+    data     names, and for each key its integers, each as a length
+             (4 bytes) followed by its big-endian bytes: modulus and
+             exponent for public keys; modulus, public exponent, private
+             exponent, both primes, both CRT exponents and the CRT
+             coefficient for private keys
+
+Functions and classes
+---------------------
+.. autofunction:: write_key_blob
+.. autoclass:: KeyBlob
+   :members:
+"""
+
+import mmap
+import os
+import struct
+
+from pyoauth.types import unicode_string, bytes_to_int, int_to_bytes
+
+try:
+    # Python 2: key components are longs, as with the ASN.1 decoders.
+    _integer = long
+except NameError:
+    # Python 3.
+    _integer = int
+
+
+_MAGIC = b"PYOAUTHK"
+_VERSION = 2
+_HEADER = struct.Struct(">8sII")
+_RECORD = struct.Struct(">IIIIB")
+_LENGTH = struct.Struct(">I")
+
+# Key information fields stored for each kind of key, in order.
+_FIELDS = (
+    ("modulus", "exponent"),
+    ("modulus", "publicExponent", "privateExponent", "prime1", "prime2",
+     "exponent1", "exponent2", "coefficient"),
+)
+_PRIVATE = 1
+
+_PUBLIC_LABELS = ("CERTIFICATE", "PUBLIC KEY")
+_PRIVATE_LABELS = ("PRIVATE KEY", "RSA PRIVATE KEY")
+
+
+def _encode_name(name):
+    if isinstance(name, unicode_string):
+        return name.encode("utf-8")
+    return name
+
+
+def _key_info(name, key):
+    """
+    Returns the key information of a key object or of the first
+    certificate or RSA key in a PEM string.
+    """
+    if hasattr(key, "key_info"):
+        return key.key_info
+    from pyoauth.crypto.codec import public_key_der_decode, \
+        private_key_der_decode
+    from pyoauth.crypto.codec.pem import iter_pem_blocks
+    for label, _, der in iter_pem_blocks(key):
+        if label in _PUBLIC_LABELS:
+            return public_key_der_decode(der, label)
+        if label in _PRIVATE_LABELS:
+            return private_key_der_decode(der, label)
+    raise ValueError("No certificate or RSA key found for %r." % name)
+
+
+def write_key_blob(path, keys):
+    """
+    Writes the RSA integers of keys into a key blob file.
+
+    The file is written next to ``path`` and renamed into place, so
+    processes that still map an older blob keep reading it unchanged.
+
+    :param path:
+        Path of the blob file.
+    :param keys:
+        A dictionary, or an iterable of ``(name, key)`` pairs. Names are
+        typically consumer keys. Each key is a public or private key
+        object, or a PEM string holding a certificate, a public key or an
+        RSA private key; only its first such block is stored.
+    :returns:
+        The number of keys written.
+    """
+    if hasattr(keys, "items"):
+        keys = keys.items()
+
+    entries = {}
+    for name, key in keys:
+        name = _encode_name(name)
+        if name in entries:
+            raise ValueError("Duplicate key name %r." % name)
+        key_info = _key_info(name, key)
+        kind = int("privateExponent" in key_info)
+        integers = []
+        for field in _FIELDS[kind]:
+            value = int_to_bytes(key_info[field])
+            integers.append(_LENGTH.pack(len(value)))
+            integers.append(value)
+        entries[name] = (kind, b"".join(integers))
+
+    names = sorted(entries)
+    offset = _HEADER.size + _RECORD.size * len(names)
+    records = []
+    data = []
+    for name in names:
+        kind, integers = entries[name]
+        records.append(_RECORD.pack(offset, len(name), offset + len(name),
+                                    len(integers), kind))
+        data.append(name)
+        data.append(integers)
+        offset += len(name) + len(integers)
+
+    temporary_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(temporary_path, "wb") as blob_file:
+        blob_file.write(_HEADER.pack(_MAGIC, _VERSION, len(names)))
+        blob_file.write(b"".join(records))
+        blob_file.write(b"".join(data))
+    os.rename(temporary_path, path)
+    return len(names)
+
+
+class KeyBlob(object):
+    """
+    Keys in a memory-mapped key blob file written by
+    :func:`write_key_blob`.
+
+    Open the blob in the master process before forking, ideally after
+    calling :func:`pyoauth.crypto.rsa.get_implementation` so the workers
+    share the RSA implementation too. Lookups do a binary search over the
+    mapped records and build the key object on first use; the objects are
+    cached per process.
+
+    :param path:
+        Path of the blob file.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as blob_file:
+            self._region = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._region, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._region.close()
+            raise ValueError("Not a version %d key blob: %r" % (_VERSION, path))
+        self._count = count
+        self._cache = {}
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, name):
+        return self._find(_encode_name(name)) is not None
+
+    def names(self):
+        """
+        Returns the key names in sorted order.
+        """
+        return [self._name(self._record(i)) for i in range(self._count)]
+
+    def get(self, name, default=None):
+        """
+        Looks up a key by name.
+
+        :param name:
+            Key name, typically a consumer key.
+        :param default:
+            Returned when the blob has no key of that name.
+        :returns:
+            A public or private key object as created by
+            :func:`pyoauth.crypto.rsa.create_public_key` or
+            :func:`pyoauth.crypto.rsa.create_private_key`.
+        """
+        name = _encode_name(name)
+        key = self._cache.get(name)
+        if key is None:
+            index = self._find(name)
+            if index is None:
+                return default
+            key = self._cache[name] = self._load(self._record(index))
+        return key
+
+    def close(self):
+        """
+        Unmaps the blob. Keys already built remain usable.
+        """
+        self._region.close()
+
+    def _record(self, index):
+        return _RECORD.unpack_from(self._region, _HEADER.size + _RECORD.size * index)
+
+    def _name(self, record):
+        return self._region[record[0]:record[0] + record[1]]
+
+    def _find(self, name):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._name(self._record(middle))
+            if current < name:
+                low = middle + 1
+            elif current > name:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _load(self, record):
+        from pyoauth.crypto.rsa import _load_implementation
+        _, PrivateKey, PublicKey = _load_implementation()
+        _, _, offset, _, kind = record
+        region = self._region
+        key_info = {}
+        for field in _FIELDS[kind]:
+            length = _LENGTH.unpack_from(region, offset)[0]
+            offset += _LENGTH.size
+            key_info[field] = _integer(bytes_to_int(region[offset:offset + length]))
+            offset += length
+        if kind == _PRIVATE:
+            key_info["version"] = _integer(0)
+            key_class = PrivateKey
+        else:
+            key_class = PublicKey
+        # The PEM encoding is built from key_info if it is ever read.
+        return key_class(key_info, None, "PEM")
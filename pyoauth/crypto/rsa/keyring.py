@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Released into public domain.
+
+"""
+:module: pyoauth.crypto.rsa.keyring
+:synopsis: Indexed collection of RSA keys loaded from PEM bundles.
+
+Usage::
+
+    keyring = Keyring()
+    keyring.load("/etc/oauth/partners")      # a directory or a bundle file
+    public_key = keyring.get(oauth_params["oauth_consumer_key"])
+
+    # Later, e.g. on SIGHUP:
+    keyring.reload()
+
+Every PEM block is indexed by the SHA-1 fingerprint of its DER and, when
+known, by consumer key. The consumer key is taken from a
+``Consumer-Key:`` header inside the block::
+
+    -----BEGIN CERTIFICATE-----
+    Consumer-Key: www.example.com
+
+    MIIBpjCCAQ+gAwIBAgIBATANBgkqhkiG9w0BAQUFADAZMRcwFQYDVQQDDA5UZXN0
+    ...
+    -----END CERTIFICATE-----
+
+or, for files that hold a single key, from the file name without its
+extension.
+
+Blocks that cannot be read from loaded files, such as certificates for
+non-RSA keys or corrupt base64, and files that cannot be read at all
+are logged and skipped; the rest of the directory still loads. A skipped
+file is read again only when its modification time or size changes.
+
+When two blocks share a consumer key or fingerprint, keys added with
+:meth:`Keyring.add_pem` win over loaded files, later additions win over
+earlier ones, and files win in the order of their roots and then of
+their paths. Removing the winner restores the key it shadowed.
+
+Classes
+-------
+.. autoclass:: Keyring
+   :members:
+"""
+
+import bisect
+import os
+import threading
+
+from pyoauth.log import log_warning
+
+
+CONSUMER_KEY_HEADER = "Consumer-Key"
+
+#: File name extensions read from directories.
+PEM_FILE_EXTENSIONS = (".pem", ".crt", ".cer", ".key", ".pub")
+
+_PUBLIC_KEY_LABELS = ("CERTIFICATE", "PUBLIC KEY")
+_PRIVATE_KEY_LABELS = ("PRIVATE KEY", "RSA PRIVATE KEY")
+
+
+class Keyring(object):
+    """
+    RSA public and private keys indexed by consumer key and by SHA-1
+    fingerprint.
+
+    Keys are parsed once, when their file is loaded or changes. Lookups
+    are dictionary lookups and do not take a lock, so a keyring can be
+    shared by threads while another thread reloads it: a reload builds
+    new indexes and swaps them in at once, so a key present both before
+    and after it never goes missing.
+
+    :param paths:
+        Optional iterable of files or directories to :meth:`load`.
+    :param extensions:
+        File name extensions read from directories. Default
+        :data:`PEM_FILE_EXTENSIONS`.
+    """
+    def __init__(self, paths=None, extensions=PEM_FILE_EXTENSIONS):
+        self._extensions = tuple(extensions)
+        self._lock = threading.Lock()
+        # ``(by consumer key, by fingerprint)``, replaced as a whole so
+        # that lookups see either the old or the new indexes.
+        self._indexes = ({}, {})
+        # For each index, ``value: [(rank, entry), ...]`` sorted by rank;
+        # the last entry is the indexed one.
+        self._shadows = ({}, {})
+        # Loaded roots, and ``path: ((mtime, size), ranked entries)`` for
+        # every file read from them.
+        self._roots = []
+        self._files = {}
+        self._added_count = 0
+        for path in paths or ():
+            self.load(path)
+
+    def __len__(self):
+        return len(self._indexes[1])
+
+    def __contains__(self, consumer_key):
+        return consumer_key in self._indexes[0]
+
+    def get(self, consumer_key, default=None):
+        """
+        Looks up a key by consumer key.
+
+        :param consumer_key:
+            The ``oauth_consumer_key`` value.
+        :param default:
+            Returned when no key is indexed under ``consumer_key``.
+        :returns:
+            A public or private key object as created by
+            :func:`pyoauth.crypto.rsa.create_public_key` or
+            :func:`pyoauth.crypto.rsa.create_private_key`.
+        """
+        entry = self._indexes[0].get(consumer_key)
+        return default if entry is None else entry[2]
+
+    def get_by_fingerprint(self, fingerprint, default=None):
+        """
+        Looks up a key by the SHA-1 fingerprint of its DER encoding.
+
+        :param fingerprint:
+            Hexadecimal fingerprint. Case and ``:`` separators (as printed
+            by ``openssl x509 -fingerprint``) are ignored.
+        :param default:
+            Returned when no key has this fingerprint.
+        :returns:
+            A public or private key object.
+        """
+        entry = self._indexes[1].get(fingerprint.replace(":", "").lower())
+        return default if entry is None else entry[2]
+
+    def consumer_keys(self):
+        """
+        Returns the consumer keys that have a key.
+        """
+        return list(self._indexes[0].keys())
+
+    def fingerprints(self):
+        """
+        Returns the fingerprints of all keys.
+        """
+        return list(self._indexes[1].keys())
+
+    def add_pem(self, pem_data, consumer_key=None):
+        """
+        Adds every key in a PEM string. Keys added this way are not
+        affected by :meth:`reload`.
+
+        :param pem_data:
+            One or more PEM blocks.
+        :param consumer_key:
+            Consumer key for blocks without a ``Consumer-Key`` header.
+            Only used when ``pem_data`` holds a single key.
+        :returns:
+            List of the fingerprints of the keys added.
+        """
+        from pyoauth.crypto.codec.pem import iter_pem_blocks
+        entries = self._parse(iter_pem_blocks(pem_data), consumer_key)
+        with self._lock:
+            ranked = []
+            for entry in entries:
+                self._added_count += 1
+                ranked.append(((1, self._added_count), entry))
+            self._update((), ranked)
+        return [entry[1] for entry in entries]
+
+    def load(self, path):
+        """
+        Loads a PEM bundle file or every PEM file in a directory (not
+        recursively) and remembers the path for :meth:`reload`.
+
+        :param path:
+            File or directory path.
+        :returns:
+            The number of keys loaded.
+        """
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            raise IOError("No such file or directory: %r" % path)
+        with self._lock:
+            if path not in self._roots:
+                self._roots.append(path)
+            before = len(self)
+            self._refresh()
+            return len(self) - before
+
+    def reload(self):
+        """
+        Re-reads loaded files whose modification time or size changed,
+        reads new files in loaded directories and drops the keys of
+        deleted files. Unchanged files are not parsed again.
+
+        :returns:
+            The number of files read, including new files, plus the
+            number of files dropped.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        # Files are indexed in a stable order so that, when two files hold
+        # the same consumer key, the later one consistently wins.
+        present = []
+        for root_index, root in enumerate(self._roots):
+            if os.path.isdir(root):
+                for name in sorted(os.listdir(root)):
+                    path = os.path.join(root, name)
+                    if name.lower().endswith(self._extensions) and os.path.isfile(path):
+                        present.append((path, root_index))
+            elif os.path.isfile(root):
+                present.append((root, root_index))
+
+        changes = 0
+        removed = []
+        added = []
+        present_set = set(path for path, _ in present)
+        for path in list(self._files):
+            if path not in present_set:
+                removed.extend(self._files.pop(path)[1])
+                changes += 1
+        for path, root_index in present:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime, stat.st_size)
+            loaded = self._files.get(path)
+            if loaded is not None and loaded[0] == signature:
+                continue
+            try:
+                entries = self._parse_file(path)
+            except EnvironmentError, e:
+                # E.g. removed since it was listed.
+                log_warning("Skipping %r: %s", path, e)
+                entries = []
+            if loaded is not None:
+                removed.extend(loaded[1])
+            ranked = [((0, root_index, path, i), entry)
+                      for i, entry in enumerate(entries)]
+            self._files[path] = (signature, ranked)
+            added.extend(ranked)
+            changes += 1
+        self._update(removed, added)
+        return changes
+
+    def _parse_file(self, path):
+        from pyoauth.crypto.codec.pem import iter_pem_file_blocks
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return self._parse(iter_pem_file_blocks(path), stem, path)
+
+    def _parse(self, blocks, consumer_key=None, path=None):
+        """
+        Parses PEM blocks into ``(consumer key, fingerprint, key)``
+        entries.
+
+        When ``path`` is given, blocks that cannot be decoded are logged
+        and skipped, and a malformed block ends the file; otherwise the
+        error is raised.
+        """
+        from binascii import Error as Base64Error
+        from pyasn1.error import PyAsn1Error
+        from pyoauth.crypto.codec import public_key_der_decode, \
+            private_key_der_decode
+        from pyoauth.crypto.codec.pem import der_to_pem
+        from pyoauth.crypto.hash import sha1_hex_digest
+        from pyoauth.crypto.rsa import _load_implementation
+        _, PrivateKey, PublicKey = _load_implementation()
+
+        entries = []
+        key_blocks = 0
+        try:
+            for label, headers, der in blocks:
+                if label in _PUBLIC_KEY_LABELS:
+                    decode, key_class = public_key_der_decode, PublicKey
+                elif label in _PRIVATE_KEY_LABELS:
+                    decode, key_class = private_key_der_decode, PrivateKey
+                else:
+                    continue
+                key_blocks += 1
+                try:
+                    key_info = decode(der, label)
+                except (ValueError, NotImplementedError, PyAsn1Error), e:
+                    if path is None:
+                        raise
+                    log_warning("Skipping %s block %d of %r: %s",
+                                label, key_blocks, path, e)
+                    continue
+                # Keys keep their PEM encoding in ``encoded_key``.
+                pem_key = der_to_pem(der, "-----BEGIN %s-----" % label,
+                                     "-----END %s-----" % label)
+                entries.append([headers.get(CONSUMER_KEY_HEADER),
+                                sha1_hex_digest(der),
+                                key_class(key_info, pem_key, "PEM")])
+        except (ValueError, Base64Error), e:
+            if path is None:
+                raise
+            log_warning("Skipping the rest of %r: %s", path, e)
+        if key_blocks == 1 and entries and entries[0][0] is None:
+            entries[0][0] = consumer_key
+        return [tuple(entry) for entry in entries]
+
+    def _update(self, removed, added):
+        """
+        Replaces the indexes with copies from which the ``removed`` and to
+        which the ``added`` ``(rank, entry)`` pairs have been applied.
+        """
+        if not removed and not added:
+            return
+        indexes = (dict(self._indexes[0]), dict(self._indexes[1]))
+        changed = (set(), set())
+        for rank, entry in removed:
+            for position in (0, 1):
+                value = entry[position]
+                if value is None:
+                    continue
+                shadows = self._shadows[position][value]
+                for i, (_, shadow) in enumerate(shadows):
+                    if shadow is entry:
+                        del shadows[i]
+                        break
+                changed[position].add(value)
+        for ranked in added:
+            for position in (0, 1):
+                value = ranked[1][position]
+                if value is None:
+                    continue
+                shadows = self._shadows[position].setdefault(value, [])
+                # Ranks are unique, so entries are never compared.
+                bisect.insort(shadows, ranked)
+                changed[position].add(value)
+        for position in (0, 1):
+            index, all_shadows = indexes[position], self._shadows[position]
+            for value in changed[position]:
+                shadows = all_shadows.get(value)
+                if shadows:
+                    index[value] = shadows[-1][1]
+                else:
+                    all_shadows.pop(value, None)
+                    index.pop(value, None)
+        self._indexes = indexes
+
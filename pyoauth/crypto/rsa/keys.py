@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from pyoauth.types import byte_count
 from pyoauth.types.number import long_to_bytes, bytes_to_long
 
 
@@ -22,7 +23,7 @@ def pkcs1_v1_5_encode(key_size, data):
         "emsa-pkcs1-v1_5" encoding.
     """
     SHA1_DIGESTINFO = '\x30\x21\x30\x09\x06\x05\x2b\x0e\x03\x02\x1a\x05\x00\x04\x14'
-    size = len(long_to_bytes(key_size))
+    size = byte_count(key_size)
     filler = '\xff' * (size - len(SHA1_DIGESTINFO) - len(data) - 3)
     return '\x00\x01' + filler + '\x00' + SHA1_DIGESTINFO + data
 
@@ -39,8 +40,12 @@ class Key(object):
     @property
     def encoded_key(self):
         """
-        Returns the original encoded key string.
+        Returns the original encoded key string. Keys created without
+        one, e.g. from a key blob, return a PEM encoding of their key
+        information instead.
         """
+        if self._encoded_key is None:
+            self._encoded_key = self._encode_key_info()
         return self._encoded_key
 
     @property
@@ -133,6 +138,9 @@ class Key(object):
     def _verify(self, digest, signature):
         raise NotImplementedError("Override this method.")
 
+    def _encode_key_info(self):
+        raise NotImplementedError("Override this method.")
+
 
 class PrivateKey(Key):
     """
@@ -149,11 +157,15 @@ class PrivateKey(Key):
           exponent2 INTEGER, -- d mod (q-1)
           coefficient INTEGER -- (inverse of q) mod p }
     """
-    pass
+    def _encode_key_info(self):
+        from pyoauth.crypto.codec import private_key_pem_encode
+        return private_key_pem_encode(self.key_info)
 
 
 class PublicKey(Key):
     """
     Abstract public key class.
     """
-    pass
+    def _encode_key_info(self):
+        from pyoauth.crypto.codec import public_key_pem_encode
+        return public_key_pem_encode(self.key_info)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Released into public domain.
+
+"""
+:module: pyoauth.crypto.rsa.native
+:synopsis: RSA implementation on top of the pyoauth.types.number backend.
+
+Key components are held in the native integer type of the active
+arithmetic backend (``mpz`` when gmpy2 is installed), so signing and
+verification convert values only when the input bytes are read and the
+signature bytes are written. Private-key operations use the Chinese
+Remainder Theorem on a blinded message, as PyCrypto does, so their
+timing does not depend on the message, and every signature is checked
+with the public exponent before it is returned, so a faulty half never
+leaks a prime factor.
+
+Classes:
+--------
+.. autoclass:: PrivateKey
+.. autoclass:: PublicKey
+"""
+
+from pyoauth.crypto.random import generate_random_long
+from pyoauth.types.number import get_backend, pow_mod, inverse_mod, \
+    gcd, bytes_to_long
+from pyoauth.crypto.rsa.keys import \
+    PublicKey as _PublicKey, \
+    PrivateKey as _PrivateKey
+
+
+class PrivateKey(_PrivateKey):
+    """
+    Represents a RSA private key.
+
+    :param encoded_key:
+        The encoded key string.
+    :param encoding:
+        The encoding method of the key. Default PEM.
+    """
+    def __init__(self, key_info, encoded_key, encoding):
+        super(PrivateKey, self).__init__(key_info, encoded_key, encoding)
+        mpz = get_backend().mpz
+        self._n = mpz(key_info["modulus"])
+        self._e = mpz(key_info["publicExponent"])
+        self._d = mpz(key_info["privateExponent"])
+        self._p = mpz(key_info["prime1"])
+        self._q = mpz(key_info["prime2"])
+        self._dp = mpz(key_info["exponent1"])
+        self._dq = mpz(key_info["exponent2"])
+        self._q_inv = mpz(key_info["coefficient"])
+        self._key = None
+
+    def _sign(self, digest):
+        """
+        Sign the digest.
+        """
+        n = self._n
+        m = bytes_to_long(digest)
+        while 1:
+            r = generate_random_long(2, n)
+            if gcd(r, n) == 1:
+                break
+        blinded = (m * pow_mod(r, self._e, n)) % n
+        s1 = pow_mod(blinded, self._dp, self._p)
+        s2 = pow_mod(blinded, self._dq, self._q)
+        h = (self._q_inv * (s1 - s2)) % self._p
+        signature = ((s2 + h * self._q) * inverse_mod(r, n)) % n
+        if pow_mod(signature, self._e, n) != m:
+            raise RuntimeError("RSA signature failed verification; refusing to return it.")
+        return signature
+
+    def _verify(self, digest, signature):
+        """
+        Verify signature against digest signed by public key.
+        """
+        return _verify(self._n, self._e, digest, signature)
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = _construct(self._n, self._e, self._d, self._p, self._q)
+        return self._key
+
+    @property
+    def size(self):
+        return self._n
+
+
+class PublicKey(_PublicKey):
+    """
+    Represents a RSA public key.
+
+    :param encoded_key:
+        The encoded key string.
+    :param encoding:
+        The encoding method of the key. Default PEM.
+    """
+    def __init__(self, key_info, encoded_key, encoding):
+        super(PublicKey, self).__init__(key_info, encoded_key, encoding)
+        mpz = get_backend().mpz
+        self._n = mpz(key_info["modulus"])
+        self._e = mpz(key_info["exponent"])
+        self._key = None
+
+    def _sign(self, digest):
+        """
+        Public keys cannot sign.
+        """
+        raise TypeError("Private key not available in this object.")
+
+    def _verify(self, digest, signature):
+        """
+        Verify signature against digest signed by public key.
+        """
+        return _verify(self._n, self._e, digest, signature)
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = _construct(self._n, self._e)
+        return self._key
+
+    @property
+    def size(self):
+        return self._n
+
+
+def _verify(n, e, digest, signature):
+    if not 0 < signature < n:
+        return False
+    return pow_mod(signature, e, n) == bytes_to_long(digest)
+
+
+def _construct(*components):
+    """
+    Builds the same key object the PyCrypto implementation exposes, so
+    that :attr:`key` does not depend on the arithmetic backend.
+    """
+    try:
+        from Crypto.PublicKey import RSA
+    except ImportError:
+        return _RSAKey(*[long(c) for c in components])
+    # PyCrypto only accepts Python longs.
+    return RSA.construct(tuple(long(c) for c in components))
+
+
+class _RSAKey(object):
+    """
+    Stand-in for PyCrypto's key object when PyCrypto is not installed;
+    offers its ``n``, ``e``, ``d``, ``p`` and ``q`` attributes.
+    """
+    def __init__(self, n, e, d=None, p=None, q=None):
+        self.n, self.e, self.d, self.p, self.q = n, e, d, p, q
+
+    def has_private(self):
+        return self.d is not None
+
+    def publickey(self):
+        return _RSAKey(self.n, self.e)
@@ -52,7 +52,8 @@ class PrivateKey(_PrivateKey):
         """
         #public_key = self.key.publickey()
         #return public_key.verify(digest, (signature, ))
-        return self.key.verify(digest, (signature, ))
+        # PyCrypto only accepts Python longs.
+        return self.key.verify(digest, (long(signature), ))
 
     @property
     def key(self):
@@ -90,7 +91,8 @@ class PublicKey(_PublicKey):
         """
         Verify signature against digest signed by public key.
         """
-        return self.key.verify(digest, (signature, ))
+        # PyCrypto only accepts Python longs.
+        return self.key.verify(digest, (long(signature), ))
 
     @property
     def key(self):
@@ -67,6 +67,9 @@ class InvalidHttpResponseError(Error):
 class HttpError(Error):
     pass
 
+class ConnectionPoolTimeoutError(Error):
+    pass
+
 class InvalidContentTypeError(Error):
     pass
 
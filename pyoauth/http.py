@@ -22,25 +22,212 @@
 
 Classes
 -------
+.. autoclass:: Headers
+   :members:
 .. autoclass:: RequestProxy
 .. autoclass:: ResponseProxy
 
 """
 
+try:
+    # Python 3.3+
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2.6+
+    from collections import MutableMapping
+
 
 CONTENT_TYPE_FORM_URLENCODED = "application/x-www-form-urlencoded"
 
+
+class Headers(object):
+    """
+    Case-insensitive multi-value HTTP header mapping.
+
+    Header names are lower-cased once when they are added, so every lookup
+    is a single dictionary access. The original spelling of a name is kept
+    for iteration and serialization. Indexing returns the values of a
+    repeated header joined with ``", "``; use :meth:`get_all` to obtain
+    them separately.
+
+    Instances are registered as :class:`collections.MutableMapping` and
+    have its methods, but do not inherit from it: on Python 2 the ABCs
+    declare no ``__slots__``, so every subclass instance would also carry
+    a ``__dict__``.
+
+    :param headers:
+        A dictionary, a :class:`Headers` instance or a sequence of
+        ``(name, value)`` pairs. Dictionary values that are lists or tuples
+        are treated as multiple values for the same header.
+    """
+    __slots__ = ("_map", )
+
+    def __init__(self, headers=None, **kwargs):
+        # lower-cased name -> (name, [value, ...])
+        self._map = {}
+        if headers:
+            self.extend(headers)
+        if kwargs:
+            self.extend(kwargs)
+
+    def extend(self, headers):
+        """
+        Adds all the headers from a dictionary, :class:`Headers` instance or
+        sequence of ``(name, value)`` pairs, keeping existing values.
+        """
+        if isinstance(headers, Headers):
+            items = headers.all_items()
+        elif hasattr(headers, "items"):
+            items = headers.items()
+        else:
+            items = headers
+        for name, value in items:
+            if isinstance(value, (list, tuple)):
+                for v in value:
+                    self.add(name, v)
+            else:
+                self.add(name, value)
+
+    def add(self, name, value):
+        """
+        Adds a value for a header without replacing existing values.
+        """
+        key = name.lower()
+        entry = self._map.get(key)
+        if entry is None:
+            self._map[key] = (name, [value])
+        else:
+            entry[1].append(value)
+
+    def get(self, name, default=None):
+        entry = self._map.get(name.lower())
+        if entry is None:
+            return default
+        values = entry[1]
+        return values[0] if len(values) == 1 else ", ".join(values)
+
+    def get_all(self, name):
+        """
+        Returns a list of all the values of a header; empty if absent.
+        """
+        entry = self._map.get(name.lower())
+        return list(entry[1]) if entry else []
+
+    def all_items(self):
+        """
+        Returns a list of ``(name, value)`` pairs with one pair per value.
+        """
+        return [(name, value)
+                for name, values in self._map.values()
+                for value in values]
+
+    def copy(self):
+        return Headers(self)
+
+    def __getstate__(self):
+        # Wrapped so the state is never empty; copy skips falsy states.
+        return (self.all_items(), )
+
+    def __setstate__(self, state):
+        self._map = {}
+        self.extend(state[0])
+
+    def __getitem__(self, name):
+        values = self._map[name.lower()][1]
+        return values[0] if len(values) == 1 else ", ".join(values)
+
+    def __setitem__(self, name, value):
+        self._map[name.lower()] = (name, [value])
+
+    def __delitem__(self, name):
+        del self._map[name.lower()]
+
+    def __contains__(self, name):
+        return name.lower() in self._map
+
+    def __iter__(self):
+        return (name for name, _ in self._map.values())
+
+    def __len__(self):
+        return len(self._map)
+
+    def __eq__(self, other):
+        if not isinstance(other, Headers):
+            if not hasattr(other, "items"):
+                return NotImplemented
+            other = Headers(other)
+        return dict((k, v[1]) for k, v in self._map.items()) == \
+               dict((k, v[1]) for k, v in other._map.items())
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.all_items())
+
+
+def _add_mapping_methods(cls):
+    """
+    Copies the mixin methods of MutableMapping onto a class and registers
+    it as a virtual subclass. The iter* methods exist on Python 2 only.
+    """
+    for name in ("keys", "items", "values", "iterkeys", "itervalues",
+                 "iteritems", "pop", "popitem", "clear", "update", "setdefault"):
+        for base in MutableMapping.__mro__:
+            if name in base.__dict__:
+                setattr(cls, name, base.__dict__[name])
+                break
+    MutableMapping.register(cls)
+
+_add_mapping_methods(Headers)
+
+
+def _as_headers(headers):
+    # Header maps are shared rather than copied, as plain dictionaries
+    # used to be.
+    if isinstance(headers, Headers):
+        return headers
+    return Headers(headers)
+
+
+def _get_slot_state(obj, cls):
+    """
+    Returns the attributes of a slotted instance as a dictionary, including
+    those set by subclasses that do not declare ``__slots__``.
+    """
+    state = dict((name, getattr(obj, name)) for name in cls.__slots__)
+    state.update(getattr(obj, "__dict__", {}))
+    return state
+
+
+def _set_slot_state(obj, state):
+    for name, value in state.items():
+        setattr(obj, name, value)
+
+
 class RequestProxy(object):
     """Adaptor HTTP Request class.
 
     Framework implementers can subclass this class and must use it with
     the client methods for them to work.
+
+    The body is stored as given; byte strings, ``bytearray`` and
+    ``memoryview`` bodies are never copied.
+
+    Instances use ``__slots__`` so that large numbers of pre-built requests
+    can be queued cheaply. Subclasses that do not declare ``__slots__``
+    get a regular instance dictionary.
     """
+    __slots__ = ("_method", "_url", "_body", "_headers")
+
     def __init__(self, method, url, body=None, headers=None):
         self._method = method.upper()
         self._url = url
         self._body = body
-        self._headers = headers
+        self._headers = _as_headers(headers)
 
     @property
     def method(self):
@@ -69,18 +256,28 @@ class RequestProxy(object):
     def headers(self):
         return self._headers
 
+    def __getstate__(self):
+        return _get_slot_state(self, RequestProxy)
+
+    def __setstate__(self, state):
+        _set_slot_state(self, state)
+
 
 class ResponseProxy(object):
     """Adaptor HTTP Response class.
 
     Framework implementers can subclass this class and must use it with
     the client methods for them to work.
+
+    Instances use ``__slots__``; see :class:`RequestProxy`.
     """
+    __slots__ = ("_body", "_status_message", "_status_code", "_headers")
+
     def __init__(self, status_code, status, body, headers=None):
         self._body = body
         self._status_message = status
         self._status_code = status_code
-        self._headers = headers or {}
+        self._headers = _as_headers(headers)
 
     @property
     def body(self):
@@ -107,16 +304,11 @@ class ResponseProxy(object):
         return self._headers
 
     def get_header(self, name):
-        if name in self.headers:
-            return self.headers[name]
-        elif name.lower() in self.headers:
-            return self.headers[name.lower()]
-        else:
-            header_lowercased = name.lower()
-            for k, v in self.headers.items():
-                if k.lower() == header_lowercased:
-                    return v
-            return None
+        headers = self.headers
+        if not isinstance(headers, Headers):
+            # Subclasses may expose the framework's own header mapping.
+            headers = Headers(headers)
+        return headers.get(name)
 
     @property
     def content_type(self):
@@ -124,3 +316,9 @@ class ResponseProxy(object):
 
     def is_body_form_urlencoded(self):
         return self.content_type == CONTENT_TYPE_FORM_URLENCODED
+
+    def __getstate__(self):
+        return _get_slot_state(self, ResponseProxy)
+
+    def __setstate__(self, state):
+        _set_slot_state(self, state)
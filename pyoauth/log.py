@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Logging without importing logging up front.
+#
+# Copyright (C) 2011 Yesudeep Mangalapilly <yesudeep@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+:module: pyoauth.log
+:synopsis: Logging without importing logging up front.
+
+:mod:`logging` takes a noticeable share of the import time of the
+modules that warn, so they import it only when they emit a warning.
+
+Functions:
+----------
+.. autofunction:: log_warning
+"""
+
+
+def log_warning(*args):
+    """
+    Logs a warning on the root logger; takes the arguments of
+    :func:`logging.warning`.
+    """
+    import logging
+    logging.warning(*args)
@@ -42,7 +42,12 @@ SIGNATURE_METHODS = [
 class Credentials(object):
     """
     Convenience wrapper for a pair of OAuth 1.0 credentials.
+
+    Instances use ``__slots__`` and carry no instance dictionary unless a
+    subclass adds one.
     """
+    __slots__ = ("_identifier", "_shared_secret")
+
     def __init__(self, identifier, shared_secret):
         """
         OAuth Credentials.
@@ -93,6 +98,16 @@ class Credentials(object):
     def __hash__(self):
         return hash(self.key)
 
+    def __getstate__(self):
+        state = dict(_identifier=self._identifier,
+                     _shared_secret=self._shared_secret)
+        state.update(getattr(self, "__dict__", {}))
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __str__(self):
         return self.__repr__()
 
@@ -25,7 +25,10 @@
    :show-inheritance:
 """
 
-import logging
+import mmap
+import tempfile
+
+from pyoauth.crypto.hash import STREAM_BLOCK_SIZE
 from pyoauth.error import IllegalArgumentError, \
     InvalidHttpResponseError, \
     HttpError, \
@@ -33,7 +36,10 @@ from pyoauth.error import IllegalArgumentError, \
     InvalidAuthorizationHeaderError, \
     InvalidContentTypeError, InvalidHttpRequestError
 
-from pyoauth.http import RequestProxy, CONTENT_TYPE_FORM_URLENCODED
+from pyoauth.http import RequestProxy, Headers, CONTENT_TYPE_FORM_URLENCODED
+from pyoauth.log import log_warning
+from pyoauth.types import is_unicode, buffer_types
+from pyoauth.types.unicode import unicode_to_utf8
 from pyoauth.oauth1 import \
     Credentials, \
     SIGNATURE_METHOD_HMAC_SHA1, \
@@ -46,14 +52,22 @@ from pyoauth.url import \
     url_add_query, \
     url_append_query, \
     parse_qs, query_append, is_valid_callback_url
-from pyoauth.protocol import generate_nonce, \
-    generate_timestamp, \
+from pyoauth.protocol import NonceGenerator, \
+    TimestampSource, \
+    generate_body_hash, \
     generate_hmac_sha1_signature, \
     generate_rsa_sha1_signature, \
     generate_plaintext_signature, \
     generate_normalized_authorization_header_value
 
 
+# 64-bit decimal nonces, as generate_nonce() makes, handed out from blocks.
+_NONCES = NonceGenerator()
+
+# Default Content-Type of entity-bodies signed with ``oauth_body_hash``.
+CONTENT_TYPE_OCTET_STREAM = "application/octet-stream"
+
+
 SIGNATURE_METHOD_MAP = {
     SIGNATURE_METHOD_HMAC_SHA1: generate_hmac_sha1_signature,
     SIGNATURE_METHOD_RSA_SHA1: generate_rsa_sha1_signature,
@@ -118,6 +132,13 @@ class Client(object):
         certain services like Yahoo! use ``&`` instead. Comma is default.
 
             See https://github.com/oauth/oauth-ruby/pull/12
+    :param timestamp_source:
+        An instance of :class:`pyoauth.protocol.TimestampSource` that
+        generates ``oauth_timestamp`` values. Each client gets its own by
+        default. Credentials responses passed to the ``parse_*`` methods
+        correct it for the provider's clock skew; pass resource responses
+        to :meth:`TimestampSource.observe` as well when the clocks of the
+        resource hosts may differ.
 
     """
     def __init__(self,
@@ -127,7 +148,8 @@ class Client(object):
                  resource_owner_authorization_uri,
                  resource_owner_authentication_uri=None,
                  use_authorization_header=True,
-                 authorization_header_param_delimiter=","):
+                 authorization_header_param_delimiter=",",
+                 timestamp_source=None):
         """
         Creates an instance of an OAuth 1.0 client.
         """
@@ -149,6 +171,12 @@ class Client(object):
             self._resource_owner_authentication_uri = ""
         self._use_authorization_header = use_authorization_header
         self._authorization_header_param_delimiter = authorization_header_param_delimiter
+        self._timestamp_source = timestamp_source or TimestampSource()
+
+    @property
+    def timestamp_source(self):
+        """The :class:`pyoauth.protocol.TimestampSource` used by this client."""
+        return self._timestamp_source
 
     @property
     def oauth_version(self):
@@ -321,6 +349,7 @@ class Client(object):
                                headers=None,
                                realm=None,
                                oauth_signature_method=SIGNATURE_METHOD_HMAC_SHA1,
+                               body=None,
                                **extra_oauth_params):
         """
         Builds an OAuth request instance for token credentials from the OAuth
@@ -351,6 +380,9 @@ class Client(object):
             1. :attr:`pyoauth.oauth1.SIGNATURE_METHOD_HMAC_SHA1`
             2. :attr:`pyoauth.oauth1.SIGNATURE_METHOD_RSA_SHA1`
             3. :attr:`pyoauth.oauth1.SIGNATURE_METHOD_PLAINTEXT`
+        :param body:
+            Optional entity-body that is not form URL-encoded, for example
+            JSON, XML or a file upload. See :meth:`_build_request`.
         :param extra_oauth_params:
             Any additional oauth parameters you would like to include.
             The parameter names must begin with ``oauth_``. Any other parameters
@@ -363,6 +395,7 @@ class Client(object):
 
         return self._build_request(method=method,
                                    url=url,
+                                   body=body,
                                    payload_params=payload_params,
                                    headers=headers,
                                    realm=realm,
@@ -397,6 +430,9 @@ class Client(object):
         Parses the entity-body of the OAuth server response to an OAuth
         temporary credentials request.
 
+        The response's ``Date`` header, even on an error response, first
+        corrects :attr:`timestamp_source` for the provider's clock skew.
+
         :param response:
             An instance of :class:`pyoauth.http.ResponseProxy`.
         :returns:
@@ -404,6 +440,7 @@ class Client(object):
 
                 (parameter dictionary, pyoauth.oauth1.Credentials instance)
         """
+        self._timestamp_source.observe(self._temporary_credentials_request_uri, response)
         params, credentials = self._parse_credentials_response(response)
         callback_confirmed = params.get("oauth_callback_confirmed", [""])[0].lower()
         if callback_confirmed != "true":
@@ -415,6 +452,9 @@ class Client(object):
         Parses the entity-body of the OAuth server response to an OAuth
         token credentials request.
 
+        The response's ``Date`` header, even on an error response, first
+        corrects :attr:`timestamp_source` for the provider's clock skew.
+
         :param response:
             An instance of :class:`pyoauth.http.ResponseProxy`.
         :returns:
@@ -422,6 +462,7 @@ class Client(object):
 
                 (parameter dictionary, pyoauth.oauth1.Credentials instance)
         """
+        self._timestamp_source.observe(self._token_credentials_request_uri, response)
         return self._parse_credentials_response(response)
 
     def _parse_credentials_response(self, response):
@@ -463,6 +504,7 @@ class Client(object):
                       token_or_temporary_credentials=None,
                       realm=None,
                       oauth_signature_method=SIGNATURE_METHOD_HMAC_SHA1,
+                      body=None,
                       **extra_oauth_params):
         """
         Builds an OAuth request.
@@ -488,6 +530,21 @@ class Client(object):
             1. :attr:`pyoauth.oauth1.SIGNATURE_METHOD_HMAC_SHA1`
             2. :attr:`pyoauth.oauth1.SIGNATURE_METHOD_RSA_SHA1`
             3. :attr:`pyoauth.oauth1.SIGNATURE_METHOD_PLAINTEXT`
+        :param body:
+            Optional entity-body that is not form URL-encoded: a byte or
+            Unicode string, a buffer or memory map, a file object or an
+            iterable of byte string chunks. The body is signed with the
+            ``oauth_body_hash`` extension: only its SHA-1, computed a block
+            at a time, becomes part of the signature. Payload parameters and,
+            without the Authorization header, OAuth parameters go into the
+            URL query string. The Content-Type header defaults to
+            ``application/octet-stream`` and must not be form URL-encoded.
+
+            Seekable file objects are sent from their current position.
+            Iterators and non-seekable streams are first spooled to a
+            temporary file, which is kept in memory only while small.
+
+            See http://oauth.googlecode.com/svn/spec/ext/body_hash/1.0/oauth-bodyhash.html
         :param extra_oauth_params:
             Any additional oauth parameters you would like to include.
             The parameter names must begin with ``oauth_``. Any other parameters
@@ -496,9 +553,17 @@ class Client(object):
             An instance of :class:`pyoauth.http.Request`.
         """
         method = method.upper()
-        headers = headers or {}
+        headers = Headers(headers)
         realm = realm or ""
 
+        if body is not None:
+            content_type = headers.get("Content-Type")
+            if content_type is None:
+                headers["Content-Type"] = CONTENT_TYPE_OCTET_STREAM
+            elif content_type.split(";")[0].strip().lower() == CONTENT_TYPE_FORM_URLENCODED:
+                raise IllegalArgumentError("Form URL-encoded entity-bodies must be given as `payload_params`.")
+            body = _rewindable_body(body)
+
         if oauth_signature_method not in SIGNATURE_METHOD_MAP:
             raise InvalidSignatureMethodError("Invalid signature method specified: `%r`" % (oauth_signature_method,))
 
@@ -507,12 +572,14 @@ class Client(object):
         oauth_params = dict(
             oauth_consumer_key=self._client_credentials.identifier,
             oauth_signature_method=oauth_signature_method,
-            oauth_timestamp=generate_timestamp(),
-            oauth_nonce=generate_nonce(),
+            oauth_timestamp=self._timestamp_source.timestamp(url),
+            oauth_nonce=_NONCES.generate(),
             oauth_version=self.oauth_version,
         )
         if token_or_temporary_credentials:
             oauth_params["oauth_token"] = token_or_temporary_credentials.identifier
+        if body is not None:
+            oauth_params["oauth_body_hash"] = generate_body_hash(body)
 
         if "_test_force_exclude_oauth_version" in extra_oauth_params:
             del oauth_params["oauth_version"]
@@ -527,6 +594,7 @@ class Client(object):
             "oauth_consumer_key",  # Provided when creating the client instance.
             "oauth_version",       # Optional but MUST be set to "1.0" according to spec.
             "oauth_token",         # Determined from the token or temporary credentials.
+            "oauth_body_hash",     # Calculated from the entity-body.
         )
         for k, v in extra_oauth_params.items():
             if not _force_override_reserved_oauth_params_for_tests and k in reserved_oauth_params:
@@ -536,8 +604,8 @@ class Client(object):
                 if k in oauth_params:
                     # Warn when an existing protocol parameter is being
                     # overridden.
-                    logging.warning("Overriding existing protocol parameter `%r`=`%r` with `%r`=`%r`",
-                                    k, oauth_params[k], k, v[0])
+                    log_warning("Overriding existing protocol parameter `%r`=`%r` with `%r`=`%r`",
+                                k, oauth_params[k], k, v[0])
                 oauth_params[k] = v[0]
 
         # Filter payload parameters for the request.
@@ -587,10 +655,10 @@ class Client(object):
             # included multiple times in a request below.
             oauth_params = None
 
-        if method == "GET":
+        if method == "GET" or body is not None:
             request_url = url_add_query(url, payload_params)
             request_url = url_append_query(request_url, oauth_params)
-            payload = ""
+            payload = "" if body is None else body
         else:
             # The payload params are not appended to the OAuth request URL
             # in this case but added to the payload instead.
@@ -615,3 +683,30 @@ class Client(object):
         return sign_func(self._client_credentials.shared_secret,
                          method, url, oauth_params,
                          credentials_shared_secret)
+
+
+def _rewindable_body(body):
+    """
+    Returns an entity-body that can be hashed and then sent.
+
+    Strings, buffers, memory maps and seekable file objects are returned
+    as they are (Unicode strings as UTF-8). Iterators and non-seekable
+    streams are copied into a spooled temporary file.
+    """
+    if is_unicode(body):
+        return unicode_to_utf8(body)
+    if isinstance(body, (bytes, mmap.mmap) + buffer_types):
+        return body
+    if hasattr(body, "read"):
+        try:
+            body.tell()
+            return body
+        except (AttributeError, IOError, OSError):
+            chunks = iter(lambda: body.read(STREAM_BLOCK_SIZE), b"")
+    else:
+        chunks = body
+    spool = tempfile.SpooledTemporaryFile(max_size=STREAM_BLOCK_SIZE)
+    for chunk in chunks:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
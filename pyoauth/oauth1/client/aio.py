@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# asyncio front end for OAuth 1.0 clients.
+#
+# Copyright (C) 2011 Yesudeep Mangalapilly <yesudeep@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+:module: pyoauth.oauth1.client.aio
+:synopsis: asyncio front end for OAuth 1.0 clients.
+
+.. autoclass:: AsyncClient
+   :members:
+"""
+
+from pyoauth.aio import StreamTransport, chain_future
+
+
+class AsyncClient(object):
+    """
+    Executes the requests built by an OAuth 1.0 client over an
+    asynchronous transport.
+
+    Every ``fetch_*`` method returns an :class:`asyncio.Future`.
+
+    Usage::
+
+        client = AsyncClient(TwitterClient(client_credentials))
+        params, temporary_credentials = \\
+            yield From(client.fetch_temporary_credentials(oauth_callback=url))
+        redirect_to(client.get_authorization_url(temporary_credentials))
+
+        # ... in the callback handler:
+        oauth_verifier = client.check_verification_code(
+            temporary_credentials, oauth_token, oauth_verifier)
+        params, token_credentials = \\
+            yield From(client.fetch_token_credentials(temporary_credentials,
+                                                      oauth_verifier))
+        response = yield From(client.fetch_resource(token_credentials,
+                                                    "GET", url))
+
+    :param client:
+        An instance of :class:`pyoauth.oauth1.client.Client` or any of
+        its provider-specific subclasses.
+    :param transport:
+        An instance of :class:`pyoauth.aio.AsyncTransport`. A pooled
+        :class:`pyoauth.aio.StreamTransport` is created by default.
+    :param loop:
+        The event loop to use with the default transport.
+    """
+    def __init__(self, client, transport=None, loop=None):
+        self._client = client
+        self._loop = loop
+        self._transport = transport or StreamTransport(loop=loop)
+
+    @property
+    def client(self):
+        return self._client
+
+    @property
+    def transport(self):
+        return self._transport
+
+    def fetch_temporary_credentials(self, *args, **kwargs):
+        """
+        Requests temporary credentials.
+
+        Accepts the arguments of
+        :meth:`pyoauth.oauth1.client.Client.build_temporary_credentials_request`.
+
+        :returns:
+            A future that resolves to a tuple of the form::
+
+                (parameter dictionary, pyoauth.oauth1.Credentials instance)
+        """
+        request = self._client.build_temporary_credentials_request(*args, **kwargs)
+        return chain_future(self._transport.fetch(request),
+                            self._client.parse_temporary_credentials_response,
+                            loop=self._loop)
+
+    def get_authorization_url(self, temporary_credentials, **query_params):
+        """
+        See :meth:`pyoauth.oauth1.client.Client.get_authorization_url`.
+        """
+        return self._client.get_authorization_url(temporary_credentials,
+                                                  **query_params)
+
+    def get_authentication_url(self, temporary_credentials, **query_params):
+        """
+        See :meth:`pyoauth.oauth1.client.Client.get_authentication_url`.
+        """
+        return self._client.get_authentication_url(temporary_credentials,
+                                                   **query_params)
+
+    def check_verification_code(self, temporary_credentials, oauth_token, oauth_verifier):
+        """
+        See :meth:`pyoauth.oauth1.client.Client.check_verification_code`.
+        """
+        return self._client.check_verification_code(temporary_credentials,
+                                                    oauth_token,
+                                                    oauth_verifier)
+
+    def fetch_token_credentials(self, temporary_credentials, oauth_verifier,
+                                *args, **kwargs):
+        """
+        Exchanges temporary credentials for token credentials.
+
+        Accepts the arguments of
+        :meth:`pyoauth.oauth1.client.Client.build_token_credentials_request`.
+
+        :returns:
+            A future that resolves to a tuple of the form::
+
+                (parameter dictionary, pyoauth.oauth1.Credentials instance)
+        """
+        request = self._client.build_token_credentials_request(
+            temporary_credentials, oauth_verifier, *args, **kwargs)
+        return chain_future(self._transport.fetch(request),
+                            self._client.parse_token_credentials_response,
+                            loop=self._loop)
+
+    def fetch_resource(self, token_credentials, method, url, *args, **kwargs):
+        """
+        Requests a protected resource.
+
+        Accepts the arguments of
+        :meth:`pyoauth.oauth1.client.Client.build_resource_request`.
+
+        The response's ``Date`` header corrects the client's
+        :attr:`~pyoauth.oauth1.client.Client.timestamp_source` for the
+        resource host's clock skew.
+
+        :returns:
+            A future that resolves to an instance of
+            :class:`pyoauth.http.ResponseProxy`.
+        """
+        request = self._client.build_resource_request(
+            token_credentials, method, url, *args, **kwargs)
+        timestamp_source = self._client.timestamp_source
+
+        def observe(response):
+            timestamp_source.observe(url, response)
+            return response
+        return chain_future(self._transport.fetch(request), observe,
+                            loop=self._loop)
+
+    def close(self):
+        """
+        Closes the underlying transport.
+        """
+        self._transport.close()
@@ -0,0 +1,489 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Rate-limit-aware request scheduling for OAuth 1.0 clients.
+#
+# Copyright (C) 2011 Yesudeep Mangalapilly <yesudeep@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+:module: pyoauth.oauth1.client.scheduler
+:synopsis: Rate-limit-aware request scheduling for OAuth 1.0 clients.
+
+Providers limit how many requests each token may make to each endpoint
+in a time window and answer with ``429 Too Many Requests`` or ``503``
+once the budget is spent. A :class:`RequestScheduler` queues resource
+requests unsigned, sends each one only when its budgets allow it and
+signs it right before sending, so the timestamp and nonce are fresh and
+no signed round trip is wasted on a request the provider would refuse.
+
+Usage::
+
+    scheduler = RequestScheduler(TwitterClient(client_credentials),
+                                 HttpTransport())
+    for token_credentials in users:
+        scheduler.submit(token_credentials, "GET", home_timeline_url)
+    for scheduled in scheduler.run():
+        handle(scheduled.response)
+
+Budgets are tracked per ``(token, endpoint)``, where the endpoint of a
+request is its lowercase host name followed by its path, for example
+``api.twitter.com/1/statuses/home_timeline.json``. They are learned from
+``X-RateLimit-Limit``, ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``
+response headers (also with the ``X-Rate-Limit-`` prefix) and from
+``Retry-After``, or configured up front as quotas.
+
+Classes
+-------
+.. autoclass:: RequestScheduler
+   :members:
+.. autoclass:: ScheduledRequest
+   :members:
+.. autoclass:: RateLimiter
+   :members:
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+try:
+    # Python 2.5+
+    from urlparse import urlparse
+except ImportError:
+    # Python 3.
+    from urllib.parse import urlparse
+
+from pyoauth.oauth1.client import _rewindable_body
+
+
+# Status codes that mean "rate limited; try again later".
+RETRY_STATUS_CODES = (429, 503)
+
+_HEADER_PREFIXES = ("X-RateLimit-", "X-Rate-Limit-")
+
+# Reset values below this are seconds from now rather than epoch times.
+_MAX_RESET_DELTA = 10 ** 8
+
+
+def request_endpoint(url):
+    """
+    Returns the endpoint key of a URL used to track rate-limit budgets:
+    the lowercase host name followed by the path.
+
+    :param url:
+        Request URL.
+    """
+    parts = urlparse(url)
+    return (parts.hostname or "") + (parts.path or "/")
+
+
+class _Budget(object):
+    """
+    A fixed-window request budget. ``remaining`` is ``None`` while
+    unknown.
+    """
+    __slots__ = ("limit", "remaining", "reset_at", "window")
+
+    def __init__(self, limit=None, window=None):
+        self.limit = limit
+        self.remaining = limit
+        self.window = window
+        self.reset_at = None
+
+    def refresh(self, now):
+        if self.reset_at is not None and now >= self.reset_at:
+            if self.window:
+                self.remaining = self.limit
+                self.reset_at = now + self.window
+            else:
+                # The provider has not said how long its next window is.
+                self.remaining = None
+                self.reset_at = None
+
+    def wait_time(self, now):
+        self.refresh(now)
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at is not None:
+            return self.reset_at - now
+        return 0
+
+    def consume(self, now):
+        self.refresh(now)
+        if self.window and self.reset_at is None:
+            self.reset_at = now + self.window
+        if self.remaining is not None:
+            self.remaining -= 1
+
+
+class RateLimiter(object):
+    """
+    Request budgets per token and per endpoint.
+
+    Thread-safe.
+
+    :param quotas:
+        Optional dictionary mapping endpoints (see :func:`request_endpoint`)
+        to ``(limit, window in seconds)`` tuples that apply to each token
+        separately.
+    :param endpoint_quotas:
+        Like ``quotas``, but shared by all tokens, as for application-wide
+        limits.
+    :param clock:
+        Function returning the local time in seconds. Default
+        :func:`time.time`.
+    """
+    def __init__(self, quotas=None, endpoint_quotas=None, clock=time.time):
+        self._quotas = dict(quotas or {})
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._budgets = {}
+        for endpoint, (limit, window) in (endpoint_quotas or {}).items():
+            self._budgets[(None, endpoint)] = _Budget(limit, window)
+
+    def wait_time(self, token, endpoint):
+        """
+        Returns the number of seconds until a request for ``endpoint`` with
+        ``token`` fits all budgets; ``0`` when it can be sent now.
+
+        :param token:
+            Token identifier, or ``None``.
+        :param endpoint:
+            Endpoint key.
+        """
+        now = self._clock()
+        with self._lock:
+            return max(budget.wait_time(now) for budget in self._budgets_for(token, endpoint))
+
+    def consume(self, token, endpoint):
+        """
+        Spends one request from every budget that applies.
+
+        :param token:
+            Token identifier, or ``None``.
+        :param endpoint:
+            Endpoint key.
+        """
+        now = self._clock()
+        with self._lock:
+            for budget in self._budgets_for(token, endpoint):
+                budget.consume(now)
+
+    def observe(self, token, endpoint, response, skew=0):
+        """
+        Updates the budget of ``(token, endpoint)`` from response headers.
+
+        :param token:
+            Token identifier, or ``None``.
+        :param endpoint:
+            Endpoint key.
+        :param response:
+            An instance of :class:`pyoauth.http.ResponseProxy`.
+        :param skew:
+            Seconds the provider's clock is ahead of the local clock, used
+            to convert absolute reset times. See
+            :meth:`pyoauth.protocol.TimestampSource.skew`.
+        :returns:
+            ``True`` if the response carried rate-limit information.
+        """
+        now = self._clock()
+        limit = _int_header(response, "Limit")
+        remaining = _int_header(response, "Remaining")
+        reset = _int_header(response, "Reset")
+        retry_after = _retry_after(response, now + skew)
+        if limit is None and remaining is None and retry_after is None:
+            return False
+        with self._lock:
+            budget = self._budgets_for(token, endpoint)[0]
+            if limit is not None:
+                budget.limit = limit
+            if remaining is not None:
+                budget.remaining = remaining
+            if reset is not None:
+                budget.reset_at = reset + now if reset < _MAX_RESET_DELTA else reset - skew
+            if retry_after is not None:
+                budget.remaining = 0
+                if reset is None:
+                    # Reset times are exact; Retry-After is rounded up.
+                    budget.reset_at = now + retry_after
+        return True
+
+    def budgets(self):
+        """
+        Returns a snapshot of the known budgets.
+
+        :returns:
+            A dictionary mapping ``(token, endpoint)`` tuples (``token`` is
+            ``None`` for endpoint-wide budgets) to dictionaries with the
+            keys ``limit``, ``remaining`` and ``reset_at``.
+        """
+        now = self._clock()
+        with self._lock:
+            snapshot = {}
+            for key, budget in self._budgets.items():
+                budget.refresh(now)
+                snapshot[key] = dict(limit=budget.limit,
+                                     remaining=budget.remaining,
+                                     reset_at=budget.reset_at)
+            return snapshot
+
+    def _budgets_for(self, token, endpoint):
+        key = (token, endpoint)
+        budget = self._budgets.get(key)
+        if budget is None:
+            budget = self._budgets[key] = _Budget(*self._quotas.get(endpoint, (None, None)))
+        budgets = [budget]
+        shared = self._budgets.get((None, endpoint))
+        if shared is not None and shared is not budget:
+            budgets.append(shared)
+        return budgets
+
+
+def _int_header(response, name):
+    for prefix in _HEADER_PREFIXES:
+        value = response.get_header(prefix + name)
+        if value is not None:
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _retry_after(response, server_now):
+    value = response.get_header("Retry-After")
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    # email.utils imports socket and ssl on Python 2.
+    from email.utils import parsedate_tz, mktime_tz
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0, mktime_tz(parsed) - server_now)
+
+
+class ScheduledRequest(object):
+    """
+    A resource request queued with :meth:`RequestScheduler.submit`.
+
+    The request is built and signed only when it is sent; :attr:`request`
+    is the last :class:`pyoauth.http.RequestProxy` sent for it.
+    """
+    __slots__ = ("token_credentials", "method", "url", "kwargs", "priority",
+                 "sequence", "endpoint", "attempts", "not_before", "request",
+                 "response", "error", "_body_position")
+
+    def __init__(self, token_credentials, method, url, kwargs, priority, sequence):
+        self.token_credentials = token_credentials
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.priority = priority
+        self.sequence = sequence
+        self.endpoint = request_endpoint(url)
+        self.attempts = 0
+        self.not_before = 0
+        self.request = None
+        self.response = None
+        self.error = None
+        body = kwargs.get("body")
+        self._body_position = body.tell() if hasattr(body, "seek") else None
+
+    @property
+    def token(self):
+        """The token identifier, or ``None``."""
+        return self.token_credentials.identifier if self.token_credentials else None
+
+    @property
+    def done(self):
+        """``True`` once a final response or an error is available."""
+        return self.response is not None or self.error is not None
+
+
+class RequestScheduler(object):
+    """
+    Queues resource requests and sends them through a transport as their
+    rate-limit budgets allow.
+
+    Requests are sent in priority order, then in the order submitted,
+    except that a request whose budget is spent does not hold up requests
+    for other tokens or endpoints. Rate-limited responses are retried
+    once the provider's ``Retry-After`` or reset time has passed. Every
+    response also updates the client's
+    :attr:`~pyoauth.oauth1.client.Client.timestamp_source`.
+
+    Not thread-safe: call :meth:`submit` and :meth:`run` from one thread.
+
+    :param client:
+        An instance of :class:`pyoauth.oauth1.client.Client` or any of
+        its provider-specific subclasses.
+    :param transport:
+        An object with an ``execute(request)`` method returning a
+        :class:`pyoauth.http.ResponseProxy`, such as
+        :class:`pyoauth.transport.HttpTransport`.
+    :param limiter:
+        An instance of :class:`RateLimiter`. A new one without quotas is
+        created by default.
+    :param max_attempts:
+        Maximum number of times a request is sent. Default 3.
+    :param retry_delay:
+        Seconds to wait before retrying a rate-limited response that does
+        not say when to retry; doubled for each further attempt.
+        Default 1.
+    :param clock:
+        Function returning the local time in seconds. Default
+        :func:`time.time`.
+    :param sleep:
+        Function that sleeps for a number of seconds. Default
+        :func:`time.sleep`.
+    """
+    def __init__(self, client, transport, limiter=None, max_attempts=3,
+                 retry_delay=1.0, clock=time.time, sleep=time.sleep):
+        self._client = client
+        self._transport = transport
+        self._clock = clock
+        self._limiter = limiter or RateLimiter(clock=clock)
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._sleep = sleep
+        # A heap of (-priority, sequence, request) per (token, endpoint).
+        self._queues = {}
+        self._sequence = itertools.count()
+        self._pending = 0
+
+    @property
+    def limiter(self):
+        return self._limiter
+
+    def __len__(self):
+        return self._pending
+
+    def submit(self, token_credentials, method, url, priority=0, **kwargs):
+        """
+        Queues a resource request without building or signing it.
+
+        :param token_credentials:
+            Token credentials, as for
+            :meth:`pyoauth.oauth1.client.Client.build_resource_request`.
+        :param method:
+            HTTP method.
+        :param url:
+            Resource URL.
+        :param priority:
+            Requests with higher priorities are sent first. Default 0.
+        :param kwargs:
+            Further arguments of
+            :meth:`pyoauth.oauth1.client.Client.build_resource_request`.
+            A ``body`` iterator or non-seekable stream is spooled to a
+            temporary file here, so that retries send it again.
+        :returns:
+            An instance of :class:`ScheduledRequest`.
+        """
+        if kwargs.get("body") is not None:
+            kwargs["body"] = _rewindable_body(kwargs["body"])
+        scheduled = ScheduledRequest(token_credentials, method, url, kwargs,
+                                     priority, next(self._sequence))
+        self._enqueue(scheduled)
+        return scheduled
+
+    def step(self):
+        """
+        Sends the next request if one can be sent now.
+
+        :returns:
+            ``(scheduled request, 0)`` after sending a request, or
+            ``(None, seconds)`` with the time until a queued request can
+            be sent. ``seconds`` is ``None`` when the queue is empty.
+        """
+        now = self._clock()
+        best = None
+        wait = None
+        for key, queue in self._queues.items():
+            _, _, head = queue[0]
+            delay = max(head.not_before - now,
+                        self._limiter.wait_time(head.token, head.endpoint), 0)
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+            elif best is None or queue[0] < self._queues[best][0]:
+                best = key
+        if best is None:
+            return None, wait
+
+        queue = self._queues[best]
+        _, _, scheduled = heapq.heappop(queue)
+        if not queue:
+            del self._queues[best]
+        self._pending -= 1
+        self._send(scheduled)
+        if not scheduled.done:
+            self._enqueue(scheduled)
+        return scheduled, 0
+
+    def run(self):
+        """
+        Sends queued requests, sleeping while every budget is spent, until
+        the queue is empty.
+
+        :returns:
+            The completed :class:`ScheduledRequest` objects in the order
+            they completed.
+        """
+        completed = []
+        while True:
+            scheduled, wait = self.step()
+            if scheduled is not None:
+                if scheduled.done:
+                    completed.append(scheduled)
+            elif wait is None:
+                return completed
+            else:
+                self._sleep(wait)
+
+    def _enqueue(self, scheduled):
+        key = (scheduled.token, scheduled.endpoint)
+        queue = self._queues.setdefault(key, [])
+        # Retried requests keep their place in line.
+        heapq.heappush(queue, (-scheduled.priority, scheduled.sequence, scheduled))
+        self._pending += 1
+
+    def _send(self, scheduled):
+        # Sign just before sending so that the timestamp and nonce are fresh.
+        scheduled.attempts += 1
+        self._limiter.consume(scheduled.token, scheduled.endpoint)
+        if scheduled._body_position is not None:
+            # Every attempt sends the body from where it started.
+            scheduled.kwargs["body"].seek(scheduled._body_position)
+        try:
+            scheduled.request = self._client.build_resource_request(
+                scheduled.token_credentials, scheduled.method, scheduled.url,
+                **scheduled.kwargs)
+            response = self._transport.execute(scheduled.request)
+        except Exception as e:
+            scheduled.error = e
+            return
+
+        timestamp_source = self._client.timestamp_source
+        timestamp_source.observe(scheduled.url, response)
+        self._limiter.observe(scheduled.token, scheduled.endpoint, response,
+                              timestamp_source.skew(scheduled.url))
+        if response.status_code in RETRY_STATUS_CODES and \
+           scheduled.attempts < self._max_attempts:
+            if not self._limiter.wait_time(scheduled.token, scheduled.endpoint):
+                # The provider did not say when to retry; back off.
+                scheduled.not_before = self._clock() + \
+                    self._retry_delay * (2 ** (scheduled.attempts - 1))
+            return
+        scheduled.response = response
@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Temporary credentials stores for the three-legged flow.
+#
+# Copyright (C) 2011 Yesudeep Mangalapilly <yesudeep@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+:module: pyoauth.oauth1.client.store
+:synopsis: Temporary credentials stores for the three-legged flow.
+
+Temporary credentials must be kept from the moment they are obtained
+until the provider redirects the resource owner back to the callback
+URL. Both stores here key them by ``oauth_token``, expire them after a
+time-to-live and hand each one out only once.
+
+Usage::
+
+    store = TemporaryCredentialsStore(ttl=3600)
+
+    # Before redirecting the resource owner to the provider:
+    params, temporary_credentials = \\
+        client.parse_temporary_credentials_response(response)
+    store.put(temporary_credentials)
+    redirect_to(client.get_authorization_url(temporary_credentials))
+
+    # In the callback handler:
+    temporary_credentials = store.pop(oauth_token)
+    if temporary_credentials is None:
+        ...  # Unknown, expired or already used.
+    oauth_verifier = client.check_verification_code(
+        temporary_credentials, oauth_token, oauth_verifier)
+
+Use :class:`SQLiteTemporaryCredentialsStore` when the callback may be
+handled by another worker process than the one that started the flow.
+
+Classes
+-------
+.. autoclass:: TemporaryCredentialsStore
+   :members:
+.. autoclass:: SQLiteTemporaryCredentialsStore
+   :members:
+"""
+
+import os
+import threading
+import time
+
+from pyoauth.oauth1 import Credentials
+
+
+class _Entry(object):
+    """
+    A node in the store's doubly-linked recency list.
+    """
+    __slots__ = ("previous", "next", "token", "shared_secret", "expires_at")
+
+
+class TemporaryCredentialsStore(object):
+    """
+    In-memory temporary credentials store with TTL expiry and LRU
+    eviction.
+
+    Insertion, lookup and removal take constant time. Only the
+    ``oauth_token``, shared secret and expiry time of each entry are
+    kept, in one small slotted object; ``get`` and ``pop`` return new
+    :class:`pyoauth.oauth1.Credentials`.
+
+    Thread-safe.
+
+    :param max_size:
+        Maximum number of entries. When full, the least recently used
+        entry is evicted. Default 100000.
+    :param ttl:
+        Default seconds an entry stays valid. Providers typically let
+        temporary credentials live for an hour or less. Default 3600.
+    :param clock:
+        Function returning the current time in seconds. Default
+        :func:`time.time`.
+    """
+    def __init__(self, max_size=100000, ttl=3600, clock=time.time):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive: got `%r`." % (max_size, ))
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Circular list through a sentinel; least recently used first.
+        # A hand-made list takes about half the memory of an OrderedDict
+        # entry on Python 2.
+        root = self._root = _Entry()
+        root.previous = root.next = root
+        self._evicted = 0
+        self._expired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, oauth_token):
+        return self.get(oauth_token) is not None
+
+    def put(self, temporary_credentials, ttl=None):
+        """
+        Stores temporary credentials under their identifier.
+
+        :param temporary_credentials:
+            An instance of :class:`pyoauth.oauth1.Credentials`.
+        :param ttl:
+            Seconds the entry stays valid. Defaults to the store's TTL.
+        """
+        token = temporary_credentials.identifier
+        entry = _Entry()
+        entry.token = token
+        entry.shared_secret = temporary_credentials.shared_secret
+        entry.expires_at = self._clock() + (self._ttl if ttl is None else ttl)
+        with self._lock:
+            old = self._entries.pop(token, None)
+            if old is not None:
+                self._unlink(old)
+            self._entries[token] = entry
+            self._append(entry)
+            while len(self._entries) > self._max_size:
+                oldest = self._root.next
+                self._unlink(oldest)
+                del self._entries[oldest.token]
+                self._evicted += 1
+
+    def get(self, oauth_token, default=None):
+        """
+        Looks up temporary credentials and moves them to the most
+        recently used end of the eviction list. Expired entries are
+        removed.
+
+        :param oauth_token:
+            The ``oauth_token`` value from the callback query string.
+        :param default:
+            Returned when the token is unknown or has expired.
+        :returns:
+            An instance of :class:`pyoauth.oauth1.Credentials`.
+        """
+        with self._lock:
+            entry = self._entries.get(oauth_token)
+            if entry is None:
+                return default
+            self._unlink(entry)
+            if entry.expires_at <= self._clock():
+                del self._entries[oauth_token]
+                self._expired += 1
+                return default
+            self._append(entry)
+        return Credentials(oauth_token, entry.shared_secret)
+
+    def pop(self, oauth_token, default=None):
+        """
+        Removes and returns temporary credentials. Use this in the
+        callback handler so that each ``oauth_token`` is accepted once.
+
+        :param oauth_token:
+            The ``oauth_token`` value from the callback query string.
+        :param default:
+            Returned when the token is unknown or has expired.
+        :returns:
+            An instance of :class:`pyoauth.oauth1.Credentials`.
+        """
+        with self._lock:
+            entry = self._entries.pop(oauth_token, None)
+            if entry is None:
+                return default
+            self._unlink(entry)
+            if entry.expires_at <= self._clock():
+                self._expired += 1
+                return default
+        return Credentials(oauth_token, entry.shared_secret)
+
+    def purge_expired(self):
+        """
+        Removes every expired entry. Expired entries are never returned,
+        so this only frees memory early; it scans the whole store.
+
+        :returns:
+            The number of entries removed.
+        """
+        now = self._clock()
+        with self._lock:
+            expired = [entry for entry in self._entries.values()
+                       if entry.expires_at <= now]
+            for entry in expired:
+                self._unlink(entry)
+                del self._entries[entry.token]
+            self._expired += len(expired)
+            return len(expired)
+
+    def metrics(self):
+        """
+        Returns a dictionary with the keys ``size``, ``max_size``,
+        ``evicted`` (entries dropped to stay within ``max_size``) and
+        ``expired`` (expired entries removed).
+        """
+        with self._lock:
+            return dict(size=len(self._entries), max_size=self._max_size,
+                        evicted=self._evicted, expired=self._expired)
+
+    def _append(self, entry):
+        root = self._root
+        last = root.previous
+        entry.previous = last
+        entry.next = root
+        last.next = root.previous = entry
+
+    def _unlink(self, entry):
+        entry.previous.next = entry.next
+        entry.next.previous = entry.previous
+        entry.previous = entry.next = None
+
+
+class SQLiteTemporaryCredentialsStore(object):
+    """
+    Temporary credentials store in an SQLite database, shared by every
+    process that opens the same file.
+
+    The database uses write-ahead logging, so lookups in one process do
+    not wait for writes in another. :meth:`get` records when an entry was
+    last used at most once every ``touch_interval`` seconds per entry;
+    other lookups only read. Each thread, and each process after a
+    ``fork()``, opens its own connection. :meth:`pop` deletes the row it
+    returns, so only one worker can complete a given flow.
+
+    Expired rows are deleted, and the least recently used rows beyond
+    ``max_size`` evicted, every ``maintenance_interval`` calls to
+    :meth:`put` on a connection and by :meth:`purge_expired`, so the
+    table may briefly exceed ``max_size``.
+
+    :param path:
+        Database file path. Created if needed.
+    :param max_size:
+        Maximum number of entries. Default 1000000.
+    :param ttl:
+        Default seconds an entry stays valid. Default 3600.
+    :param maintenance_interval:
+        Number of :meth:`put` calls on a connection between clean-ups.
+        Default 1000.
+    :param touch_interval:
+        Seconds within which repeated lookups of an entry do not update
+        its last-used time, so eviction order is accurate to about this
+        much. Default 60.
+    :param timeout:
+        Seconds to wait for another process's write lock. Default 5.
+    :param clock:
+        Function returning the current time in seconds. Default
+        :func:`time.time`.
+    """
+    def __init__(self, path, max_size=1000000, ttl=3600,
+                 maintenance_interval=1000, touch_interval=60, timeout=5,
+                 clock=time.time):
+        self._path = path
+        self._max_size = max_size
+        self._ttl = ttl
+        self._maintenance_interval = maintenance_interval
+        self._touch_interval = touch_interval
+        self._timeout = timeout
+        self._clock = clock
+        self._local = threading.local()
+        connection = self._connection()
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS temporary_credentials ("
+                               "oauth_token TEXT PRIMARY KEY, "
+                               "shared_secret TEXT NOT NULL, "
+                               "expires_at REAL NOT NULL, "
+                               "used_at REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS temporary_credentials_expires_at "
+                               "ON temporary_credentials (expires_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS temporary_credentials_used_at "
+                               "ON temporary_credentials (used_at)")
+
+    def __len__(self):
+        # Expired rows wait for maintenance; count only live ones, as
+        # ``get`` and ``pop`` see them.
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM temporary_credentials WHERE expires_at > ?",
+            (self._clock(), )).fetchone()[0]
+
+    def __contains__(self, oauth_token):
+        return self.get(oauth_token) is not None
+
+    def put(self, temporary_credentials, ttl=None):
+        """
+        Stores temporary credentials under their identifier.
+
+        :param temporary_credentials:
+            An instance of :class:`pyoauth.oauth1.Credentials`.
+        :param ttl:
+            Seconds the entry stays valid. Defaults to the store's TTL.
+        """
+        now = self._clock()
+        expires_at = now + (self._ttl if ttl is None else ttl)
+        connection = self._connection()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO temporary_credentials "
+                               "VALUES (?, ?, ?, ?)",
+                               (temporary_credentials.identifier,
+                                temporary_credentials.shared_secret,
+                                expires_at, now))
+        # Counted per connection; each thread has its own.
+        self._local.puts += 1
+        if not self._local.puts % self._maintenance_interval:
+            self._maintain(now)
+
+    def get(self, oauth_token, default=None):
+        """
+        Looks up temporary credentials and marks them recently used.
+        Only writes to the database when the entry was last marked more
+        than ``touch_interval`` seconds ago.
+
+        :param oauth_token:
+            The ``oauth_token`` value from the callback query string.
+        :param default:
+            Returned when the token is unknown or has expired.
+        :returns:
+            An instance of :class:`pyoauth.oauth1.Credentials`.
+        """
+        now = self._clock()
+        connection = self._connection()
+        row = connection.execute("SELECT shared_secret, used_at FROM temporary_credentials "
+                                 "WHERE oauth_token = ? AND expires_at > ?",
+                                 (oauth_token, now)).fetchone()
+        if row is None:
+            return default
+        if now - row[1] >= self._touch_interval:
+            with connection:
+                connection.execute("UPDATE temporary_credentials SET used_at = ? "
+                                   "WHERE oauth_token = ?", (now, oauth_token))
+        return Credentials(oauth_token, row[0])
+
+    def pop(self, oauth_token, default=None):
+        """
+        Removes and returns temporary credentials. Of several processes
+        popping the same ``oauth_token``, only one gets them.
+
+        :param oauth_token:
+            The ``oauth_token`` value from the callback query string.
+        :param default:
+            Returned when the token is unknown or has expired.
+        :returns:
+            An instance of :class:`pyoauth.oauth1.Credentials`.
+        """
+        connection = self._connection()
+        with connection:
+            # Take the write lock first so that no other process can
+            # delete the row between the SELECT and the DELETE.
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT shared_secret, expires_at FROM temporary_credentials "
+                                     "WHERE oauth_token = ?", (oauth_token, )).fetchone()
+            if row is None:
+                return default
+            connection.execute("DELETE FROM temporary_credentials WHERE oauth_token = ?",
+                               (oauth_token, ))
+        if row[1] <= self._clock():
+            return default
+        return Credentials(oauth_token, row[0])
+
+    def purge_expired(self):
+        """
+        Removes expired entries and evicts the least recently used ones
+        beyond ``max_size``.
+
+        :returns:
+            The number of entries removed.
+        """
+        return self._maintain(self._clock())
+
+    def close(self):
+        """
+        Closes the calling thread's connection.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _maintain(self, now):
+        connection = self._connection()
+        with connection:
+            removed = connection.execute("DELETE FROM temporary_credentials "
+                                         "WHERE expires_at <= ?", (now, )).rowcount
+            excess = connection.execute("SELECT COUNT(*) FROM temporary_credentials"
+                                        ).fetchone()[0] - self._max_size
+            if excess > 0:
+                removed += connection.execute(
+                    "DELETE FROM temporary_credentials WHERE oauth_token IN ("
+                    "SELECT oauth_token FROM temporary_credentials "
+                    "ORDER BY used_at LIMIT ?)", (excess, )).rowcount
+        return removed
+
+    def _connection(self):
+        local = self._local
+        connection = getattr(local, "connection", None)
+        if connection is None or local.pid != os.getpid():
+            # Connections must not be shared with a forked child.
+            import sqlite3
+            connection = sqlite3.connect(self._path, timeout=self._timeout,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            local.connection = connection
+            local.pid = os.getpid()
+            local.puts = 0
+        return connection
@@ -25,6 +25,12 @@ Nonce, verification code, and timestamp
 .. autofunction:: generate_nonce
 .. autofunction:: generate_verification_code
 .. autofunction:: generate_timestamp
+.. autoclass:: TimestampSource
+   :members:
+.. autoclass:: NonceGenerator
+   :members:
+.. autoclass:: VerificationCodeGenerator
+   :members:
 
 OAuth Signature and Base String
 -------------------------------
@@ -34,6 +40,11 @@ OAuth Signature and Base String
 .. autofunction:: generate_plaintext_signature
 .. autofunction:: generate_signature_base_string
 
+Body Hash
+---------
+.. autofunction:: generate_body_hash
+.. autofunction:: verify_body_hash
+
 Authorization Header
 --------------------
 .. autofunction:: generate_normalized_authorization_header_value
@@ -41,19 +52,20 @@ Authorization Header
 
 """
 
+import mmap
 import time
 import re
 from pyoauth.types.codec import base64_encode, base64_decode
 
 try:
-    # Python 3.
-    from urllib.parse import urlunparse
-except ImportError:
     # Python 2.5+
-    from urlparse import urlunparse
+    from urlparse import urlparse, urlunparse
+except ImportError:
+    # Python 3.
+    from urllib.parse import urlparse, urlunparse
 
 from pyoauth.types.unicode import unicode_to_utf8
-from pyoauth.types import bytes
+from pyoauth.types import bytes, is_unicode
 from pyoauth.error import InvalidHttpMethodError, \
     InvalidUrlError, \
     InvalidOAuthParametersError, \
@@ -61,8 +73,11 @@ from pyoauth.error import InvalidHttpMethodError, \
 from pyoauth.url import percent_encode, percent_decode, \
     urlencode_sl, urlencode_s, urlparse_normalized, \
     request_protocol_params_sanitize, query_params_sanitize
-from pyoauth.crypto.hash import hmac_sha1_base64_digest, sha1_digest
+from pyoauth.crypto.hash import hmac_sha1_base64_digest, sha1_digest, \
+    sha1_stream_base64_digest
 from pyoauth.crypto.random import \
+    RandomStringGenerator, \
+    generate_random_longs, \
     generate_random_uint_string, \
     generate_random_hex_string
 
@@ -111,6 +126,73 @@ def generate_verification_code(length=8):
     return generate_random_hex_string(length)
 
 
+class NonceGenerator(RandomStringGenerator):
+    """
+    High-throughput replacement for :func:`generate_nonce`.
+
+    Nonces are generated in blocks and handed out from a per-thread queue;
+    see :class:`pyoauth.crypto.random.RandomStringGenerator`.
+
+    Usage::
+
+        nonces = NonceGenerator(encoding="base64url")
+        oauth_nonce = nonces.generate()
+
+    :param bit_strength:
+        Bit strength. Default 64.
+    :param encoding:
+        ``"decimal"`` (default, like :func:`generate_nonce`), ``"hex"`` or
+        ``"base64url"``.
+    :param block_size:
+        Number of nonces generated at a time. Default 256.
+    """
+    def __init__(self, bit_strength=64, encoding="decimal", block_size=256):
+        if bit_strength % 8 or bit_strength <= 0:
+            raise ValueError("This function expects a bit strength: got `%r`." % (bit_strength, ))
+        super(NonceGenerator, self).__init__(bit_strength >> 3, encoding, block_size)
+
+
+class VerificationCodeGenerator(RandomStringGenerator):
+    """
+    High-throughput replacement for :func:`generate_verification_code`.
+
+    Codes are generated in blocks and handed out from a per-thread queue;
+    see :class:`pyoauth.crypto.random.RandomStringGenerator`.
+
+    :param length:
+        Length of each verification code. Default 8. Must be even for
+        ``"hex"`` codes.
+    :param encoding:
+        ``"hex"`` (default, like :func:`generate_verification_code`),
+        ``"decimal"`` (digits only, easiest to enter on limited devices;
+        every code of ``length`` digits is equally likely) or
+        ``"base64url"``.
+    :param block_size:
+        Number of codes generated at a time. Default 256.
+    """
+    def __init__(self, length=8, encoding="hex", block_size=256):
+        if length <= 0 or (encoding == "hex" and length % 2):
+            raise ValueError("Invalid verification code length for %s codes: got length `%r`." % (encoding, length))
+        if encoding == "base64url":
+            # Enough bytes for ``length`` full base-64 digits.
+            num_bytes = (length * 3 + 3) >> 2
+        else:
+            num_bytes = (length + 1) >> 1
+        super(VerificationCodeGenerator, self).__init__(num_bytes, encoding, block_size)
+        self._length = length
+
+    def _generate_block(self):
+        if self.encoding == "decimal":
+            return ["%0*d" % (self._length, n)
+                    for n in generate_random_longs(0, 10 ** self._length,
+                                                   self.block_size)]
+        codes = super(VerificationCodeGenerator, self)._generate_block()
+        if self.encoding == "base64url":
+            length = self._length
+            codes = [code[:length] for code in codes]
+        return codes
+
+
 def generate_timestamp():
     """
     Generates an OAuth timestamp.
@@ -123,6 +205,105 @@ def generate_timestamp():
     return bytes(int(time.time()))
 
 
+class TimestampSource(object):
+    """
+    Generates OAuth timestamps corrected for the clock skew of each
+    provider host.
+
+    Providers reject requests whose timestamps stray too far from their
+    own clocks. The offset of a host's clock is learned from the ``Date``
+    header of its responses and added to the local time for later
+    requests to that host. ``Date`` has a resolution of one second, so
+    offsets smaller than ``tolerance`` are treated as no skew at all.
+
+    Usage::
+
+        timestamps = TimestampSource()
+        response = transport.execute(request)
+        timestamps.observe(request.url, response)
+        oauth_timestamp = timestamps.timestamp(request.url)
+
+    :param tolerance:
+        Smallest offset in seconds that is corrected. Default 2.
+    :param clock:
+        Function returning the local time in seconds. Default
+        :func:`time.time`.
+    """
+    def __init__(self, tolerance=2, clock=time.time):
+        self._tolerance = tolerance
+        self._clock = clock
+        self._skews = {}
+
+    def timestamp(self, url=None):
+        """
+        Generates an OAuth timestamp for a request.
+
+        :param url:
+            Request URL. Without it, or for hosts not seen yet, this is
+            the same as :func:`generate_timestamp`.
+        :returns:
+            A string containing a positive integer representing time.
+        """
+        return bytes(int(self._clock() + self.skew(url)))
+
+    def observe(self, url, response, sent_at=None):
+        """
+        Learns the clock offset of a host from one of its responses.
+
+        :param url:
+            URL the request was sent to.
+        :param response:
+            An instance of :class:`pyoauth.http.ResponseProxy`. Responses
+            without a valid ``Date`` header are ignored.
+        :param sent_at:
+            Local time at which the request was sent, if known. The offset
+            is then measured against the middle of the round trip rather
+            than its end.
+        :returns:
+            The skew now corrected for the host, in seconds.
+        """
+        # email.utils imports socket and ssl on Python 2; only load it
+        # when there is a response to read.
+        from email.utils import parsedate_tz, mktime_tz
+        date = response.get_header("Date")
+        parsed = parsedate_tz(date) if date else None
+        host = _timestamp_host(url)
+        if parsed is None or host is None:
+            return self.skew(url)
+        now = self._clock()
+        if sent_at is not None:
+            now = (sent_at + now) / 2.0
+        # The server's clock read somewhere within the second it reported.
+        skew = mktime_tz(parsed) + 0.5 - now
+        if abs(skew) < self._tolerance:
+            self._skews.pop(host, None)
+            return 0
+        self._skews[host] = skew
+        return skew
+
+    def skew(self, url):
+        """
+        Returns the skew corrected for a URL's host, in seconds.
+
+        Positive values mean the host's clock is ahead of the local clock.
+        """
+        if url is None:
+            return 0
+        return self._skews.get(_timestamp_host(url), 0)
+
+    def skews(self):
+        """
+        Returns a dictionary mapping host names to the skew corrected for
+        them, in seconds. Hosts within the tolerance are not included.
+        """
+        return dict(self._skews)
+
+
+def _timestamp_host(url):
+    # Lowercase, or None for relative URLs.
+    return urlparse(url).hostname
+
+
 def generate_hmac_sha1_signature(client_shared_secret,
                             method, url, oauth_params=None,
                             token_or_temporary_shared_secret=None):
@@ -337,6 +518,54 @@ def _generate_signature_base_string_query(url_query_params, oauth_params):
     return query
 
 
+def generate_body_hash(body):
+    """
+    Calculates the ``oauth_body_hash`` value of a request entity-body.
+
+    The body is hashed in blocks, so file objects and memory maps are
+    never loaded into memory at once. Seekable file objects are put back
+    at their current position afterwards; iterators and non-seekable
+    streams are consumed.
+
+    :see: OAuth Request Body Hash
+        (http://oauth.googlecode.com/svn/spec/ext/body_hash/1.0/oauth-bodyhash.html)
+    :param body:
+        The entity-body: a byte string, a Unicode string (hashed as
+        UTF-8), a buffer or memory map, a file object, or an iterable of
+        byte string chunks.
+    :returns:
+        Base-64-encoded SHA-1 digest of the body.
+    """
+    if body is None:
+        body = b""
+    elif is_unicode(body):
+        body = unicode_to_utf8(body)
+    if hasattr(body, "read") and not isinstance(body, mmap.mmap):
+        try:
+            position = body.tell()
+        except (AttributeError, IOError, OSError):
+            return sha1_stream_base64_digest(body)
+        try:
+            return sha1_stream_base64_digest(body)
+        finally:
+            body.seek(position)
+    return sha1_stream_base64_digest(body)
+
+
+def verify_body_hash(body_hash, body):
+    """
+    Checks an ``oauth_body_hash`` value against a received entity-body.
+
+    :param body_hash:
+        The ``oauth_body_hash`` protocol parameter value.
+    :param body:
+        The entity-body in any form accepted by :func:`generate_body_hash`.
+    :returns:
+        ``True`` if the body matches the hash; ``False`` otherwise.
+    """
+    return generate_body_hash(body) == body_hash
+
+
 def generate_normalized_authorization_header_value(oauth_params,
                                               realm=None,
                                               param_delimiter=","):
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Synchronous HTTP transport.
+#
+# Copyright (C) 2011 Yesudeep Mangalapilly <yesudeep@gmail.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+:module: pyoauth.transport
+:synopsis: Thread-safe keep-alive HTTP transport for request proxies.
+
+Optional. The rest of the library never sends HTTP requests itself; use
+this module when you do not already have an HTTP library of choice.
+
+Usage::
+
+    transport = HttpTransport(max_connections_per_host=8)
+    request = client.build_resource_request(token_credentials, "GET", url)
+    response = transport.execute(request)
+
+Classes
+-------
+.. autoclass:: HttpTransport
+   :members:
+.. autoclass:: ConnectionPool
+   :members:
+"""
+
+import socket
+import threading
+import time
+
+try:
+    # Python 3.
+    import http.client as httplib
+    from urllib.parse import urlparse
+except ImportError:
+    # Python 2.5+
+    import httplib
+    from urlparse import urlparse
+
+from pyoauth.error import InvalidUrlError, ConnectionPoolTimeoutError
+from pyoauth.http import Headers, ResponseProxy
+
+
+_CONNECTION_CLASSES = {
+    "http": httplib.HTTPConnection,
+    "https": httplib.HTTPSConnection,
+}
+
+
+class ConnectionPool(object):
+    """
+    Pool of persistent HTTP/1.1 connections to a single
+    ``(scheme, host, port)``.
+
+    :param scheme:
+        ``http`` or ``https``.
+    :param host:
+        Host name.
+    :param port:
+        Port number.
+    :param max_size:
+        Maximum number of connections (in use and idle) at any time.
+    :param idle_timeout:
+        Seconds an idle connection may be kept before it is evicted.
+    :param timeout:
+        Socket timeout for each connection in seconds.
+    :param pool_timeout:
+        Seconds to wait for a connection when the pool is exhausted.
+        ``None`` waits forever.
+    :param ssl_context:
+        Optional :class:`ssl.SSLContext` used for ``https`` connections.
+    """
+    def __init__(self, scheme, host, port, max_size=10, idle_timeout=60,
+                 timeout=None, pool_timeout=None, ssl_context=None):
+        self._scheme = scheme
+        self._host = host
+        self._port = port
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._timeout = timeout
+        self._pool_timeout = pool_timeout
+        self._ssl_context = ssl_context
+
+        self._condition = threading.Condition(threading.Lock())
+        self._idle = []
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._created = 0
+        self._reused = 0
+        self._evicted = 0
+        self._waits = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    def acquire(self, reuse=True):
+        """
+        Checks out a connection, reusing an idle one if possible.
+
+        :param reuse:
+            ``False`` always opens a new connection.
+        :returns:
+            Tuple of the form ``(connection, reused)``.
+        """
+        with self._condition:
+            deadline = None
+            waited = False
+            while True:
+                self._evict_expired()
+                if reuse and self._idle:
+                    connection, _ = self._idle.pop()
+                    self._reused += 1
+                    self._checkout()
+                    return connection, True
+                if self._in_use < self._max_size:
+                    if self._in_use + len(self._idle) >= self._max_size:
+                        # Make room by closing the oldest idle connection.
+                        self._idle.pop(0)[0].close()
+                    self._created += 1
+                    self._checkout()
+                    break
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                if self._pool_timeout is None:
+                    self._condition.wait()
+                else:
+                    now = time.time()
+                    deadline = deadline or (now + self._pool_timeout)
+                    if now >= deadline:
+                        raise ConnectionPoolTimeoutError(
+                            "No connection available to %s://%s:%d within %r seconds." % (
+                                self._scheme, self._host, self._port, self._pool_timeout))
+                    self._condition.wait(deadline - now)
+        # Connect outside the lock.
+        return self._create_connection(), False
+
+    def release(self, connection, reusable=True):
+        """
+        Returns a connection to the pool.
+
+        :param connection:
+            A connection obtained from :meth:`acquire`.
+        :param reusable:
+            ``False`` closes the connection instead of keeping it idle.
+        """
+        if not reusable:
+            connection.close()
+        with self._condition:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((connection, time.time()))
+            self._condition.notify()
+
+    def evict_idle(self):
+        """
+        Closes idle connections older than the idle timeout.
+
+        :returns:
+            The number of connections closed.
+        """
+        with self._condition:
+            return self._evict_expired()
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._condition:
+            for connection, _ in self._idle:
+                connection.close()
+            self._idle = []
+
+    def metrics(self):
+        """
+        Returns a snapshot of pool utilization.
+
+        :returns:
+            A dictionary with these keys:
+
+            ``max_size``, ``in_use``, ``idle``, ``peak_in_use``,
+            ``created``, ``reused``, ``evicted``, ``waits`` and
+            ``utilization`` (``in_use / max_size``).
+        """
+        with self._condition:
+            return dict(
+                max_size=self._max_size,
+                in_use=self._in_use,
+                idle=len(self._idle),
+                peak_in_use=self._peak_in_use,
+                created=self._created,
+                reused=self._reused,
+                evicted=self._evicted,
+                waits=self._waits,
+                utilization=float(self._in_use) / self._max_size,
+            )
+
+    def _checkout(self):
+        self._in_use += 1
+        if self._in_use > self._peak_in_use:
+            self._peak_in_use = self._in_use
+
+    def _evict_expired(self):
+        deadline = time.time() - self._idle_timeout
+        # Idle connections are kept in release order; the oldest come first.
+        count = 0
+        while self._idle and self._idle[0][1] <= deadline:
+            connection, _ = self._idle.pop(0)
+            connection.close()
+            count += 1
+        self._evicted += count
+        return count
+
+    def _create_connection(self):
+        kwargs = {}
+        if self._timeout is not None:
+            kwargs["timeout"] = self._timeout
+        if self._scheme == "https" and self._ssl_context is not None:
+            kwargs["context"] = self._ssl_context
+        try:
+            return _CONNECTION_CLASSES[self._scheme](self._host, self._port, **kwargs)
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+
+class HttpTransport(object):
+    """
+    Executes :class:`pyoauth.http.RequestProxy` objects over pooled
+    keep-alive connections and returns
+    :class:`pyoauth.http.ResponseProxy` objects.
+
+    Instances are thread-safe and are meant to be shared.
+
+    :param max_connections_per_host:
+        Maximum number of simultaneous connections per
+        ``(scheme, host, port)``. Default 10.
+    :param idle_timeout:
+        Seconds after which idle connections are evicted. Default 60.
+    :param timeout:
+        Socket timeout in seconds. Default ``None`` (global default).
+    :param pool_timeout:
+        Seconds to wait for a free connection when a host's pool is
+        exhausted before raising
+        :class:`pyoauth.error.ConnectionPoolTimeoutError`.
+        ``None`` (default) waits forever.
+    :param ssl_context:
+        Optional :class:`ssl.SSLContext` for ``https`` URLs.
+    """
+    def __init__(self, max_connections_per_host=10, idle_timeout=60,
+                 timeout=None, pool_timeout=None, ssl_context=None):
+        self._max_connections_per_host = max_connections_per_host
+        self._idle_timeout = idle_timeout
+        self._timeout = timeout
+        self._pool_timeout = pool_timeout
+        self._ssl_context = ssl_context
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def execute(self, request):
+        """
+        Sends a request and reads the complete response.
+
+        :param request:
+            An instance of :class:`pyoauth.http.RequestProxy`.
+        :returns:
+            An instance of :class:`pyoauth.http.ResponseProxy`.
+        """
+        parts = urlparse(request.url)
+        scheme = parts.scheme.lower()
+        if scheme not in _CONNECTION_CLASSES or not parts.hostname:
+            raise InvalidUrlError("Absolute http or https URL required: got `%r`" % (request.url, ))
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        pool = self._get_pool(scheme, parts.hostname.lower(), port)
+        connection, reused = pool.acquire()
+        try:
+            try:
+                response = self._send(connection, request, target)
+            except (httplib.BadStatusLine, httplib.CannotSendRequest, socket.error):
+                if not reused:
+                    raise
+                # The server may have closed an idle keep-alive connection.
+                # Retry once on a fresh connection.
+                pool.release(connection, reusable=False)
+                connection = None
+                connection, _ = pool.acquire(reuse=False)
+                response = self._send(connection, request, target)
+            body = response.read()
+        except Exception:
+            if connection is not None:
+                pool.release(connection, reusable=False)
+            raise
+        pool.release(connection, reusable=not response.will_close)
+        return ResponseProxy(response.status, response.reason, body,
+                             Headers(response.getheaders()))
+
+    def metrics(self):
+        """
+        Returns pool utilization metrics per host.
+
+        :returns:
+            A dictionary mapping ``(scheme, host, port)`` tuples to
+            the dictionaries returned by :meth:`ConnectionPool.metrics`.
+        """
+        with self._lock:
+            pools = list(self._pools.items())
+        return dict((key, pool.metrics()) for key, pool in pools)
+
+    def evict_idle(self):
+        """
+        Closes expired idle connections in every pool.
+
+        :returns:
+            The number of connections closed.
+        """
+        with self._lock:
+            pools = list(self._pools.values())
+        return sum(pool.evict_idle() for pool in pools)
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+    def _get_pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(scheme, host, port,
+                                      max_size=self._max_connections_per_host,
+                                      idle_timeout=self._idle_timeout,
+                                      timeout=self._timeout,
+                                      pool_timeout=self._pool_timeout,
+                                      ssl_context=self._ssl_context)
+                self._pools[key] = pool
+            return pool
+
+    def _send(self, connection, request, target):
+        headers = request.headers
+        if isinstance(headers, Headers):
+            headers = dict(headers.items())
+        headers = headers or {}
+        body = request.body
+        position = None
+        if hasattr(body, "read") and hasattr(body, "seek"):
+            # httplib takes the length of a file body from ``fstat``, which
+            # is wrong for files not at position 0 and for in-memory files.
+            position = body.tell()
+            if not any(name.lower() == "content-length" for name in headers):
+                body.seek(0, 2)
+                # A copy, so that the caller's headers are left alone.
+                headers = dict(headers)
+                headers["Content-Length"] = str(body.tell() - position)
+                body.seek(position)
+        try:
+            connection.request(request.method, target, body, headers)
+        finally:
+            if position is not None:
+                # Rewind so that a retry sends the whole body again.
+                body.seek(position)
+        return connection.getresponse()
@@ -14,9 +14,22 @@ Functions:
 .. autofunction:: is_unicode
 .. autofunction:: is_bytes
 .. autofunction:: is_bytes_or_unicode
+.. autofunction:: is_buffer
+.. autofunction:: buffer_to_bytes
+
+Integer conversion:
+-------------------
+These use the fastest primitive the interpreter offers:
+``int.from_bytes``/``int.to_bytes`` on Python 3, a ``binascii`` hexadecimal
+round trip on Python 2, and ``int.bit_length``.
+
+.. autofunction:: bit_count
+.. autofunction:: byte_count
+.. autofunction:: bytes_to_int
+.. autofunction:: int_to_bytes
 """
 
-import math
+from binascii import hexlify, unhexlify
 
 try:
     bytes = bytes
@@ -31,6 +44,13 @@ except Exception:
     unicode_string = str
     basestring = (str, bytes)
 
+try:
+    # Python 2.7+
+    buffer_types = (bytearray, memoryview)
+except NameError:
+    # Python 2.6
+    buffer_types = (bytearray, )
+
 
 def is_sequence(value):
     try:
@@ -78,6 +98,38 @@ def is_bytes_or_unicode(value):
     return isinstance(value, basestring)
 
 
+def is_buffer(value):
+    """
+    Determines whether the given value is a binary buffer (a ``bytearray``
+    or a ``memoryview``) rather than a byte string.
+
+    :param value:
+        The value to test.
+    :returns:
+        ``True`` if ``value`` is a binary buffer; ``False`` otherwise.
+    """
+    return isinstance(value, buffer_types)
+
+
+def buffer_to_bytes(value):
+    """
+    Copies the contents of a binary buffer into a byte string.
+
+    :param value:
+        A ``bytearray`` or ``memoryview``. Byte strings are returned
+        unchanged.
+    :returns:
+        Byte string.
+    """
+    if is_bytes(value):
+        return value
+    # ``bytearray`` is shadowed by the ``pyoauth.types.bytearray`` module
+    # in this namespace, so tell the buffer types apart by their methods.
+    if hasattr(value, "tobytes"):
+        return value.tobytes()
+    return bytes(value)
+
+
 def byte_count(num):
     """
     Determines the number of bytes in a long.
@@ -87,12 +139,7 @@ def byte_count(num):
     :returns:
         The number of bytes in the long integer.
     """
-    #if num == 0:
-    #    return 0
-    if not num:
-        return 0
-    bits = bit_count(num)
-    return int(math.ceil(bits / 8.0))
+    return (bit_count(num) + 7) >> 3
 
 
 def bit_count(num):
@@ -104,15 +151,80 @@ def bit_count(num):
     :returns:
         Returns the number of bits in the long value.
     """
-    #if num == 0:
-    #    return 0
     if not num:
         return 0
-    s = "%x" % num
-    return ((len(s)-1)*4) + \
-    {'0':0, '1':1, '2':2, '3':2,
-     '4':3, '5':3, '6':3, '7':3,
-     '8':4, '9':4, 'a':4, 'b':4,
-     'c':4, 'd':4, 'e':4, 'f':4,
-     }[s[0]]
-    #return int(math.floor(math.log(n, 2))+1)
+    try:
+        # Python 2.7+ integers and gmpy2 integers.
+        return num.bit_length()
+    except AttributeError:
+        s = "%x" % num
+        return ((len(s)-1)*4) + _HEX_DIGIT_BITS[s[0]]
+
+
+_HEX_DIGIT_BITS = {
+    '0':0, '1':1, '2':2, '3':2,
+    '4':3, '5':3, '6':3, '7':3,
+    '8':4, '9':4, 'a':4, 'b':4,
+    'c':4, 'd':4, 'e':4, 'f':4,
+}
+
+
+if hasattr(int, "from_bytes"):
+    # Python 3.2+
+    def bytes_to_int(byte_string):
+        """
+        Converts a big-endian byte string into a non-negative integer.
+
+        :param byte_string:
+            Byte string (or any object supporting the buffer protocol).
+        :returns:
+            Integer; 0 for an empty byte string.
+        """
+        return int.from_bytes(byte_string, "big")
+
+    def int_to_bytes(num, length=0):
+        """
+        Converts a non-negative integer into a big-endian byte string.
+
+        :param num:
+            Integer value (any type that formats with ``%x`` is accepted).
+        :param length:
+            Minimum length of the result; it is left-padded with zero bytes.
+        :returns:
+            Byte string of at least one byte.
+        """
+        size = max(byte_count(num), length, 1)
+        try:
+            return num.to_bytes(size, "big")
+        except AttributeError:
+            return unhexlify("%0*x" % (size * 2, num))
+else:
+    def bytes_to_int(byte_string):
+        """
+        Converts a big-endian byte string into a non-negative integer.
+
+        :param byte_string:
+            Byte string (or any object supporting the buffer protocol).
+        :returns:
+            Integer; 0 for an empty byte string.
+        """
+        return int(hexlify(byte_string) or "0", 16)
+
+    def int_to_bytes(num, length=0):
+        """
+        Converts a non-negative integer into a big-endian byte string.
+
+        :param num:
+            Integer value (any type that formats with ``%x`` is accepted).
+        :param length:
+            Minimum length of the result; it is left-padded with zero bytes.
+        :returns:
+            Byte string of at least one byte.
+        """
+        hex_string = "%x" % num
+        if len(hex_string) & 1:
+            hex_string = "0" + hex_string
+        byte_string = unhexlify(hex_string)
+        if len(byte_string) < length:
+            byte_string = b"\x00" * (length - len(byte_string)) + byte_string
+        return byte_string
@@ -22,7 +22,7 @@ Type Conversion
 """
 
 from array import array
-from pyoauth.types import byte_count
+from pyoauth.types import bytes_to_int, int_to_bytes
 
 
 def bytearray_create(sequence):
@@ -98,13 +98,7 @@ def bytearray_to_long(byte_array):
     :returns:
         Long.
     """
-    total = 0L
-    multiplier = 1L
-    for count in range(len(byte_array)-1, -1, -1):
-        byte_val = byte_array[count]
-        total += multiplier * byte_val
-        multiplier *= 256
-    return total
+    return bytes_to_int(byte_array)
 
 
 def long_to_bytearray(num):
@@ -116,11 +110,8 @@ def long_to_bytearray(num):
     :returns:
         Long.
     """
-    bytes_count = byte_count(num)
-    byte_array = bytearray_create_zeros(bytes_count)
-    for count in range(bytes_count - 1, -1, -1):
-        byte_array[count] = int(num % 256)
-        num >>= 8
-    return byte_array
+    if not num:
+        return bytearray_create_zeros(0)
+    return bytes_to_bytearray(int_to_bytes(num))
 
 
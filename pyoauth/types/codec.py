@@ -11,6 +11,8 @@ Encoding
 --------
 .. autofunction:: base64_decode
 .. autofunction:: base64_encode
+.. autofunction:: base64url_decode
+.. autofunction:: base64url_encode
 .. autofunction:: bytes_to_hex
 .. autofunction:: hex_to_bytes
 .. autofunction:: bytes_to_base64
@@ -24,9 +26,18 @@ Encoding
 """
 
 import binascii
-from pyoauth.types import bytes
+from pyoauth.types import bytes, bytes_to_int, int_to_bytes
 from pyoauth.types.bytearray import bytes_to_bytearray, bytearray_to_bytes
-from pyoauth.types.number import bytes_to_long, long_to_bytes
+
+try:
+    # Python 3.
+    _maketrans = bytes.maketrans
+except AttributeError:
+    # Python 2.
+    from string import maketrans as _maketrans
+
+_BASE64_TO_BASE64URL = _maketrans(b"+/", b"-_")
+_BASE64URL_TO_BASE64 = _maketrans(b"-_", b"+/")
 
 
 def base64_decode(encoded):
@@ -53,6 +64,34 @@ def base64_encode(byte_string):
     return binascii.b2a_base64(byte_string)[:-1]
 
 
+def base64url_encode(byte_string):
+    """
+    Encodes a byte string using the URL- and filename-safe Base 64
+    alphabet without ``=`` padding, so the result never needs
+    percent-encoding.
+
+    :param byte_string:
+        The byte string to encode.
+    :returns:
+        Unpadded base64url-encoded string.
+    """
+    encoded = binascii.b2a_base64(byte_string)[:-1]
+    return encoded.translate(_BASE64_TO_BASE64URL).rstrip(b"=")
+
+
+def base64url_decode(encoded):
+    """
+    Decodes an unpadded (or padded) base64url-encoded string.
+
+    :param encoded:
+        Base64url-encoded byte string.
+    :returns:
+        byte string.
+    """
+    encoded = encoded.translate(_BASE64URL_TO_BASE64)
+    return binascii.a2b_base64(encoded + b"=" * (-len(encoded) % 4))
+
+
 def bytes_to_hex(byte_string):
     """
     Converts a byte string to its hex representation.
@@ -112,7 +151,7 @@ def bytes_to_decimal(byte_string):
         Decimal-encoded byte string.
     """
     #return bytes(int(bytes_to_hex(byte_string), 16))
-    return bytes(bytes_to_long(byte_string))
+    return bytes(bytes_to_int(byte_string))
 
 
 def decimal_to_bytes(encoded):
@@ -124,7 +163,7 @@ def decimal_to_bytes(encoded):
     :returns:
         Byte string.
     """
-    return long_to_bytes(long(encoded))
+    return int_to_bytes(long(encoded))
 
 
 def long_to_base64(num):
@@ -136,7 +175,7 @@ def long_to_base64(num):
     :returns:
         Base-64 encoded byte string.
     """
-    byte_string = long_to_bytes(num)
+    byte_string = int_to_bytes(num)
     return base64_encode(byte_string)
 
 
@@ -150,7 +189,7 @@ def base64_to_long(encoded):
         Long value.
     """
     byte_string = base64_decode(encoded)
-    return bytes_to_long(byte_string)
+    return bytes_to_int(byte_string)
 
 
 def base64_to_bytearray(encoded):
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Module attributes computed when read.
+#
+# Placed into the public domain.
+
+"""
+:module: pyoauth.types.module
+:synopsis: Module attributes computed when read.
+
+Python 3.7+ modules can define ``__getattr__``; Python 2 modules cannot.
+:func:`lazy_module_attributes` gives a module attributes whose values are
+loaded only when they are read, by registering a proxy for the module in
+:data:`sys.modules`. Everything else is read from and written to the
+module itself.
+
+Functions:
+----------
+.. autofunction:: lazy_module_attributes
+"""
+
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Proxy for a module that adds computed attributes.
+    """
+    def __init__(self, module, getters):
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        # Set directly; __setattr__ forwards to the module.
+        self.__dict__["_module"] = module
+        self.__dict__["_getters"] = getters
+
+    def __getattr__(self, name):
+        # Only called for names that are not in the proxy's dictionary.
+        getter = self._getters.get(name)
+        if getter is not None:
+            return getter()
+        return getattr(self._module, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._module, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._module, name)
+
+    def __dir__(self):
+        return sorted(set(dir(self._module)) | set(self._getters))
+
+
+def lazy_module_attributes(name, **getters):
+    """
+    Adds attributes to a module that are computed each time they are
+    read. Call it at the end of the module.
+
+    Usage::
+
+        lazy_module_attributes(__name__, sieve=get_sieve)
+
+    :param name:
+        The module's ``__name__``.
+    :param getters:
+        Attribute names mapped to functions that take no arguments and
+        return the attribute's value. Cache the value in the function if it
+        is expensive to compute.
+    """
+    sys.modules[name] = _LazyModule(sys.modules[name], getters)
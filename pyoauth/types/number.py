@@ -17,11 +17,35 @@ Functions:
 .. autofunction:: long_to_mpi
 .. autofunction:: pow_mod
 .. autofunction:: inverse_mod
+.. autofunction:: gcd
+.. autofunction:: lcm
+
+Arithmetic backends:
+--------------------
+``pow_mod``, ``inverse_mod``, ``gcd`` and ``lcm`` are bound at import time
+to the fastest available implementation: gmpy2, gmpy, the built-in
+three-argument ``pow()`` or pure Python. The name of the active backend is
+available as :data:`BACKEND`.
+
+Results are returned in the backend's native integer type (``mpz`` for
+gmpy2 and gmpy) and native values are accepted without conversion, so a
+chain of operations converts only at the byte boundaries:
+:func:`bytes_to_long` returns a native integer and :func:`long_to_bytes`
+accepts one.
+
+Every backend raises ``ValueError`` from ``pow_mod`` for a negative power
+of a base that has no inverse, whereas ``inverse_mod`` returns zero.
+
+.. autofunction:: available_backends
+.. autofunction:: get_backend
+.. autoclass:: Backend
 """
 
 
-import struct
+import os
+from binascii import hexlify
 
+from pyoauth.types import bit_count, byte_count, bytes_to_int, int_to_bytes
 from pyoauth.types.bytearray import \
     bytearray_concat, \
     bytearray_create_zeros, \
@@ -30,10 +54,6 @@ from pyoauth.types.bytearray import \
     long_to_bytearray, \
     bytearray_to_long
 
-# Taken from PyCrypto "as is".
-# Improved conversion functions contributed by Barry Warsaw, after
-# careful benchmarking
-
 def long_to_bytes(num, blocksize=0):
     """
     Convert a long integer to a byte string::
@@ -49,27 +69,12 @@ def long_to_bytes(num, blocksize=0):
     :returns:
         Byte string.
     """
-    # after much testing, this algorithm was deemed to be the fastest
-    s = ''
-    num = long(num)
-    pack = struct.pack
-    while num > 0:
-        s = pack('>I', num & 0xffffffffL) + s
-        num >>= 32
-    # strip off leading zeros
-    for i in range(len(s)):
-        if s[i] != '\000':
-            break
-    else:
-        # only happens when n == 0
-        s = '\000'
-        i = 0
-    s = s[i:]
-    # add back some pad bytes.  this could be done more efficiently w.r.t. the
-    # de-padding being done above, but sigh...
-    if blocksize > 0 and len(s) % blocksize:
-        s = (blocksize - len(s) % blocksize) * '\000' + s
-    return s
+    if blocksize > 0:
+        length = byte_count(num) or 1
+        if length % blocksize:
+            length += blocksize - length % blocksize
+        return int_to_bytes(num, length)
+    return int_to_bytes(num)
 
 
 def bytes_to_long(byte_string):
@@ -83,18 +88,11 @@ def bytes_to_long(byte_string):
     :param bytestring:
         A byte string.
     :returns:
-        Long.
+        Long, or the native integer type of the arithmetic backend.
     """
-    acc = 0L
-    unpack = struct.unpack
-    length = len(byte_string)
-    if length % 4:
-        extra = (4 - length % 4)
-        byte_string = '\000' * extra + byte_string
-        length = length + extra
-    for i in range(0, length, 4):
-        acc = (acc << 32) + unpack('>I', byte_string[i:i+4])[0]
-    return acc
+    if _native_from_hex is not None:
+        return _native_from_hex(hexlify(byte_string) or "0")
+    return bytes_to_int(byte_string)
 
 
 def long_to_bytes_original(num):
@@ -141,8 +139,7 @@ def mpi_to_long(mpi_byte_string):
     #Make sure this is a positive number
     assert (ord(mpi_byte_string[4]) & 0x80) == 0
 
-    byte_array = bytes_to_bytearray(mpi_byte_string[4:])
-    return bytearray_to_long(byte_array)
+    return bytes_to_long(mpi_byte_string[4:])
 
 
 def long_to_mpi(num):
@@ -169,7 +166,28 @@ def long_to_mpi(num):
     return bytearray_to_bytes(byte_array)
 
 
-def gcd(a,b):
+class Backend(tuple):
+    """
+    Big-integer arithmetic functions provided by one implementation.
+
+    Attributes: ``name``, ``pow_mod``, ``inverse_mod``, ``gcd``, ``lcm``
+    and ``mpz`` (the implementation's native integer type, which the
+    functions return).
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, pow_mod, inverse_mod, gcd, lcm, mpz):
+        return tuple.__new__(cls, (name, pow_mod, inverse_mod, gcd, lcm, mpz))
+
+    name = property(lambda self: self[0])
+    pow_mod = property(lambda self: self[1])
+    inverse_mod = property(lambda self: self[2])
+    gcd = property(lambda self: self[3])
+    lcm = property(lambda self: self[4])
+    mpz = property(lambda self: self[5])
+
+
+def _python_gcd(a, b):
     """
     Calculates the greatest common divisor.
 
@@ -188,23 +206,7 @@ def gcd(a,b):
     return a
 
 
-def lcm(a, b):
-    """
-    Least common multiple.
-
-    :param a:
-        Long value.
-    :param v:
-        Long value.
-    :returns:
-        Least common multiple.
-    """
-    # TODO: This will break when python division changes, but we can't use //
-    # because of Jython
-    return (a * b) / gcd(a, b)
-
-
-def inverse_mod(a, b):
+def _python_inverse_mod(a, b):
     """
     Returns inverse of a mod b, zero if none
 
@@ -220,9 +222,7 @@ def inverse_mod(a, b):
     c, d = a, b
     uc, ud = 1, 0
     while c:
-        # TODO: This will break when python division changes, but we can't use
-        # // because of Jython
-        q = d / c
+        q = d // c
         c, d = d-(q*c), c
         uc, ud = ud - (q * uc), uc
     if d == 1:
@@ -230,89 +230,232 @@ def inverse_mod(a, b):
     return 0
 
 
-try:
-    import gmpy
-    def pow_mod(base, power, modulus):
+def _python_pow_mod(base, power, modulus):
+    """
+    Calculates:
+        base**pow mod modulus
+
+    Uses multi bit scanning with nBitScan bits at a time.
+    From Bryan G. Olson's post to comp.lang.python
+
+    Does left-to-right instead of pow()'s right-to-left,
+    thus about 30% faster than the python built-in with small bases
+
+    :param base:
+        Base
+    :param power:
+        Power
+    :param modulus:
+        Modulus
+    :returns:
+        base**pow mod modulus
+    :raises:
+        ``ValueError`` if ``power`` is negative and ``base`` has no
+        inverse modulo ``modulus``.
+    """
+    nBitScan = 5
+
+    #TREV - Added support for negative exponents
+    negativeResult = False
+    if power < 0:
+        power *= -1
+        negativeResult = True
+
+    exp2 = 2**nBitScan
+    mask = exp2 - 1
+
+    # Break power into a list of digits of nBitScan bits.
+    # The list is recursive so easy to read in reverse direction.
+    nibbles = None
+    while power:
+        nibbles = int(power & mask), nibbles
+        power >>= nBitScan
+
+    # Make a table of powers of base up to 2**nBitScan - 1
+    lowPowers = [1]
+    for i in range(1, exp2):
+        lowPowers.append((lowPowers[i-1] * base) % modulus)
+
+    # To exponentiate by the first nibble, look it up in the table
+    nib, nibbles = nibbles
+    prod = lowPowers[nib]
+
+    # For the rest, square nBitScan times, then multiply by
+    # base^nibble
+    while nibbles:
+        nib, nibbles = nibbles
+        for i in range(nBitScan):
+            prod = (prod * prod) % modulus
+        if nib: prod = (prod * lowPowers[nib]) % modulus
+
+    #TREV - Added support for negative exponents
+    if negativeResult:
+        return _invert_power(prod, modulus, _python_inverse_mod)
+    return prod
+
+
+def _invert_power(value, modulus, inverse_mod):
+    """
+    Inverts ``base**power mod modulus`` for a negative ``power``, raising
+    ``ValueError`` as gmpy2 and Python 3.8+ ``pow`` do when there is no
+    inverse.
+    """
+    inverse = inverse_mod(value, modulus)
+    if (value * inverse) % modulus != 1:
+        raise ValueError("base is not invertible for the given modulus")
+    return inverse
+
+
+def _make_lcm(gcd_func):
+    def lcm(a, b):
         """
-        Calculates:
-            base**pow mod modulus
-
-        :param base:
-            Base
-        :param power:
-            Power
-        :param modulus:
-            Modulus
+        Least common multiple.
+
+        :param a:
+            Long value.
+        :param b:
+            Long value.
         :returns:
-            base**pow mod modulus
+            Least common multiple.
         """
-        base = gmpy.mpz(base)
-        power = gmpy.mpz(power)
-        modulus = gmpy.mpz(modulus)
-        result = pow(base, power, modulus)
-        return long(result)
-
-except ImportError:
-    def pow_mod(base, power, modulus):
-        """
-        Calculates:
-            base**pow mod modulus
+        return (a * b) // gcd_func(a, b)
+    return lcm
+
+
+def _python_backend():
+    return Backend("python", _python_pow_mod, _python_inverse_mod,
+                   _python_gcd, _make_lcm(_python_gcd), long)
+
+
+def _builtin_backend():
+    try:
+        # Python 3.8+ computes modular inverses with three-argument pow().
+        pow(2, -1, 3)
+        builtin_inverse_mod = _builtin_pow_inverse_mod
+        builtin_pow_mod = pow
+    except (TypeError, ValueError):
+        builtin_inverse_mod = _python_inverse_mod
+        def builtin_pow_mod(base, power, modulus):
+            if power < 0:
+                return _invert_power(pow(base, -power, modulus), modulus,
+                                     builtin_inverse_mod)
+            return pow(base, power, modulus)
+    try:
+        # Python 3.5+
+        from math import gcd as builtin_gcd
+    except ImportError:
+        builtin_gcd = _python_gcd
+    return Backend("builtin", builtin_pow_mod, builtin_inverse_mod,
+                   builtin_gcd, _make_lcm(builtin_gcd), long)
+
+
+def _builtin_pow_inverse_mod(a, b):
+    try:
+        return pow(a, -1, b)
+    except ValueError:
+        return 0
+
+
+def _gmpy2_backend():
+    import gmpy2
+    def gmpy2_inverse_mod(a, b):
+        try:
+            return gmpy2.invert(a, b)
+        except ZeroDivisionError:
+            return 0
+    return Backend("gmpy2", gmpy2.powmod, gmpy2_inverse_mod,
+                   gmpy2.gcd, gmpy2.lcm, gmpy2.mpz)
+
+
+def _gmpy_backend():
+    import gmpy
+    mpz = gmpy.mpz
+    def gmpy_pow_mod(base, power, modulus):
+        if power < 0:
+            return _invert_power(pow(mpz(base), -power, mpz(modulus)), modulus,
+                                 gmpy.invert)
+        return pow(mpz(base), power, mpz(modulus))
+    return Backend("gmpy", gmpy_pow_mod, gmpy.invert,
+                   gmpy.gcd, gmpy.lcm, mpz)
 
-        Uses multi bit scanning with nBitScan bits at a time.
-        From Bryan G. Olson's post to comp.lang.python
 
-        Does left-to-right instead of pow()'s right-to-left,
-        thus about 30% faster than the python built-in with small bases
+# Fastest first.
+_BACKEND_FACTORIES = (
+    ("gmpy2", _gmpy2_backend),
+    ("gmpy", _gmpy_backend),
+    ("builtin", _builtin_backend),
+    ("python", _python_backend),
+)
 
-        :param base:
-            Base
-        :param power:
-            Power
-        :param modulus:
-            Modulus
-        :returns:
-            base**pow mod modulus
-        """
-        nBitScan = 5
 
-        #TREV - Added support for negative exponents
-        negativeResult = False
-        if power < 0:
-            power *= -1
-            negativeResult = True
+def available_backends():
+    """
+    Determines the arithmetic backends that can be used on this system.
+
+    :returns:
+        A list of backend names, fastest first. ``"builtin"`` and
+        ``"python"`` are always available.
+    """
+    return [name for name, _ in _BACKEND_FACTORIES if _load_backend(name)]
+
+
+def get_backend(name=None):
+    """
+    Returns the functions of an arithmetic backend.
 
-        exp2 = 2**nBitScan
-        mask = exp2 - 1
+    :param name:
+        ``"gmpy2"``, ``"gmpy"``, ``"builtin"`` or ``"python"``.
+        ``None`` (default) returns the active backend.
+    :returns:
+        A :class:`Backend` instance.
+    :raises:
+        ``ValueError`` if the backend is unknown or not installed.
+    """
+    if name is None:
+        return _active_backend
+    backend = _load_backend(name)
+    if backend is None:
+        raise ValueError("Arithmetic backend not available: `%r`" % (name, ))
+    return backend
 
-        # Break power into a list of digits of nBitScan bits.
-        # The list is recursive so easy to read in reverse direction.
-        nibbles = None
-        while power:
-            nibbles = int(power & mask), nibbles
-            power >>= nBitScan
 
-        # Make a table of powers of base up to 2**nBitScan - 1
-        lowPowers = [1]
-        for i in xrange(1, exp2):
-            lowPowers.append((lowPowers[i-1] * base) % modulus)
+_loaded_backends = {}
+
+
+def _load_backend(name):
+    if name not in _loaded_backends:
+        factory = dict(_BACKEND_FACTORIES).get(name)
+        try:
+            _loaded_backends[name] = factory() if factory else None
+        except ImportError:
+            _loaded_backends[name] = None
+    return _loaded_backends[name]
+
+
+def _select_backend():
+    name = os.environ.get("PYOAUTH_NUMBER_BACKEND")
+    if name:
+        return get_backend(name)
+    for name, _ in _BACKEND_FACTORIES:
+        backend = _load_backend(name)
+        if backend is not None:
+            return backend
+
+
+_active_backend = _select_backend()
+
+#: Name of the arithmetic backend selected at import time. Set the
+#: ``PYOAUTH_NUMBER_BACKEND`` environment variable to override the choice.
+BACKEND = _active_backend.name
+
+pow_mod = _active_backend.pow_mod
+inverse_mod = _active_backend.inverse_mod
+gcd = _active_backend.gcd
+lcm = _active_backend.lcm
 
-        # To exponentiate by the first nibble, look it up in the table
-        nib, nibbles = nibbles
-        prod = lowPowers[nib]
-
-        # For the rest, square nBitScan times, then multiply by
-        # base^nibble
-        while nibbles:
-            nib, nibbles = nibbles
-            for i in xrange(nBitScan):
-                prod = (prod * prod) % modulus
-            if nib: prod = (prod * lowPowers[nib]) % modulus
-
-        #TREV - Added support for negative exponents
-        if negativeResult:
-            prodInv = inverse_mod(prod, modulus)
-            #Check to make sure the inverse is correct
-            assert (prod * prodInv) % modulus == 1
-            return prodInv
-        return prod
 
+if BACKEND in ("gmpy2", "gmpy"):
+    def _native_from_hex(hex_string):
+        return _active_backend.mpz(hex_string, 16)
+else:
+    _native_from_hex = None
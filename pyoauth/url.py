@@ -50,28 +50,69 @@ Parameter sanitization
 .. autofunction:: query_params_sanitize
 
 """
-import logging
 
+# Probe for Python 2 first: on Python 2, ``from urllib.parse import ...``
+# imports ``urllib`` (and with it ``socket`` and ``ssl``) before failing.
 try:
-    # Python 3.
-    from urllib.parse import urlparse, urlunparse, parse_qs as _parse_qs, quote, unquote_plus
-except ImportError:
     # Python 2.5+
     from urlparse import urlparse, urlunparse
-    from urllib import quote, unquote_plus
+except ImportError:
+    # Python 3.
+    from urllib.parse import urlparse, urlunparse, parse_qs as _parse_qs, quote, unquote_plus
+    _QUOTE_ACCEPTS_BYTEARRAY = True
+else:
+    try:
+        # Python 2.7. ``urllib`` imports ``socket`` and ``ssl``, which would
+        # dominate the import time of this module, so its quoting functions
+        # are replicated here instead.
+        from urlparse import unquote
+
+        _ALWAYS_SAFE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ" \
+                       "abcdefghijklmnopqrstuvwxyz" \
+                       "0123456789_.-"
+        _quoters = {}
+
+        def quote(s, safe="/"):
+            """
+            Same as :func:`urllib.quote` for byte strings.
+            """
+            try:
+                safe_chars, quoter = _quoters[safe]
+            except KeyError:
+                safe_chars = _ALWAYS_SAFE + safe
+                safe_map = {}
+                for i in range(256):
+                    c = chr(i)
+                    safe_map[c] = c if c in safe_chars else "%%%02X" % i
+                quoter = safe_map.__getitem__
+                _quoters[safe] = safe_chars, quoter
+            if not s.rstrip(safe_chars):
+                return s
+            return "".join(map(quoter, s))
+
+        def unquote_plus(s):
+            """
+            Same as :func:`urllib.unquote_plus`.
+            """
+            return unquote(s.replace("+", " "))
+    except ImportError:
+        from urllib import quote, unquote_plus
     try:
         # Python 2.6+
         from urlparse import parse_qs as _parse_qs
     except ImportError:
         from cgi import parse_qs as _parse_qs
+    _QUOTE_ACCEPTS_BYTEARRAY = False
 
-from pyoauth.types import is_sequence, bytes, is_bytes_or_unicode
+from pyoauth.types import is_sequence, bytes, is_bytes_or_unicode, \
+    is_buffer, buffer_to_bytes
 from pyoauth.types.unicode import to_utf8_if_unicode, unicode_to_utf8
 from pyoauth.error import InvalidQueryParametersError, \
     InsecureOAuthParametersError, \
     InvalidOAuthParametersError, \
     InsecureOAuthUrlError, \
     InvalidUrlError
+from pyoauth.log import log_warning
 
 
 def parse_qs(query_string):
@@ -87,7 +128,7 @@ def parse_qs(query_string):
     """
     query_string = to_utf8_if_unicode(query_string) or ""
     if query_string.startswith("?"):
-        logging.warning("Ignoring `?` query string prefix -- `%r`" % query_string)
+        log_warning("Ignoring `?` query string prefix -- `%r`" % query_string)
         query_string = query_string[1:]
     return _parse_qs(query_string, keep_blank_values=True)
 
@@ -104,11 +145,16 @@ def percent_encode(value):
         Query string parameter value to escape. If the value is a Unicode
         string, it will be encoded to UTF-8. A byte string is considered
         exactly that, a byte string and will not be UTF-8 encoded—however, it
-        will be percent-encoded.
+        will be percent-encoded. A ``bytearray`` or ``memoryview`` is
+        treated like a byte string and is copied at most once.
     :returns:
         Percent-encoded string.
    """
-    value = bytes(to_utf8_if_unicode(value))
+    if is_buffer(value):
+        if not (_QUOTE_ACCEPTS_BYTEARRAY and isinstance(value, bytearray)):
+            value = buffer_to_bytes(value)
+    else:
+        value = bytes(to_utf8_if_unicode(value))
     return quote(value, safe="~")
 
 
@@ -184,7 +230,7 @@ def urlencode_sl(query_params, allow_func=None):
         k = percent_encode(unicode_to_utf8(k))
         if allow_func and not allow_func(k, v):
             continue
-        elif is_bytes_or_unicode(v):
+        elif is_bytes_or_unicode(v) or is_buffer(v):
             encoded_pairs.append((k, percent_encode(v),))
         else:
             if is_sequence(v):
@@ -489,7 +535,7 @@ def request_protocol_params_sanitize(protocol_params):
             else:
                 return True
         else:
-            logging.warning("Invalid protocol parameter ignored: `%r`", n)
+            log_warning("Invalid protocol parameter ignored: `%r`", n)
             return False
     return query_filter(protocol_params, allow_func=allow_func)
 
@@ -511,7 +557,7 @@ def query_params_sanitize(query_params):
         if not n.startswith("oauth_"):
             return True
         else:
-            logging.warning("Protocol parameter ignored from URL query parameters: `%r`", n)
+            log_warning("Protocol parameter ignored from URL query parameters: `%r`", n)
             return False
     return query_filter(query_params, allow_func=allow_func)
 
@@ -534,7 +580,7 @@ def oauth_url_sanitize(url, force_secure=True):
     if force_secure and scheme != "https":
         raise InsecureOAuthUrlError("OAuth 1.0 specification requires the use of SSL/TLS for inter-server communication.")
     elif not force_secure and scheme != "https":
-        logging.warning("CAUTION: RFC specification requires the use of SSL/TLS for credential requests.")
+        log_warning("CAUTION: RFC specification requires the use of SSL/TLS for credential requests.")
     return urlunparse((scheme, netloc, path, params, query, None))
 
 
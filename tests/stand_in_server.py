@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Local stand-in OAuth 1.0 server used by the transport tests.
+
+import math
+import socket
+import threading
+import time
+
+try:
+    # Python 3.
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    # Python 2.
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from pyoauth.oauth1 import Credentials
+from pyoauth.oauth1.client import Client
+from pyoauth.protocol import parse_authorization_header_value, \
+    generate_hmac_sha1_signature, verify_body_hash
+from pyoauth.url import url_add_query, parse_qs
+
+
+CLIENT_CREDENTIALS = Credentials(identifier="dpf43f3p2l4k3l03",
+                                 shared_secret="kd94hf93k423kf44")
+TEMPORARY_CREDENTIALS = Credentials(identifier="hh5s93j4hdidpola",
+                                    shared_secret="hdhd0244k9j7ao03")
+TOKEN_CREDENTIALS = Credentials(identifier="nnch734d00sl2jdk",
+                                shared_secret="pfkkdhi9sl3r4s00")
+VERIFIER = "hfdp7dh39dks9884"
+
+# Seconds a request timestamp may differ from the server's clock.
+TIMESTAMP_WINDOW = 300
+
+_SECRETS = {
+    None: None,
+    TEMPORARY_CREDENTIALS.identifier: TEMPORARY_CREDENTIALS.shared_secret,
+    TOKEN_CREDENTIALS.identifier: TOKEN_CREDENTIALS.shared_secret,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers are written line by line; do not let Nagle's algorithm hold
+    # them back waiting for delayed ACKs.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+        self.server.track(self.request)
+
+    def finish(self):
+        try:
+            BaseHTTPRequestHandler.finish(self)
+        finally:
+            self.server.untrack(self.request)
+
+    def date_time_string(self, timestamp=None):
+        if timestamp is None:
+            timestamp = self.server.time()
+        return BaseHTTPRequestHandler.date_time_string(self, timestamp)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _respond(self, status, body, content_type="application/x-www-form-urlencoded",
+                 headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _verify(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else ""
+        self.server.requests.append((self.command, self.path, body))
+        header = self.headers.get("Authorization")
+        if not header:
+            return None
+        oauth_params, _ = parse_authorization_header_value(header)
+        oauth_params = dict((k, v[0]) for k, v in oauth_params.items())
+        url = "http://%s%s" % (self.headers.get("Host"), self.path)
+        if self.headers.get("Content-Type") == "application/x-www-form-urlencoded":
+            url = url_add_query(url, parse_qs(body))
+        token = oauth_params.get("oauth_token")
+        if token not in self.server.secrets:
+            return None
+        expected = generate_hmac_sha1_signature(CLIENT_CREDENTIALS.shared_secret,
+                                                self.command, url,
+                                                oauth_params, self.server.secrets[token])
+        if oauth_params.get("oauth_signature") != expected:
+            return None
+        if "oauth_body_hash" in oauth_params and \
+           not verify_body_hash(oauth_params["oauth_body_hash"], body):
+            return None
+        return oauth_params
+
+    def _handle(self):
+        oauth_params = self._verify()
+        if oauth_params is None:
+            self._respond(401, "oauth_problem=signature_invalid")
+        elif abs(int(oauth_params.get("oauth_timestamp", 0)) - self.server.time()) > TIMESTAMP_WINDOW:
+            self.server.timestamps_refused += 1
+            self._respond(401, "oauth_problem=timestamp_refused")
+        elif self.path.startswith("/initiate"):
+            self._respond(200, "oauth_token=%s&oauth_token_secret=%s&oauth_callback_confirmed=true" % (
+                TEMPORARY_CREDENTIALS.identifier, TEMPORARY_CREDENTIALS.shared_secret))
+        elif self.path.startswith("/token"):
+            if oauth_params.get("oauth_verifier") != VERIFIER:
+                self._respond(401, "oauth_problem=verifier_invalid")
+            else:
+                self._respond(200, "oauth_token=%s&oauth_token_secret=%s" % (
+                    TOKEN_CREDENTIALS.identifier, TOKEN_CREDENTIALS.shared_secret))
+        elif oauth_params.get("oauth_token") not in self.server.resource_tokens:
+            self._respond(401, "oauth_problem=token_rejected")
+        else:
+            allowed, headers = self.server.spend(oauth_params["oauth_token"],
+                                                 self.path.split("?")[0])
+            if allowed:
+                self._respond(200, '{"photos": []}', "application/json", headers)
+            else:
+                self._respond(429, "Rate limit exceeded", "text/plain", headers)
+
+
+class StandInOAuthServer(ThreadingMixIn, HTTPServer):
+    """
+    Minimal OAuth 1.0 provider listening on an ephemeral local port.
+
+    Verifies HMAC-SHA1 signatures, body hashes and timestamps and serves
+    ``/initiate``, ``/token`` and any other path as a protected resource.
+
+    ``clock_skew`` sets the server's clock ahead of (or, if negative,
+    behind) the local clock, for both timestamp checks and ``Date``
+    headers.
+
+    ``rate_limit``, a ``(limit, window in seconds)`` tuple, limits the
+    requests each token may make to each resource path in fixed windows.
+    Resource responses then carry ``X-Rate-Limit-*`` headers, and requests
+    over the limit get ``429`` with ``Retry-After``.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handler_class=_Handler, clock_skew=0, rate_limit=None):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), handler_class)
+        self.clock_skew = clock_skew
+        self.rate_limit = rate_limit
+        self.rate_limited = 0
+        self.secrets = dict(_SECRETS)
+        self.resource_tokens = set([TOKEN_CREDENTIALS.identifier])
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.timestamps_refused = 0
+        self.connections = 0
+        self.requests = []
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05, ))
+        self._thread.daemon = True
+        # Open connections and the threads serving them.
+        self._connections = {}
+        self._stopped = False
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops accepting connections, closes the kept-alive ones and
+        waits for their threads to finish.
+        """
+        self.shutdown()
+        self.server_close()
+        with self._lock:
+            self._stopped = True
+            connections = list(self._connections.items())
+        for request, thread in connections:
+            try:
+                # Wakes the handler blocked reading the next request.
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        for request, thread in connections:
+            thread.join(5)
+
+    def track(self, request):
+        with self._lock:
+            self._connections[request] = threading.current_thread()
+
+    def untrack(self, request):
+        with self._lock:
+            self._connections.pop(request, None)
+
+    def handle_error(self, request, client_address):
+        # Connections closed by stop() are not errors.
+        if not self._stopped:
+            HTTPServer.handle_error(self, request, client_address)
+
+    def time(self):
+        return time.time() + self.clock_skew
+
+    def add_token(self, credentials):
+        """
+        Accepts another set of token credentials for protected resources.
+        """
+        self.secrets[credentials.identifier] = credentials.shared_secret
+        self.resource_tokens.add(credentials.identifier)
+
+    def spend(self, token, path):
+        """
+        Counts a resource request against the rate limit.
+
+        :returns:
+            Tuple of the form ``(allowed, response headers)``.
+        """
+        if self.rate_limit is None:
+            return True, ()
+        limit, window = self.rate_limit
+        now = self.time()
+        start = math.floor(now / window) * window
+        reset = int(start + window)
+        with self._lock:
+            window_start, count = self._windows.get((token, path), (start, 0))
+            if window_start != start:
+                count = 0
+            allowed = count < limit
+            if allowed:
+                count += 1
+            else:
+                self.rate_limited += 1
+            self._windows[(token, path)] = (start, count)
+        headers = [("X-Rate-Limit-Limit", str(limit)),
+                   ("X-Rate-Limit-Remaining", str(limit - count)),
+                   ("X-Rate-Limit-Reset", str(reset))]
+        if not allowed:
+            headers.append(("Retry-After", str(int(math.ceil(reset - now)))))
+        return allowed, headers
+
+    def url(self, path):
+        return "http://127.0.0.1:%d%s" % (self.server_address[1], path)
+
+    def create_client(self, client_class=Client, **kwargs):
+        """
+        Creates a client whose endpoints point at this server.
+
+        The client insists on SSL/TLS endpoints, so the plain-HTTP local
+        endpoints are assigned after construction.
+        """
+        client = client_class(CLIENT_CREDENTIALS,
+                              temporary_credentials_request_uri="https://example.com/initiate",
+                              resource_owner_authorization_uri="https://example.com/authorize",
+                              token_credentials_request_uri="https://example.com/token",
+                              **kwargs)
+        client._temporary_credentials_request_uri = self.url("/initiate")
+        client._token_credentials_request_uri = self.url("/token")
+        return client
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import shutil
+import socket
+import tempfile
+
+from nose import SkipTest
+from nose.tools import assert_equal, assert_true, assert_false, assert_raises
+
+try:
+    from pyoauth.aio import asyncio, AsyncTransport, StreamTransport, \
+        AsyncSignatureVerifier, chain_future
+    from pyoauth.oauth1.client.aio import AsyncClient
+except ImportError:
+    asyncio = None
+
+from pyoauth.crypto.codec.pem.rsa import TEST_RSA_PRIVATE_KEYS
+from pyoauth.crypto.codec.pem.x509 import TEST_CERTIFICATES
+from pyoauth.crypto.rsa import write_key_blob
+from pyoauth.error import HttpError
+from pyoauth.http import RequestProxy, ResponseProxy
+from pyoauth.protocol import generate_rsa_sha1_signature
+from tests.stand_in_server import StandInOAuthServer, \
+    TEMPORARY_CREDENTIALS, TOKEN_CREDENTIALS, VERIFIER
+
+
+class _AsyncTestCase(object):
+    def setUp(self):
+        if asyncio is None:
+            raise SkipTest("asyncio or trollius is not available.")
+        self.loop = asyncio.new_event_loop()
+        self.server = StandInOAuthServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.loop.close()
+
+    def run(self, future):
+        return self.loop.run_until_complete(future)
+
+
+class Test_StreamTransport(_AsyncTestCase):
+    def test_reuses_keep_alive_connections(self):
+        transport = StreamTransport(loop=self.loop)
+        for i in range(3):
+            response = self.run(transport.fetch(RequestProxy("GET", self.server.url("/photos"))))
+            assert_equal(response.status_code, 401)
+            assert_true(response.is_body_form_urlencoded())
+        assert_equal(transport.connections_opened, 1)
+        assert_equal(self.server.connections, 1)
+        transport.close()
+
+    def test_sends_body(self):
+        transport = StreamTransport(loop=self.loop)
+        request = RequestProxy("POST", self.server.url("/photos"),
+                               body="a=b&c=d",
+                               headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.run(transport.fetch(request))
+        assert_equal(self.server.requests[-1], ("POST", "/photos", "a=b&c=d"))
+        transport.close()
+
+    def test_streams_file_body(self):
+        transport = StreamTransport(loop=self.loop)
+        # Larger than the transport's write buffer, so writing pauses.
+        body = b"0123456789abcdef" * (1 << 16)
+        stream = io.BytesIO(b"skipped" + body)
+        stream.seek(7)
+        request = RequestProxy("POST", self.server.url("/photos"), body=stream,
+                               headers={"Content-Type": "application/octet-stream"})
+        self.run(transport.fetch(request))
+        assert_equal(self.server.requests[-1], ("POST", "/photos", body))
+        assert_equal(stream.tell(), 7)
+        transport.close()
+
+    def test_timeout_closes_silent_connections(self):
+        # The kernel completes the handshake for a listening socket, but
+        # nothing ever answers.
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        try:
+            url = "http://127.0.0.1:%d/photos" % server.getsockname()[1]
+            transport = StreamTransport(loop=self.loop, timeout=0.2)
+            assert_raises(asyncio.TimeoutError, self.run,
+                          transport.fetch(RequestProxy("GET", url)))
+            assert_equal(transport._idle, {})
+            # Let the event loop close the connection.
+            self.run(asyncio.sleep(0.05, loop=self.loop))
+            connection = server.accept()[0]
+            connection.settimeout(5)
+            try:
+                data = b""
+                while True:
+                    received = connection.recv(4096)
+                    if not received:
+                        break
+                    data += received
+            finally:
+                connection.close()
+            assert_true(data.startswith(b"GET /photos HTTP/1.1\r\n"))
+            transport.close()
+        finally:
+            server.close()
+
+    def test_fetch_timeout_overrides_transport_timeout(self):
+        transport = StreamTransport(loop=self.loop, timeout=0)
+        response = self.run(transport.fetch(RequestProxy("GET", self.server.url("/photos")),
+                                            timeout=5))
+        assert_equal(response.status_code, 401)
+        transport.close()
+
+    def test_idle_connections_are_bounded(self):
+        transport = StreamTransport(loop=self.loop, max_idle_per_host=0)
+        for i in range(2):
+            self.run(transport.fetch(RequestProxy("GET", self.server.url("/photos"))))
+        assert_equal(transport.connections_opened, 2)
+        transport.close()
+
+
+class Test_AsyncClient(_AsyncTestCase):
+    def test_three_legged_flow_and_resource_request(self):
+        client = AsyncClient(self.server.create_client(), loop=self.loop,
+                             transport=StreamTransport(loop=self.loop))
+        params, temporary_credentials = self.run(
+            client.fetch_temporary_credentials(oauth_callback="http://printer.example.com/ready"))
+        assert_equal(temporary_credentials, TEMPORARY_CREDENTIALS)
+        assert_equal(params["oauth_callback_confirmed"], ["true"])
+
+        oauth_verifier = client.check_verification_code(
+            temporary_credentials, TEMPORARY_CREDENTIALS.identifier, VERIFIER)
+        params, token_credentials = self.run(
+            client.fetch_token_credentials(temporary_credentials, oauth_verifier))
+        assert_equal(token_credentials, TOKEN_CREDENTIALS)
+
+        response = self.run(client.fetch_resource(token_credentials, "GET",
+                                                  self.server.url("/photos"),
+                                                  payload_params=dict(size="original")))
+        assert_equal(response.status_code, 200)
+        assert_equal(response.body, '{"photos": []}')
+        assert_equal(client.transport.connections_opened, 1)
+        client.close()
+
+    def test_resource_responses_correct_clock_skew(self):
+        self.server.clock_skew = 600
+        client = AsyncClient(self.server.create_client(), loop=self.loop,
+                             transport=StreamTransport(loop=self.loop))
+        url = self.server.url("/photos")
+        response = self.run(client.fetch_resource(TOKEN_CREDENTIALS, "GET", url))
+        assert_equal(response.body, "oauth_problem=timestamp_refused")
+        assert_true(abs(client.client.timestamp_source.skew(url) - 600) < 2)
+        response = self.run(client.fetch_resource(TOKEN_CREDENTIALS, "GET", url))
+        assert_equal(response.status_code, 200)
+        client.close()
+
+    def test_resource_request_with_body_hash(self):
+        client = AsyncClient(self.server.create_client(), loop=self.loop,
+                             transport=StreamTransport(loop=self.loop))
+        url = self.server.url("/photos")
+        for body in (io.BytesIO(b'{"title": "Sunset"}'),
+                     iter([b'{"title": ', b'"Sunset"}'])):
+            response = self.run(client.fetch_resource(
+                TOKEN_CREDENTIALS, "POST", url, body=body,
+                headers={"Content-Type": "application/json"}))
+            assert_equal(response.status_code, 200)
+            assert_equal(self.server.requests[-1], ("POST", "/photos", b'{"title": "Sunset"}'))
+        client.close()
+
+    def test_http_errors_are_raised_from_future(self):
+        client = AsyncClient(self.server.create_client(), loop=self.loop,
+                             transport=StreamTransport(loop=self.loop))
+        future = client.fetch_token_credentials(TEMPORARY_CREDENTIALS, "bad-verifier")
+        assert_raises(HttpError, self.run, future)
+        client.close()
+
+    def test_pluggable_transport(self):
+        class CannedTransport(AsyncTransport):
+            def __init__(self, loop):
+                self.loop = loop
+                self.requests = []
+
+            def fetch(self, request):
+                self.requests.append(request)
+                future = asyncio.Future(loop=self.loop)
+                future.set_result(ResponseProxy(200, "OK", "oauth_token=a&oauth_token_secret=b",
+                                                {"Content-Type": "application/x-www-form-urlencoded"}))
+                return future
+
+        transport = CannedTransport(self.loop)
+        client = AsyncClient(self.server.create_client(), transport=transport, loop=self.loop)
+        params, credentials = self.run(client.fetch_token_credentials(TEMPORARY_CREDENTIALS, VERIFIER))
+        assert_equal(credentials.identifier, "a")
+        assert_equal(transport.requests[0].method, "POST")
+
+
+class Test_chain_future(_AsyncTestCase):
+    def test_propagates_exceptions_from_func(self):
+        future = asyncio.Future(loop=self.loop)
+        chained = chain_future(future, lambda result: 1 / result, loop=self.loop)
+        future.set_result(0)
+        assert_raises(ZeroDivisionError, self.run, chained)
+
+
+class Test_AsyncSignatureVerifier(_AsyncTestCase):
+    url = "http://photos.example.net/photos?file=vacation.jpg&size=original"
+    oauth_params = dict(oauth_consumer_key="dpf43f3p2l4k3l03",
+                        oauth_signature_method="RSA-SHA1",
+                        oauth_timestamp="1196666512",
+                        oauth_nonce="13917289812797014437")
+
+    def setUp(self):
+        _AsyncTestCase.setUp(self)
+        self.signature = generate_rsa_sha1_signature(
+            TEST_RSA_PRIVATE_KEYS[0], "GET", self.url, self.oauth_params)
+
+    def verify(self, verifier, client_certificate, method="GET"):
+        return self.run(verifier.verify_rsa_sha1_signature(
+            client_certificate, self.signature, method, self.url, self.oauth_params))
+
+    def test_default_executor(self):
+        verifier = AsyncSignatureVerifier(loop=self.loop)
+        assert_true(self.verify(verifier, TEST_CERTIFICATES[1]))
+        assert_true(self.verify(verifier, TEST_CERTIFICATES[1]))
+        assert_false(self.verify(verifier, TEST_CERTIFICATES[1], "POST"))
+        assert_false(self.verify(verifier, TEST_CERTIFICATES[0]))
+        verifier.close()
+
+    def test_process_pool_with_key_blob(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "keys.blob")
+            write_key_blob(path, dict(printer=TEST_CERTIFICATES[1],
+                                      thawte=TEST_CERTIFICATES[0]))
+            verifier = AsyncSignatureVerifier(processes=2, key_blob=path,
+                                              loop=self.loop)
+            assert_true(self.verify(verifier, "printer"))
+            assert_false(self.verify(verifier, "thawte"))
+            assert_false(self.verify(verifier, "unknown"))
+            verifier.close()
+        finally:
+            shutil.rmtree(directory)
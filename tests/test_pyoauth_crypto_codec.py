@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import mmap
+import os
+import struct
+import tempfile
+import textwrap
+
+from nose.tools import assert_equal, assert_true, assert_raises
+from pyasn1.codec.der import encoder
+
+from pyoauth.crypto.codec import private_key_pem_decode, public_key_pem_decode
+from pyoauth.crypto.codec.der import decode_private_key_info, \
+    decode_rsa_private_key, decode_public_key_info, \
+    decode_certificate_public_key
+from pyoauth.crypto.codec.pem import pem_to_der_private_key, \
+    der_to_pem_rsa_private_key, pem_to_der_public_key, pem_to_der_certificate, \
+    der_to_pem_certificate, iter_pem_blocks, iter_pem_file_blocks, \
+    CERT_PEM_HEADER, CERT_PEM_FOOTER
+from pyoauth.crypto.codec.pem.rsa import RSAPrivateKey, RSAPublicKey, \
+    TEST_RSA_PRIVATE_KEYS, TEST_PUBLIC_PEM_KEYS
+from pyoauth.crypto.codec.pem.x509 import X509Certificate, TEST_CERTIFICATES, \
+    TEST_PUBLIC_KEYS
+
+
+def _pkcs1_der(pem_key):
+    return encoder.encode(RSAPrivateKey(pem_key)._private_key_asn1)
+
+
+class Test_der_private_keys(object):
+    def test_matches_pyasn1_for_pkcs8(self):
+        for pem_key in TEST_RSA_PRIVATE_KEYS:
+            expected = RSAPrivateKey(pem_key).private_key
+            assert_equal(decode_private_key_info(pem_to_der_private_key(pem_key)),
+                         expected)
+            assert_equal(private_key_pem_decode(pem_key), expected)
+            assert_equal(set(type(value) for value in private_key_pem_decode(pem_key).values()),
+                         set([long]))
+
+    def test_matches_pyasn1_for_pkcs1(self):
+        for pem_key in TEST_RSA_PRIVATE_KEYS:
+            der = _pkcs1_der(pem_key)
+            pkcs1_pem_key = der_to_pem_rsa_private_key(der)
+            expected = RSAPrivateKey(pkcs1_pem_key).private_key
+            assert_equal(expected, RSAPrivateKey(pem_key).private_key)
+            assert_equal(decode_rsa_private_key(der), expected)
+            assert_equal(private_key_pem_decode(pkcs1_pem_key), expected)
+
+    def test_rejects_malformed_der(self):
+        der = _pkcs1_der(TEST_RSA_PRIVATE_KEYS[0])
+        assert_raises(ValueError, decode_rsa_private_key, der[:-1])
+        assert_raises(ValueError, decode_rsa_private_key, der + "\x00")
+        assert_raises(ValueError, decode_private_key_info, der)
+        # Negative modulus.
+        assert_raises(ValueError, decode_rsa_private_key,
+                      der[:7] + "\x02\x81\x81\x80" + der[11:])
+
+    def test_falls_back_to_pyasn1_for_non_der(self):
+        pem_key = TEST_RSA_PRIVATE_KEYS[0]
+        der = _pkcs1_der(pem_key)
+        # Long-form length for the version INTEGER is valid BER but not DER.
+        length = struct.unpack(">H", der[2:4])[0] + 1
+        ber = "\x30\x82" + struct.pack(">H", length) + "\x02\x81\x01\x00" + der[7:]
+        assert_raises(ValueError, decode_rsa_private_key, ber)
+        assert_equal(private_key_pem_decode(der_to_pem_rsa_private_key(ber)),
+                     RSAPrivateKey(pem_key).private_key)
+
+
+class Test_der_public_keys(object):
+    def test_certificates_match_pyasn1(self):
+        for pem_certificate in TEST_CERTIFICATES:
+            certificate = X509Certificate(pem_certificate)
+            key = decode_certificate_public_key(pem_to_der_certificate(pem_certificate))
+            assert_true((key["modulus"], key["exponent"]) in TEST_PUBLIC_KEYS)
+            assert_equal(certificate.public_key, key)
+            # The public key is read without decoding the certificate.
+            assert_equal(certificate._asn1, None)
+            bits = certificate.subject_public_key_info.getComponentByName('subjectPublicKey')
+            assert_equal(X509Certificate.parse_public_rsa_key_bits(bits),
+                         (key["modulus"], key["exponent"]))
+            assert_equal(public_key_pem_decode(pem_certificate), key)
+
+    def test_public_keys_match_pyasn1(self):
+        for pem_key in TEST_PUBLIC_PEM_KEYS:
+            expected = RSAPublicKey(pem_key).public_key
+            assert_equal(decode_public_key_info(pem_to_der_public_key(pem_key)),
+                         expected)
+            assert_equal(public_key_pem_decode(pem_key), expected)
+
+    def test_rejects_truncated_certificate(self):
+        der = pem_to_der_certificate(TEST_CERTIFICATES[0])
+        assert_raises(ValueError, decode_certificate_public_key, der[:-1])
+        assert_raises(ValueError, decode_certificate_public_key, der[:200])
+
+
+def _bundle():
+    certificate = TEST_CERTIFICATES[1].strip()
+    begin, rest = certificate.split("\n", 1)
+    return "\n".join([
+        "Certificate:",
+        "    Subject: CN=Test Principal",
+        begin,
+        "Consumer-Key: printer",
+        "Comment: issued for the",
+        "  printing service",
+        "",
+        rest,
+        "trailing text",
+        TEST_PUBLIC_PEM_KEYS[0].strip(),
+    ])
+
+
+class Test_iter_pem_blocks(object):
+    def check_blocks(self, blocks):
+        certificate = TEST_CERTIFICATES[1].strip()
+        assert_equal([label for label, _, _ in blocks], ["CERTIFICATE", "PUBLIC KEY"])
+        assert_equal(blocks[0][1], {"Consumer-Key": "printer",
+                                    "Comment": "issued for the printing service"})
+        assert_equal(blocks[0][2], pem_to_der_certificate(certificate))
+        assert_equal(blocks[1][1], {})
+        assert_equal(blocks[1][2], pem_to_der_public_key(TEST_PUBLIC_PEM_KEYS[0]))
+
+    def test_strings_lines_and_files(self):
+        bundle = _bundle()
+        self.check_blocks(list(iter_pem_blocks(bundle)))
+        self.check_blocks(list(iter_pem_blocks(bundle.splitlines(True))))
+        fd, path = tempfile.mkstemp()
+        try:
+            os.write(fd, bundle)
+            os.close(fd)
+            self.check_blocks(list(iter_pem_file_blocks(path)))
+            with open(path, "rb") as pem_file:
+                region = mmap.mmap(pem_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.check_blocks(list(iter_pem_blocks(region)))
+            region.close()
+            open(path, "wb").close()
+            assert_equal(list(iter_pem_file_blocks(path)), [])
+        finally:
+            os.remove(path)
+
+    def test_rejects_unterminated_blocks(self):
+        certificate = TEST_CERTIFICATES[1].strip()
+        assert_raises(ValueError, list, iter_pem_blocks(certificate.rsplit("\n", 1)[0]))
+        assert_raises(ValueError, list, iter_pem_blocks(
+            certificate.replace("END CERTIFICATE", "END PUBLIC KEY")))
+        assert_raises(ValueError, list, iter_pem_blocks(
+            certificate.replace("END CERTIFICATE", "END PUBLIC KEY").splitlines()))
+
+
+class Test_pem_der(object):
+    def test_der_to_pem_uses_64_column_lines(self):
+        for pem_certificate in TEST_CERTIFICATES:
+            der = pem_to_der_certificate(pem_certificate)
+            base64 = textwrap.fill(der.encode("base64").replace("\n", ""), 64)
+            assert_equal(der_to_pem_certificate(der),
+                         "%s\n%s\n%s\n" % (CERT_PEM_HEADER, base64, CERT_PEM_FOOTER))
+
+    def test_pem_to_der_ignores_surrounding_text_and_headers(self):
+        bundle = _bundle()
+        der = pem_to_der_certificate(TEST_CERTIFICATES[1])
+        assert_equal(pem_to_der_certificate(bundle), der)
+        assert_equal(pem_to_der_public_key(bundle),
+                     pem_to_der_public_key(TEST_PUBLIC_PEM_KEYS[0]))
+        assert_raises(ValueError, pem_to_der_private_key, bundle)
+        assert_equal(public_key_pem_decode(bundle),
+                     public_key_pem_decode(TEST_CERTIFICATES[1]))
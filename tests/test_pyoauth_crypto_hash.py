@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import mmap
+import tempfile
+
+from nose.tools import assert_equal
+
+from pyoauth.crypto.hash import sha1_digest, sha1_hex_digest, \
+    sha1_base64_digest, md5_hex_digest, hmac_sha1_digest, \
+    hmac_sha1_base64_digest, sha1_stream_digest, sha1_stream_hex_digest, \
+    sha1_stream_base64_digest, md5_stream_digest, md5_stream_hex_digest, \
+    hmac_sha1_stream_digest, hmac_sha1_stream_base64_digest
+
+
+DATA = b"".join(chr(i % 251) for i in range(100003))
+KEY = b"kd94hf93k423kf44&pfkkdhi9sl3r4s00"
+
+
+class Test_stream_digests(object):
+    def sources(self):
+        yield DATA
+        yield bytearray(DATA)
+        yield memoryview(DATA)
+        yield io.BytesIO(DATA)
+        yield (DATA[i:i + 4096] for i in range(0, len(DATA), 4096))
+
+    def test_match_in_memory_digests(self):
+        for source in self.sources():
+            assert_equal(sha1_stream_hex_digest(source, 1000), sha1_hex_digest(DATA))
+        for source in self.sources():
+            assert_equal(md5_stream_hex_digest(source, 1000), md5_hex_digest(DATA))
+        for source in self.sources():
+            assert_equal(hmac_sha1_stream_digest(KEY, source, 1000),
+                         hmac_sha1_digest(KEY, DATA))
+        assert_equal(sha1_stream_base64_digest(DATA), sha1_base64_digest(DATA))
+        assert_equal(hmac_sha1_stream_base64_digest(KEY, DATA),
+                     hmac_sha1_base64_digest(KEY, DATA))
+
+    def test_files_and_mmap(self):
+        f = tempfile.TemporaryFile()
+        try:
+            f.write(DATA)
+            f.flush()
+            f.seek(0)
+            assert_equal(sha1_stream_digest(f, 4096), sha1_digest(DATA))
+            # Reads from the current position.
+            f.seek(3)
+            assert_equal(sha1_stream_digest(f), sha1_digest(DATA[3:]))
+            region = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                assert_equal(sha1_stream_digest(region), sha1_digest(DATA))
+                assert_equal(md5_stream_digest(region), md5_stream_digest(DATA))
+            finally:
+                region.close()
+        finally:
+            f.close()
+
+    def test_empty(self):
+        assert_equal(sha1_stream_digest(io.BytesIO()), sha1_digest())
+        assert_equal(sha1_stream_digest(iter([])), sha1_digest())
+
+    def test_sha1_base64_digest_accepts_many_inputs(self):
+        assert_equal(sha1_base64_digest(b"a", b"bc"), sha1_base64_digest(b"abc"))
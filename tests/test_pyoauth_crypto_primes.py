@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+
+from nose.tools import assert_equal, assert_true, assert_false
+
+from pyoauth.crypto import primes
+from pyoauth.crypto.primes import is_prime, get_sieve
+
+
+def naive_is_prime(n):
+    if n < 2:
+        return False
+    i = 2
+    while i * i <= n:
+        if not n % i:
+            return False
+        i += 1
+    return True
+
+
+class Test_sieve(object):
+    def test_not_built_at_import(self):
+        code = "import pyoauth.crypto.primes as p; print(p._sieve is None)"
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert_equal(output.strip(), "True")
+
+    def test_contains_only_primes_below_1000(self):
+        sieve = get_sieve()
+        assert_equal(len(sieve), 168)
+        assert_equal(sieve, [n for n in range(1000) if naive_is_prime(n)])
+        assert_true(get_sieve() is sieve)
+
+    def test_module_attribute_is_loaded_on_first_read(self):
+        code = ("import pyoauth.crypto.primes as p; built = p._sieve is not None; "
+                "from pyoauth.crypto.primes import sieve; "
+                "print((built, sieve is p.get_sieve()))")
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert_equal(output.strip(), "(False, True)")
+
+
+class Test_is_prime(object):
+    def test_matches_trial_division(self):
+        for n in range(20000):
+            assert_equal(is_prime(n), naive_is_prime(n), n)
+
+    def test_rejects_pseudoprimes(self):
+        # Carmichael numbers and strong pseudoprimes to base 2.
+        for n in (1105, 1729, 2047, 3277, 4033, 4681, 8321, 15841,
+                  3215031751, 3825123056546413051):
+            assert_false(is_prime(n), n)
+
+    def test_strong_lucas_pseudoprimes(self):
+        for n in (5459, 5777, 10877, 16109, 18971):
+            assert_true(primes._python_is_strong_lucas_probable_prime(n))
+            assert_true(primes._is_strong_lucas_probable_prime(n))
+            assert_false(is_prime(n))
+
+    def test_python_tests_match_backend(self):
+        for n in (2 ** 89 - 1, 2 ** 127 - 1, 1009 * 1013, 5459 * 1019,
+                  (2 ** 61 - 1) * (2 ** 89 - 1)):
+            d, s = n - 1, 0
+            while not d & 1:
+                d, s = d >> 1, s + 1
+            assert_equal(primes._python_is_strong_probable_prime(n, 2, d, s),
+                         bool(primes._is_strong_probable_prime(n, 2, d, s)))
+            assert_equal(primes._python_is_strong_lucas_probable_prime(n),
+                         bool(primes._is_strong_lucas_probable_prime(n)))
+
+    def test_large_numbers(self):
+        for exponent in (89, 127, 521, 607):
+            assert_true(is_prime(2 ** exponent - 1))
+            assert_true(is_prime(2 ** exponent - 1, 8))
+        assert_false(is_prime((2 ** 89 - 1) * (2 ** 127 - 1)))
+        assert_false(is_prime((2 ** 521 - 1) ** 2))
+
+    def test_zero_iterations_only_checks_small_factors(self):
+        assert_true(is_prime(1009 * 1013, 0))
+        assert_false(is_prime(1009 * 997, 0))
+        assert_false(is_prime(1009 * 1013))
+
+
+class Test_sieve_window(object):
+    def test_matches_trial_division(self):
+        window_primes = primes.make_prime_sieve(primes._WINDOW_SIEVE_LIMIT)[1:]
+        for start, step in ((10 ** 12 + 1, 2), (3, 2), (2 * 10 ** 12 + 3, 4)):
+            flags = primes._sieve_window(start, 3000, step)
+            for i in range(3000):
+                n = start + step * i
+                expected = n in window_primes or \
+                           all(n % p for p in window_primes)
+                assert_equal(bool(flags[i]), expected, n)
+
+
+class Test_generate_random_prime(object):
+    def test_bit_length_and_primality(self):
+        for bits in (10, 16, 64, 256):
+            p = primes.generate_random_prime(bits)
+            assert_true(is_prime(p))
+            assert_equal(p >> (bits - 2), 3)
+
+    def test_safe_prime(self):
+        for bits in (10, 64, 128):
+            p = primes.generate_random_safe_prime(bits)
+            assert_true(is_prime(p))
+            assert_true(is_prime((p - 1) // 2))
+            assert_equal(p >> (bits - 1), 1)
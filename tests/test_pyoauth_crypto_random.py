@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_equal, assert_true, assert_raises
+
+from pyoauth.crypto.random import generate_random_long, generate_random_longs
+
+
+class Test_generate_random_longs(object):
+    def test_values_in_range(self):
+        for low, high in ((0, 1 << 8), (2, 1 << 64), (3 << 1022, 1 << 1024),
+                          (10 ** 30, 10 ** 30 + 7)):
+            values = generate_random_longs(low, high, 200)
+            assert_equal(len(values), 200)
+            for value in values:
+                assert_true(low <= value < high, value)
+
+    def test_uses_full_width_of_range(self):
+        for low, high in ((0, 1 << 64), (3 << 1022, 1 << 1024)):
+            values = generate_random_longs(low, high, 64)
+            # Each value has less than a 2 ** -16 chance of missing the
+            # top 16 bits of the range.
+            assert_true(max(values) - low > (high - low) >> 8)
+            assert_true(len(set(values)) == 64)
+
+    def test_covers_small_range(self):
+        assert_equal(set(generate_random_longs(5, 9, 400)), set([5, 6, 7, 8]))
+
+    def test_single_value_range(self):
+        assert_equal(generate_random_longs(7, 8, 3), [7, 7, 7])
+        assert_equal(generate_random_long(7, 8), 7)
+
+    def test_zero_count(self):
+        assert_equal(generate_random_longs(0, 100, 0), [])
+
+    def test_ValueError_when_range_empty(self):
+        assert_raises(ValueError, generate_random_longs, 5, 5, 1)
+        assert_raises(ValueError, generate_random_long, 6, 5)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from nose import SkipTest
+from pyasn1.error import PyAsn1Error
+from nose.tools import assert_equal, assert_true, assert_false, assert_raises
+
+from pyoauth.crypto.codec import private_key_pem_decode, public_key_pem_decode, \
+    private_key_pem_encode, public_key_pem_encode
+from pyoauth.crypto.codec.pem.rsa import TEST_RSA_PRIVATE_KEYS, \
+    TEST_PUBLIC_PEM_KEYS
+from pyoauth.crypto.codec.pem import pem_to_der_certificate
+from pyoauth.crypto.codec.pem.x509 import TEST_CERTIFICATES
+from pyoauth.crypto.hash import sha1_digest, sha1_hex_digest
+from pyoauth.crypto.rsa import native, create_private_key, create_public_key, \
+    generate_key_pair, generate_key_pairs, Keyring, KeyBlob, write_key_blob
+from pyoauth.types import bit_count
+from pyoauth.types.number import get_backend
+
+try:
+    from pyoauth.crypto.rsa import pycrypto
+except ImportError:
+    pycrypto = None
+
+
+PRIVATE_KEY = TEST_RSA_PRIVATE_KEYS[0].strip()
+PUBLIC_KEY = TEST_PUBLIC_PEM_KEYS[0].strip()
+DIGEST = sha1_digest("GET&http%3A%2F%2Fphotos.example.net%2Fphotos")
+
+# A certificate for an elliptic-curve key, which cannot be read as RSA.
+EC_CERTIFICATE = """-----BEGIN CERTIFICATE-----
+MIIBfzCCASWgAwIBAgIUCv8TSoZ6yc5T92hJboWwwoyo2lgwCgYIKoZIzj0EAwIw
+FTETMBEGA1UEAwwKRUMgUGFydG5lcjAeFw0yNjEwMTkwOTQ4MTNaFw0zNjEwMTYw
+OTQ4MTNaMBUxEzARBgNVBAMMCkVDIFBhcnRuZXIwWTATBgcqhkjOPQIBBggqhkjO
+PQMBBwNCAARbce2+zDMItYhDxwFRNPq4YGDjlPzu8Z636ICb7az0kJLxeN+PPhMo
+JJASyiHCaWFHV1PJ6aMQ9JdEvORXDdP0o1MwUTAdBgNVHQ4EFgQU3+8yPA9WKix/
+l2Rx8FYCI5r2KFEwHwYDVR0jBBgwFoAU3+8yPA9WKix/l2Rx8FYCI5r2KFEwDwYD
+VR0TAQH/BAUwAwEB/zAKBggqhkjOPQQDAgNIADBFAiEApi5zxMcJOI7+a9uHrzdX
+LxRMS8qX2X5nk6XhaxOHRh8CIAM2jwe5KaUIvmg244S/b1fLvvvVJ8bP/OAvEUjD
+30Qy
+-----END CERTIFICATE-----
+"""
+
+
+class Test_native(object):
+    def setUp(self):
+        self.private_key = native.PrivateKey(private_key_pem_decode(PRIVATE_KEY),
+                                             PRIVATE_KEY, "PEM")
+        self.public_key = native.PublicKey(public_key_pem_decode(PUBLIC_KEY),
+                                           PUBLIC_KEY, "PEM")
+
+    def test_components_are_backend_integers(self):
+        mpz = get_backend().mpz
+        for key in (self.private_key, self.public_key):
+            for value in (key._n, key._e):
+                assert_true(isinstance(value, mpz))
+        assert_true(isinstance(self.private_key._d, mpz))
+
+    def test_key_matches_pycrypto(self):
+        key_info = self.private_key.key_info
+        assert_equal(self.private_key.key.n, key_info["modulus"])
+        assert_equal(self.private_key.key.d, key_info["privateExponent"])
+        assert_true(self.private_key.key.has_private())
+        assert_false(self.public_key.key.has_private())
+        if pycrypto is None:
+            raise SkipTest("PyCrypto is not installed.")
+        reference = pycrypto.PrivateKey(key_info, PRIVATE_KEY, "PEM")
+        assert_equal(type(self.private_key.key), type(reference.key))
+
+    def test_sign_refuses_faulty_signature(self):
+        # A wrong half-signature would leak p through gcd(s^e - m, n).
+        self.private_key._dq += 2
+        assert_raises(RuntimeError, self.private_key.pkcs1_v1_5_sign, DIGEST)
+
+    def test_sign_blinds_message(self):
+        calls = []
+        original = native.generate_random_long
+        def generate_random_long(low, high):
+            calls.append((low, high))
+            return original(low, high)
+        native.generate_random_long = generate_random_long
+        try:
+            self.private_key.pkcs1_v1_5_sign(DIGEST)
+        finally:
+            native.generate_random_long = original
+        assert_equal(calls, [(2, self.private_key.key_info["modulus"])])
+
+    def test_sign_and_verify(self):
+        signature = self.private_key.pkcs1_v1_5_sign(DIGEST)
+        assert_true(self.public_key.pkcs1_v1_5_verify(DIGEST, signature))
+        assert_true(self.private_key.pkcs1_v1_5_verify(DIGEST, signature))
+        assert_false(self.public_key.pkcs1_v1_5_verify(sha1_digest("tampered"), signature))
+        assert_false(self.public_key.pkcs1_v1_5_verify(DIGEST, "\x00" * len(signature)))
+
+    def test_public_key_cannot_sign(self):
+        assert_raises(TypeError, self.public_key.pkcs1_v1_5_sign, DIGEST)
+
+    def test_matches_pycrypto(self):
+        if pycrypto is None:
+            raise SkipTest("PyCrypto is not installed.")
+        reference = pycrypto.PrivateKey(private_key_pem_decode(PRIVATE_KEY),
+                                        PRIVATE_KEY, "PEM")
+        assert_equal(self.private_key.pkcs1_v1_5_sign(DIGEST),
+                     reference.pkcs1_v1_5_sign(DIGEST))
+
+
+class Test_pem_encode(object):
+    def test_round_trips_test_keys(self):
+        assert_equal(private_key_pem_encode(private_key_pem_decode(PRIVATE_KEY)),
+                     PRIVATE_KEY + "\n")
+        assert_equal(public_key_pem_encode(public_key_pem_decode(PUBLIC_KEY)),
+                     PUBLIC_KEY + "\n")
+
+
+class Test_generate_key_pair(object):
+    def check_key_pair(self, private_key, public_key, bits):
+        n = private_key.key_info["modulus"]
+        assert_equal(bit_count(n), bits)
+        assert_equal(public_key.key_info, dict(modulus=n, exponent=65537))
+        assert_equal(create_private_key(private_key.encoded_key).key_info,
+                     private_key.key_info)
+        assert_equal(create_public_key(public_key.encoded_key).key_info,
+                     public_key.key_info)
+        signature = private_key.pkcs1_v1_5_sign(DIGEST)
+        assert_true(public_key.pkcs1_v1_5_verify(DIGEST, signature))
+
+    def test_in_process(self):
+        for bits in (512, 513):
+            private_key, public_key = generate_key_pair(bits, processes=1)
+            self.check_key_pair(private_key, public_key, bits)
+
+    def test_process_pool(self):
+        key_pairs = generate_key_pairs(2, 512, processes=2)
+        assert_equal(len(key_pairs), 2)
+        for private_key, public_key in key_pairs:
+            self.check_key_pair(private_key, public_key, 512)
+        assert_true(key_pairs[0][0].key_info != key_pairs[1][0].key_info)
+
+    def test_ValueError_when_exponent_even(self):
+        assert_raises(ValueError, generate_key_pair, 512, 65536, 1)
+
+
+def _with_consumer_key(pem, consumer_key):
+    begin, rest = pem.strip().split("\n", 1)
+    return "%s\nConsumer-Key: %s\n\n%s\n" % (begin, consumer_key, rest)
+
+
+class Test_Keyring(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fingerprints = [sha1_hex_digest(pem_to_der_certificate(pem))
+                             for pem in TEST_CERTIFICATES]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as pem_file:
+            pem_file.write(content)
+        return path
+
+    def test_indexes_bundles_by_consumer_key_and_fingerprint(self):
+        self.write("bundle.pem", "Partner certificates\n" +
+                   _with_consumer_key(TEST_CERTIFICATES[0], "thawte") +
+                   "Subject: CN=Test Principal\n" +
+                   _with_consumer_key(TEST_CERTIFICATES[1], "printer"))
+        self.write("photos.example.net.key", PRIVATE_KEY)
+        self.write("README", PUBLIC_KEY)
+        keyring = Keyring([self.directory])
+        assert_equal(len(keyring), 3)
+        assert_equal(sorted(keyring.consumer_keys()),
+                     ["photos.example.net", "printer", "thawte"])
+        assert_equal(keyring.get("printer").key_info,
+                     public_key_pem_decode(TEST_CERTIFICATES[1]))
+        assert_true(keyring.get("printer") is keyring.get_by_fingerprint(self.fingerprints[1]))
+        colons = ":".join(self.fingerprints[0][i:i + 2]
+                          for i in range(0, 40, 2)).upper()
+        assert_true(keyring.get_by_fingerprint(colons) is keyring.get("thawte"))
+        signature = keyring.get("photos.example.net").pkcs1_v1_5_sign(DIGEST)
+        assert_true(keyring.get("printer").pkcs1_v1_5_verify(DIGEST, signature))
+        assert_equal(keyring.get("unknown"), None)
+
+    def test_reloads_changed_files_only(self):
+        path = self.write("printer.pem", TEST_CERTIFICATES[1])
+        keyring = Keyring()
+        assert_equal(keyring.load(self.directory), 1)
+        key = keyring.get("printer")
+        assert_equal(keyring.reload(), 0)
+        assert_true(keyring.get("printer") is key)
+
+        self.write("thawte.crt", TEST_CERTIFICATES[0])
+        assert_equal(keyring.reload(), 1)
+        assert_true(keyring.get("printer") is key)
+        assert_true("thawte" in keyring)
+
+        self.write("printer.pem", TEST_CERTIFICATES[0] + "\n")
+        os.utime(path, (0, 0))
+        assert_equal(keyring.reload(), 1)
+        assert_equal(keyring.get("printer").key_info,
+                     keyring.get("thawte").key_info)
+        assert_equal(keyring.get_by_fingerprint(self.fingerprints[1]), None)
+
+        os.remove(path)
+        assert_equal(keyring.reload(), 1)
+        assert_false("printer" in keyring)
+        assert_equal(len(keyring), 1)
+
+    def test_later_files_win_and_removals_restore_shadowed_keys(self):
+        first = self.write("a.pem", _with_consumer_key(TEST_CERTIFICATES[0], "partner"))
+        second = self.write("b.pem", _with_consumer_key(TEST_CERTIFICATES[1], "partner") +
+                            TEST_CERTIFICATES[0])
+        keyring = Keyring([self.directory])
+        assert_true(keyring.get("partner") is keyring.get_by_fingerprint(self.fingerprints[1]))
+
+        self.write("b.pem", TEST_CERTIFICATES[1])
+        os.utime(second, (0, 0))
+        assert_equal(keyring.reload(), 1)
+        assert_true(keyring.get("partner") is keyring.get_by_fingerprint(self.fingerprints[0]))
+        assert_true(keyring.get("b") is keyring.get_by_fingerprint(self.fingerprints[1]))
+
+        # Keys added by hand win over files, whatever is reloaded.
+        keyring.add_pem(_with_consumer_key(TEST_CERTIFICATES[0], "partner"))
+        added = keyring.get("partner")
+        assert_true(added is keyring.get_by_fingerprint(self.fingerprints[0]))
+        os.utime(first, (0, 0))
+        assert_equal(keyring.reload(), 1)
+        assert_true(keyring.get("partner") is added)
+
+        # Lookups that started before a reload keep a complete index.
+        indexes = keyring._indexes
+        os.remove(second)
+        assert_equal(keyring.reload(), 1)
+        assert_true(indexes[1][self.fingerprints[1]] is not None)
+        assert_equal(keyring.get_by_fingerprint(self.fingerprints[1]), None)
+        assert_equal(len(keyring), 1)
+
+    def test_skips_unreadable_blocks_and_files(self):
+        self.write("alice.pem", TEST_CERTIFICATES[0])
+        self.write("bob.pem", TEST_CERTIFICATES[1] + EC_CERTIFICATE)
+        self.write("eve.pem", EC_CERTIFICATE)
+        self.write("mallory.pem", "-----BEGIN CERTIFICATE-----\nnot base64\n"
+                                  "-----END CERTIFICATE-----\n")
+        self.write("zed.pem", PUBLIC_KEY)
+        keyring = Keyring()
+        assert_equal(keyring.load(self.directory), 3)
+        assert_equal(sorted(keyring.consumer_keys()), ["alice", "zed"])
+        assert_true(keyring.get_by_fingerprint(self.fingerprints[1]) is not None)
+
+        # Skipped files are not parsed again until they change.
+        assert_equal(keyring.reload(), 0)
+        self.write("eve.pem", TEST_CERTIFICATES[1])
+        os.utime(os.path.join(self.directory, "eve.pem"), (0, 0))
+        assert_equal(keyring.reload(), 1)
+        assert_true("eve" in keyring)
+
+    def test_skips_files_removed_while_loading(self):
+        self.write("alice.pem", TEST_CERTIFICATES[0])
+        self.write("bob.pem", TEST_CERTIFICATES[1])
+        keyring = Keyring()
+        parse_file = keyring._parse_file
+        def _parse_file(path):
+            if path.endswith("alice.pem"):
+                os.remove(path)
+            return parse_file(path)
+        keyring._parse_file = _parse_file
+        assert_equal(keyring.load(self.directory), 1)
+        assert_true("bob" in keyring)
+
+    def test_add_pem_raises_for_unreadable_keys(self):
+        assert_raises((NotImplementedError, PyAsn1Error), Keyring().add_pem,
+                      EC_CERTIFICATE)
+
+    def test_add_pem(self):
+        keyring = Keyring()
+        assert_equal(keyring.add_pem(TEST_CERTIFICATES[1], "printer"),
+                     [self.fingerprints[1]])
+        assert_true("printer" in keyring)
+
+
+class Test_KeyBlob(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "keys.blob")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        keys = {
+            "printer": "Subject: CN=Test Principal\n" + TEST_CERTIFICATES[1],
+            "thawte": TEST_CERTIFICATES[0],
+            u"photos.example.net": PRIVATE_KEY,
+            "public": PUBLIC_KEY,
+        }
+        assert_equal(write_key_blob(self.path, keys), 4)
+        blob = KeyBlob(self.path)
+        assert_equal(len(blob), 4)
+        assert_equal(blob.names(), sorted(keys))
+        for name, pem_key in keys.items():
+            assert_true(name in blob)
+            if name == "photos.example.net":
+                assert_equal(blob.get(name).key_info, private_key_pem_decode(pem_key))
+            else:
+                assert_equal(blob.get(name).key_info, public_key_pem_decode(pem_key))
+            assert_true(blob.get(name) is blob.get(name))
+        signature = blob.get("photos.example.net").pkcs1_v1_5_sign(DIGEST)
+        assert_true(blob.get("printer").pkcs1_v1_5_verify(DIGEST, signature))
+        assert_false("unknown" in blob)
+        assert_equal(blob.get("unknown"), None)
+        blob.close()
+
+    def test_stores_integers_and_decodes_no_asn1(self):
+        key = create_public_key(TEST_CERTIFICATES[1])
+        write_key_blob(self.path, dict(printer=key, partner=PRIVATE_KEY))
+        with open(self.path, "rb") as blob_file:
+            data = blob_file.read()
+        assert_false(pem_to_der_certificate(TEST_CERTIFICATES[1]) in data)
+        code = ("import sys; from pyoauth.crypto.rsa import KeyBlob; "
+                "blob = KeyBlob(%r); blob.get('printer').size; "
+                "blob.get('partner').size; "
+                "print([name for name in sys.modules if name.startswith('pyasn1') "
+                "or name.startswith('pyoauth.crypto.codec')])" % self.path)
+        output = subprocess.Popen([sys.executable, "-c", code],
+                                  stdout=subprocess.PIPE).communicate()[0]
+        assert_equal(output.strip(), b"[]")
+
+        blob = KeyBlob(self.path)
+        assert_equal(public_key_pem_decode(blob.get("printer").encoded_key),
+                     key.key_info)
+        assert_equal(private_key_pem_decode(blob.get("partner").encoded_key),
+                     private_key_pem_decode(PRIVATE_KEY))
+        blob.close()
+
+    def test_rejects_invalid_input(self):
+        assert_raises(ValueError, write_key_blob, self.path, [("a", "not a key")])
+        assert_raises(ValueError, write_key_blob, self.path,
+                      [("a", PUBLIC_KEY), ("a", PUBLIC_KEY)])
+        with open(self.path, "wb") as blob_file:
+            blob_file.write("x" * 64)
+        assert_raises(ValueError, KeyBlob, self.path)
+
+
+class Test_lazy_import(object):
+    def test_import_loads_no_implementation_or_codec(self):
+        code = ("import sys, pyoauth.crypto.rsa; "
+                "print(sorted(m for m in ('Crypto', 'pyasn1', 'multiprocessing', "
+                "'pyoauth.crypto.codec', 'pyoauth.crypto.primes') "
+                "if sys.modules.get(m) is not None))")
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert_equal(output.strip(), "[]")
+
+    def test_module_attributes_load_implementation(self):
+        code = ("import sys, pyoauth.crypto.rsa as rsa; "
+                "loaded = rsa._implementation is not None; "
+                "from pyoauth.crypto.rsa import IMPLEMENTATION, PrivateKey, PublicKey; "
+                "print((loaded, IMPLEMENTATION == rsa.get_implementation(), "
+                "PrivateKey.__module__ == PublicKey.__module__ == "
+                "'pyoauth.crypto.rsa.' + IMPLEMENTATION))")
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert_equal(output.strip(), "(False, True, True)")
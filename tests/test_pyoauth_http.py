@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+import pickle
+
+try:
+    # Python 3.3+
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2.6+
+    from collections import MutableMapping
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_raises
+from pyoauth.http import Headers, RequestProxy, ResponseProxy
+
+
+class FrameworkRequest(RequestProxy):
+    def __init__(self, native):
+        RequestProxy.__init__(self, "GET", "http://example.com/")
+        self.native = native
+
+
+class Test_Headers(object):
+    def test_lookup_is_case_insensitive(self):
+        headers = Headers({"Content-Type": "text/plain"})
+        assert_equal(headers["content-type"], "text/plain")
+        assert_equal(headers.get("CONTENT-TYPE"), "text/plain")
+        assert_true("content-TYPE" in headers)
+        assert_equal(headers.get("Accept"), None)
+        assert_raises(KeyError, headers.__getitem__, "Accept")
+
+    def test_keeps_original_names(self):
+        headers = Headers([("X-Foo", "a"), ("x-foo", "b")])
+        assert_equal(list(headers), ["X-Foo"])
+        assert_equal(headers.all_items(), [("X-Foo", "a"), ("X-Foo", "b")])
+
+    def test_multiple_values(self):
+        headers = Headers([("Set-Cookie", "a=1")])
+        headers.add("set-cookie", "b=2")
+        assert_equal(headers.get_all("SET-COOKIE"), ["a=1", "b=2"])
+        assert_equal(headers["Set-Cookie"], "a=1, b=2")
+        assert_equal(len(headers), 1)
+        assert_equal(Headers({"Accept": ["a", "b"]}).get_all("accept"), ["a", "b"])
+        assert_equal(headers.get_all("Accept"), [])
+
+    def test_setitem_replaces_and_delitem_removes(self):
+        headers = Headers([("Accept", "a"), ("Accept", "b")])
+        headers["ACCEPT"] = "c"
+        assert_equal(headers.get_all("accept"), ["c"])
+        del headers["accept"]
+        assert_false("Accept" in headers)
+        assert_raises(KeyError, headers.__delitem__, "accept")
+
+    def test_equality_ignores_case(self):
+        assert_equal(Headers({"Content-Type": "a"}), Headers({"content-type": "a"}))
+        assert_equal(Headers({"Content-Type": "a"}), {"CONTENT-TYPE": "a"})
+        assert_true(Headers({"Content-Type": "a"}) != Headers({"Content-Type": "b"}))
+
+    def test_copy_is_independent(self):
+        headers = Headers({"Accept": "a"})
+        copy = headers.copy()
+        copy.add("Accept", "b")
+        assert_equal(headers.get_all("Accept"), ["a"])
+
+
+class Test_proxies(object):
+    def test_request_headers_are_header_maps(self):
+        request = RequestProxy("GET", "http://example.com/", headers={"Host": "example.com"})
+        assert_equal(request.headers["host"], "example.com")
+        assert_equal(RequestProxy("GET", "http://example.com/").headers, {})
+
+    def test_request_body_is_not_copied(self):
+        data = b"\x00" * 1024
+        for body in (data, bytearray(data), memoryview(data)):
+            assert_true(RequestProxy("POST", "http://example.com/", body).body is body)
+
+    def test_response_get_header(self):
+        response = ResponseProxy(200, "OK", "", [("Content-Type", "text/plain"),
+                                                 ("Via", "a"), ("via", "b")])
+        assert_equal(response.get_header("content-type"), "text/plain")
+        assert_equal(response.content_type, "text/plain")
+        assert_equal(response.headers.get_all("VIA"), ["a", "b"])
+        assert_equal(response.get_header("X-Missing"), None)
+
+
+class Test_slots(object):
+    def test_no_instance_dict(self):
+        assert_false(hasattr(RequestProxy("GET", "http://example.com/"), "__dict__"))
+        assert_false(hasattr(ResponseProxy(200, "OK", ""), "__dict__"))
+        assert_false(hasattr(Headers(), "__dict__"))
+
+    def test_headers_are_a_mutable_mapping(self):
+        headers = Headers({"Accept": "a"})
+        assert_true(isinstance(headers, MutableMapping))
+        headers.update({"Host": "example.com"})
+        assert_equal(headers.setdefault("accept", "b"), "a")
+        assert_equal(headers.pop("HOST"), "example.com")
+        assert_equal(headers.items(), [("Accept", "a")])
+        headers.clear()
+        assert_equal(len(headers), 0)
+
+    def test_pickle_and_copy(self):
+        request = RequestProxy("POST", "http://example.com/", "a=b",
+                               [("Accept", "a"), ("Accept", "b")])
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            clone = pickle.loads(pickle.dumps(request, protocol))
+            assert_equal(clone.method, "POST")
+            assert_equal(clone.body, "a=b")
+            assert_equal(clone.headers.get_all("accept"), ["a", "b"])
+        response = copy.deepcopy(ResponseProxy(401, "Unauthorized", ""))
+        assert_equal(response.status_code, 401)
+        assert_equal(response.headers, {})
+
+    def test_subclasses_may_add_attributes(self):
+        request = pickle.loads(pickle.dumps(FrameworkRequest("native"), 2))
+        assert_equal(request.native, "native")
+        assert_equal(request.url, "http://example.com/")
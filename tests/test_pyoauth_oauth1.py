@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+
+from nose.tools import assert_equal, assert_false
+from pyoauth.oauth1 import Credentials
+
+
+class Test_Credentials(object):
+    def setUp(self):
+        self.credentials = Credentials(identifier="dpf43f3p2l4k3l03",
+                                       shared_secret="kd94hf93k423kf44")
+
+    def test_no_instance_dict(self):
+        assert_false(hasattr(self.credentials, "__dict__"))
+
+    def test_public_api(self):
+        assert_equal(self.credentials.identifier, "dpf43f3p2l4k3l03")
+        assert_equal(self.credentials.shared_secret, "kd94hf93k423kf44")
+        assert_equal(self.credentials.to_dict(),
+                     dict(identifier="dpf43f3p2l4k3l03",
+                          shared_secret="kd94hf93k423kf44"))
+        assert_equal(hash(self.credentials),
+                     hash(Credentials("dpf43f3p2l4k3l03", "kd94hf93k423kf44")))
+
+    def test_pickle(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            assert_equal(pickle.loads(pickle.dumps(self.credentials, protocol)),
+                         self.credentials)
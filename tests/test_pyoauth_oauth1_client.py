@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import subprocess
+import sys
+
 from nose import SkipTest
-from nose.tools import assert_equal, assert_raises
+from nose.tools import assert_equal, assert_raises, assert_true
 from pyoauth.error import InvalidOAuthParametersError, \
     InvalidAuthorizationHeaderError, \
     InvalidSignatureMethodError, \
@@ -163,6 +166,49 @@ class Test_Client_build_resource_request(object):
                       url="http://photos.example.net/request",
                       oauth_callback="oob")
 
+    def test_body_is_signed_with_oauth_body_hash(self):
+        request = self.client.build_resource_request(self.token_credentials, "PUT",
+                                                     "http://photos.example.net/photos",
+                                                     payload_params=dict(size="original"),
+                                                     body=b"Hello World!")
+        oauth_params, _ = parse_authorization_header_value(request.headers["Authorization"])
+        assert_equal(oauth_params["oauth_body_hash"], ["Lve95gjOVATpfV8EL5X4nxwjKHE="])
+        assert_equal(request.url, "http://photos.example.net/photos?size=original")
+        assert_equal(request.body, b"Hello World!")
+        assert_equal(request.headers["Content-Type"], "application/octet-stream")
+
+    def test_body_streams_are_rewound_or_spooled(self):
+        import io
+        stream = io.BytesIO(b"{}Hello World!")
+        stream.seek(2)
+        request = self.client.build_resource_request(self.token_credentials, "POST",
+                                                     "http://photos.example.net/photos",
+                                                     headers={"Content-Type": "application/json"},
+                                                     body=stream)
+        assert_true(request.body is stream)
+        assert_equal(stream.tell(), 2)
+        assert_equal(request.headers["Content-Type"], "application/json")
+
+        request = self.client.build_resource_request(self.token_credentials, "POST",
+                                                     "http://photos.example.net/photos",
+                                                     body=iter([b"Hello ", b"World!"]))
+        oauth_params, _ = parse_authorization_header_value(request.headers["Authorization"])
+        assert_equal(oauth_params["oauth_body_hash"], ["Lve95gjOVATpfV8EL5X4nxwjKHE="])
+        assert_equal(request.body.read(), b"Hello World!")
+
+    def test_raises_IllegalArgumentError_when_body_is_form_urlencoded(self):
+        assert_raises(IllegalArgumentError,
+                      self.client.build_resource_request,
+                      self.token_credentials, "POST",
+                      "http://photos.example.net/photos",
+                      headers={"Content-Type": "application/x-www-form-urlencoded; charset=utf-8"},
+                      body=b"a=b")
+        assert_raises(IllegalArgumentError,
+                      self.client.build_resource_request,
+                      self.token_credentials, "POST",
+                      "http://photos.example.net/photos",
+                      body=b"a=b", oauth_body_hash="forged")
+
 class Test_Client_build_request(object):
     def setUp(self):
         self.client_credentials = Credentials(identifier="dpf43f3p2l4k3l03", shared_secret="kd94hf93k423kf44")
@@ -201,6 +247,20 @@ class Test_Client_build_request(object):
                       "POST",
                       self.client._temporary_credentials_request_uri,
                       headers={"Authorization": "blah blah."})
+        assert_raises(InvalidAuthorizationHeaderError,
+                      self.client._build_request,
+                      "POST",
+                      self.client._temporary_credentials_request_uri,
+                      headers={"authorization": "blah blah."})
+
+    def test_does_not_modify_caller_headers(self):
+        headers = {"X-Request-Id": "1"}
+        request = self.client._build_request("POST",
+                                             self.client._temporary_credentials_request_uri,
+                                             headers=headers)
+        assert_equal(headers, {"X-Request-Id": "1"})
+        assert_equal(request.headers["x-request-id"], "1")
+        assert_true("authorization" in request.headers)
 
     def test_valid_request_generated(self):
         valid_request = RequestProxy("GET",
@@ -277,3 +337,12 @@ OAuth realm="Photos",\
         got_authorization_header, got_realm = parse_authorization_header_value(request.headers["Authorization"])
         assert_equal(got_realm, expected_realm)
         assert_dict_equal(got_authorization_header, expected_authorization_header)
+
+
+class Test_lazy_import(object):
+    def test_import_loads_no_socket_ssl_or_logging(self):
+        code = ("import sys, pyoauth.oauth1.client, pyoauth.oauth1.client.scheduler; "
+                "print(sorted(m for m in ('socket', 'ssl', 'email.utils', 'logging') "
+                "if sys.modules.get(m) is not None))")
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert_equal(output.strip(), "[]")
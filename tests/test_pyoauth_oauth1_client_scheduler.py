@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_equal, assert_true, assert_false
+
+from pyoauth.http import ResponseProxy
+from pyoauth.oauth1 import Credentials
+from pyoauth.oauth1.client import Client
+from pyoauth.oauth1.client.scheduler import RateLimiter, RequestScheduler, \
+    request_endpoint
+from pyoauth.protocol import TimestampSource, parse_authorization_header_value
+from pyoauth.transport import HttpTransport
+from tests.stand_in_server import StandInOAuthServer, CLIENT_CREDENTIALS, \
+    TOKEN_CREDENTIALS
+
+
+ENDPOINT = "api.example.com/1/photos.json"
+OTHER_TOKEN = Credentials(identifier="kkk9d7dh3k39sjv7", shared_secret="dh893hdasih9")
+
+
+class FakeClock(object):
+    def __init__(self, now=1300000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_request_endpoint():
+    assert_equal(request_endpoint("https://API.example.com:443/1/photos.json?page=2"), ENDPOINT)
+
+
+class Test_RateLimiter(object):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_quotas_per_token_and_per_endpoint(self):
+        limiter = RateLimiter(quotas={ENDPOINT: (2, 60)},
+                              endpoint_quotas={ENDPOINT: (3, 10)},
+                              clock=self.clock)
+        limiter.consume("a", ENDPOINT)
+        limiter.consume("a", ENDPOINT)
+        assert_equal(limiter.wait_time("a", ENDPOINT), 60)
+        limiter.consume("b", ENDPOINT)
+        # The endpoint-wide budget is now spent for every token.
+        assert_equal(limiter.wait_time("b", ENDPOINT), 10)
+        assert_equal(limiter.wait_time("b", "api.example.com/other"), 0)
+        self.clock.sleep(10)
+        assert_equal(limiter.wait_time("b", ENDPOINT), 0)
+        assert_equal(limiter.wait_time("a", ENDPOINT), 50)
+
+    def test_budget_learned_from_headers(self):
+        limiter = RateLimiter(clock=self.clock)
+        assert_false(limiter.observe("a", ENDPOINT, ResponseProxy(200, "OK", "")))
+        # The provider's clock is 5 seconds ahead.
+        response = ResponseProxy(200, "OK", "", {"X-Rate-Limit-Limit": "15",
+                                                 "X-Rate-Limit-Remaining": "0",
+                                                 "X-Rate-Limit-Reset": "1300000035"})
+        assert_true(limiter.observe("a", ENDPOINT, response, skew=5))
+        assert_equal(limiter.wait_time("a", ENDPOINT), 30)
+        assert_equal(limiter.budgets()[("a", ENDPOINT)],
+                     dict(limit=15, remaining=0, reset_at=1300000030.0))
+        self.clock.sleep(30)
+        assert_equal(limiter.wait_time("a", ENDPOINT), 0)
+        assert_equal(limiter.budgets()[("a", ENDPOINT)]["remaining"], None)
+
+    def test_retry_after(self):
+        limiter = RateLimiter(clock=self.clock)
+        limiter.observe("a", ENDPOINT, ResponseProxy(503, "Service Unavailable", "",
+                                                     {"Retry-After": "120"}))
+        assert_equal(limiter.wait_time("a", ENDPOINT), 120)
+        limiter.observe("b", ENDPOINT, ResponseProxy(429, "Too Many Requests", "",
+                                                     {"Retry-After": "Sun, 13 Mar 2011 07:07:40 GMT"}))
+        assert_equal(limiter.wait_time("b", ENDPOINT), 60)
+
+
+class CannedTransport(object):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.bodies = []
+
+    def execute(self, request):
+        self.requests.append(request)
+        if hasattr(request.body, "read"):
+            # Read the body as a transport would, without rewinding it.
+            self.bodies.append(request.body.read())
+        return self.responses.pop(0)
+
+
+class Test_RequestScheduler(object):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = Client(CLIENT_CREDENTIALS,
+                             temporary_credentials_request_uri="https://api.example.com/initiate",
+                             resource_owner_authorization_uri="https://api.example.com/authorize",
+                             token_credentials_request_uri="https://api.example.com/token",
+                             timestamp_source=TimestampSource(clock=self.clock))
+
+    def scheduler(self, responses, **kwargs):
+        self.transport = CannedTransport(responses)
+        return RequestScheduler(self.client, self.transport, clock=self.clock,
+                                sleep=self.clock.sleep, **kwargs)
+
+    def test_priority_then_submission_order(self):
+        ok = ResponseProxy(200, "OK", "")
+        scheduler = self.scheduler([ok] * 3)
+        first = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/a")
+        second = scheduler.submit(OTHER_TOKEN, "GET", "http://api.example.com/b")
+        urgent = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/c", priority=1)
+        assert_equal(len(scheduler), 3)
+        assert_equal(scheduler.run(), [urgent, first, second])
+        assert_equal(len(scheduler), 0)
+
+    def test_spent_budget_does_not_hold_up_others(self):
+        limiter = RateLimiter(quotas={"api.example.com/a": (1, 30)}, clock=self.clock)
+        scheduler = self.scheduler([ResponseProxy(200, "OK", "")] * 3, limiter=limiter)
+        a1 = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/a")
+        a2 = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/a")
+        b = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/b")
+        assert_equal(scheduler.run(), [a1, b, a2])
+        assert_equal(self.clock.now, 1300000030.0)
+
+    def test_signs_when_sent_and_retries_rate_limited_responses(self):
+        scheduler = self.scheduler([ResponseProxy(429, "Too Many Requests", ""),
+                                    ResponseProxy(429, "Too Many Requests", ""),
+                                    ResponseProxy(200, "OK", "")],
+                                   retry_delay=2)
+        scheduled = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/a")
+        assert_equal(self.transport.requests, [])
+        scheduler.run()
+        assert_equal(scheduled.attempts, 3)
+        assert_equal(scheduled.response.status_code, 200)
+        timestamps = [parse_authorization_header_value(request.headers["Authorization"])[0]["oauth_timestamp"][0]
+                      for request in self.transport.requests]
+        assert_equal(timestamps, ["1300000000", "1300000002", "1300000006"])
+        assert_true(scheduled.request is self.transport.requests[-1])
+
+    def test_retries_resend_iterator_bodies(self):
+        scheduler = self.scheduler([ResponseProxy(429, "Too Many Requests", ""),
+                                    ResponseProxy(200, "OK", "")])
+        scheduled = scheduler.submit(TOKEN_CREDENTIALS, "POST", "http://api.example.com/a",
+                                     body=iter([b"Hello ", b"World!"]))
+        scheduler.run()
+        assert_equal(scheduled.response.status_code, 200)
+        assert_equal(self.transport.bodies, [b"Hello World!", b"Hello World!"])
+        body_hashes = [parse_authorization_header_value(request.headers["Authorization"])[0]["oauth_body_hash"]
+                       for request in self.transport.requests]
+        assert_equal(body_hashes, [["Lve95gjOVATpfV8EL5X4nxwjKHE="]] * 2)
+
+    def test_gives_up_after_max_attempts(self):
+        scheduler = self.scheduler([ResponseProxy(503, "Service Unavailable", "")] * 2,
+                                   max_attempts=2)
+        scheduled = scheduler.submit(TOKEN_CREDENTIALS, "GET", "http://api.example.com/a")
+        assert_equal(scheduler.run(), [scheduled])
+        assert_equal(scheduled.response.status_code, 503)
+
+
+class Test_RequestScheduler_rate_limited_server(object):
+    def setUp(self):
+        self.server = StandInOAuthServer(rate_limit=(2, 1)).start()
+        self.server.add_token(OTHER_TOKEN)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_no_requests_are_refused(self):
+        transport = HttpTransport()
+        scheduler = RequestScheduler(self.server.create_client(), transport)
+        for token in (TOKEN_CREDENTIALS, OTHER_TOKEN):
+            for i in range(3):
+                scheduler.submit(token, "GET", self.server.url("/photos"))
+        completed = scheduler.run()
+        assert_equal([scheduled.response.status_code for scheduled in completed], [200] * 6)
+        assert_equal(self.server.rate_limited, 0)
+        transport.close()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_raises
+
+from pyoauth.oauth1 import Credentials
+from pyoauth.oauth1.client.store import TemporaryCredentialsStore, \
+    SQLiteTemporaryCredentialsStore
+
+
+TEMPORARY_CREDENTIALS = Credentials(identifier="hh5s93j4hdidpola",
+                                    shared_secret="hdhd0244k9j7ao03")
+
+
+class FakeClock(object):
+    def __init__(self, now=1300000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _credentials(i):
+    return Credentials(identifier="token%d" % i, shared_secret="secret%d" % i)
+
+
+class _StoreTests(object):
+    def test_pop_returns_credentials_once(self):
+        self.store.put(TEMPORARY_CREDENTIALS)
+        assert_true(TEMPORARY_CREDENTIALS.identifier in self.store)
+        assert_equal(self.store.get(TEMPORARY_CREDENTIALS.identifier), TEMPORARY_CREDENTIALS)
+        assert_equal(self.store.pop(TEMPORARY_CREDENTIALS.identifier), TEMPORARY_CREDENTIALS)
+        assert_equal(self.store.pop(TEMPORARY_CREDENTIALS.identifier), None)
+        assert_equal(len(self.store), 0)
+
+    def test_entries_expire(self):
+        self.store.put(_credentials(1))
+        self.store.put(_credentials(2), ttl=10)
+        self.clock.now += 10
+        assert_equal(self.store.get("token2"), None)
+        assert_equal(self.store.pop("token2", "expired"), "expired")
+        assert_equal(self.store.get("token1"), _credentials(1))
+        self.clock.now += 60
+        assert_equal(self.store.purge_expired(), 1)
+        assert_equal(len(self.store), 0)
+
+
+class Test_TemporaryCredentialsStore(_StoreTests):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = TemporaryCredentialsStore(max_size=3, ttl=60, clock=self.clock)
+
+    def test_least_recently_used_are_evicted(self):
+        for i in range(3):
+            self.store.put(_credentials(i))
+        self.store.get("token0")
+        self.store.put(_credentials(3))
+        assert_false("token1" in self.store)
+        assert_equal([self.store.get("token%d" % i) for i in (0, 2, 3)],
+                     [_credentials(i) for i in (0, 2, 3)])
+        assert_equal(self.store.metrics()["evicted"], 1)
+
+    def test_max_size_must_be_positive(self):
+        assert_raises(ValueError, TemporaryCredentialsStore, max_size=0)
+
+
+class Test_SQLiteTemporaryCredentialsStore(_StoreTests):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "temporary.db")
+        self.store = SQLiteTemporaryCredentialsStore(self.path, max_size=3, ttl=60,
+                                                     maintenance_interval=2,
+                                                     touch_interval=1,
+                                                     clock=self.clock)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_len_counts_live_entries_only(self):
+        self.store.put(_credentials(1), ttl=10)
+        self.clock.now += 10
+        assert_equal(self.store.get("token1"), None)
+        assert_equal(len(self.store), 0)
+
+    def test_shared_between_stores(self):
+        other = SQLiteTemporaryCredentialsStore(self.path, clock=self.clock)
+        self.store.put(TEMPORARY_CREDENTIALS)
+        assert_equal(other.pop(TEMPORARY_CREDENTIALS.identifier), TEMPORARY_CREDENTIALS)
+        assert_equal(self.store.pop(TEMPORARY_CREDENTIALS.identifier), None)
+        other.close()
+
+    def test_shared_with_forked_process(self):
+        if not hasattr(os, "fork"):
+            return
+        self.store.put(TEMPORARY_CREDENTIALS)
+        pid = os.fork()
+        if not pid:
+            # The child must open its own connection.
+            found = self.store.pop(TEMPORARY_CREDENTIALS.identifier) == TEMPORARY_CREDENTIALS
+            os._exit(0 if found else 1)
+        _, status = os.waitpid(pid, 0)
+        assert_equal(status, 0)
+        assert_equal(self.store.get(TEMPORARY_CREDENTIALS.identifier), None)
+
+    def test_get_writes_only_after_touch_interval(self):
+        self.store.put(TEMPORARY_CREDENTIALS)
+        connection = self.store._connection()
+        changes = connection.total_changes
+        for i in range(3):
+            self.store.get(TEMPORARY_CREDENTIALS.identifier)
+        assert_equal(connection.total_changes, changes)
+        self.clock.now += 1
+        self.store.get(TEMPORARY_CREDENTIALS.identifier)
+        assert_equal(connection.total_changes, changes + 1)
+
+    def test_least_recently_used_are_evicted(self):
+        for i in range(3):
+            self.store.put(_credentials(i))
+            self.clock.now += 1
+        self.store.get("token0")
+        self.store.put(_credentials(3))
+        assert_false("token1" in self.store)
+        assert_equal(len(self.store), 3)
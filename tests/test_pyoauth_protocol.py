@@ -14,19 +14,26 @@ try:
 except ImportError:
     assert_dict_equal = assert_equal
 from nose import SkipTest
+from pyoauth.http import ResponseProxy
 from pyoauth.protocol import parse_authorization_header_value, \
     _generate_signature_base_string_query, \
     generate_normalized_authorization_header_value, \
     percent_decode, \
+    percent_encode, \
     generate_verification_code, \
     generate_timestamp, \
+    TimestampSource, \
     generate_hmac_sha1_signature, \
     generate_rsa_sha1_signature, \
     verify_rsa_sha1_signature, \
     generate_plaintext_signature, \
     generate_signature_base_string, \
+    generate_body_hash, \
+    verify_body_hash, \
     _generate_plaintext_signature, \
-    generate_nonce
+    generate_nonce, \
+    NonceGenerator, \
+    VerificationCodeGenerator
 
 
 class Test_generate_nonce(object):
@@ -50,6 +57,80 @@ class Test_generate_nonce(object):
         assert_true(isinstance(generate_nonce(64, 16), bytes))
 
 
+class Test_NonceGenerator(object):
+    def test_encodings(self):
+        values = [NonceGenerator(encoding="decimal").generate() for i in range(20)]
+        assert_true(all(value.isdigit() for value in values))
+        value = NonceGenerator(64, "hex").generate()
+        assert_equal(len(value), 16)
+        int(value, 16)
+        for bit_strength in (64, 96, 128):
+            value = NonceGenerator(bit_strength, "base64url").generate()
+            assert_equal(len(value), (bit_strength // 8 * 4 + 2) // 3)
+            assert_equal(percent_encode(value), value)
+
+    def test_unique_across_blocks(self):
+        nonces = NonceGenerator(block_size=7)
+        values = [nonces.generate() for i in range(100)]
+        assert_equal(len(set(values)), 100)
+
+    def test_threads_have_own_queues(self):
+        import threading
+        nonces = NonceGenerator(block_size=50)
+        results = []
+        def work():
+            results.extend(nonces.generate() for i in range(120))
+        threads = [threading.Thread(target=work) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_equal(len(set(results)), 480)
+
+    def test_forked_child_does_not_reuse_parent_queue(self):
+        import os
+        if not hasattr(os, "fork"):
+            raise SkipTest("os.fork is not available.")
+        nonces = NonceGenerator(block_size=50)
+        nonces.generate()
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if not pid:
+            os.close(read_end)
+            os.write(write_end, nonces.generate().encode("ascii"))
+            os._exit(0)
+        os.close(write_end)
+        child_nonce = os.read(read_end, 64).decode("ascii")
+        os.close(read_end)
+        os.waitpid(pid, 0)
+        assert_not_equal(child_nonce, nonces.generate())
+
+    def test_ValueError_when_invalid(self):
+        assert_raises(ValueError, NonceGenerator, 63)
+        assert_raises(ValueError, NonceGenerator, 64, "base32")
+        assert_raises(ValueError, NonceGenerator, 64, "hex", 0)
+
+
+class Test_VerificationCodeGenerator(object):
+    def test_lengths_and_alphabets(self):
+        for encoding, length, alphabet in (
+            ("hex", 8, "0123456789abcdef"),
+            ("decimal", 6, "0123456789"),
+            ("decimal", 9, "0123456789"),
+            ("base64url", 10, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"),
+        ):
+            codes = VerificationCodeGenerator(length, encoding, 16)
+            for i in range(40):
+                code = codes.generate()
+                assert_equal(len(code), length)
+                assert_true(set(code) <= set(alphabet), code)
+
+    def test_ValueError_when_hex_length_odd(self):
+        assert_raises(ValueError, VerificationCodeGenerator, 7)
+        assert_raises(ValueError, VerificationCodeGenerator, 0, "decimal")
+        VerificationCodeGenerator(7, "decimal")
+
+
 class Test_generate_verification_code(object):
     def test_length(self):
         default_length = 8
@@ -89,6 +170,41 @@ class Test_generate_timestamp(object):
                     "Timestamp is an empty string.")
 
 
+class Test_TimestampSource(object):
+    def setUp(self):
+        self.now = 1300000000.25
+        self.timestamps = TimestampSource(clock=lambda: self.now)
+
+    def response(self, date):
+        return ResponseProxy(200, "OK", "", {"Date": date})
+
+    def test_learns_skew_per_host(self):
+        # 1300003600 is one hour ahead of the local clock.
+        skew = self.timestamps.observe("https://api.example.com/initiate",
+                                       self.response("Sun, 13 Mar 2011 08:06:40 GMT"))
+        assert_equal(skew, 3600.25)
+        assert_equal(self.timestamps.timestamp("https://API.example.com:443/photos"), "1300003600")
+        assert_equal(self.timestamps.timestamp("https://other.example.com/"), "1300000000")
+        assert_equal(self.timestamps.timestamp(), "1300000000")
+        assert_equal(self.timestamps.skews(), {"api.example.com": 3600.25})
+
+    def test_small_skew_and_missing_date_are_ignored(self):
+        url = "https://api.example.com/"
+        self.timestamps.observe(url, self.response("Sun, 13 Mar 2011 08:06:40 GMT"))
+        assert_equal(self.timestamps.observe(url, ResponseProxy(200, "OK", "")), 3600.25)
+        assert_equal(self.timestamps.observe(url, self.response("garbage")), 3600.25)
+        assert_equal(self.timestamps.observe(url, self.response("Sun, 13 Mar 2011 07:06:41 GMT")), 0)
+        assert_equal(self.timestamps.skews(), {})
+
+    def test_round_trip_midpoint(self):
+        # The server answered 20 seconds behind the end of a 20 second
+        # round trip, so only 10 seconds behind its middle.
+        skew = self.timestamps.observe("https://api.example.com/",
+                                       self.response("Sun, 13 Mar 2011 07:06:20 GMT"),
+                                       sent_at=self.now - 20)
+        assert_equal(skew, -9.75)
+
+
 class Test_generate_hmac_sha1_signature(object):
     _examples = (
         # Temporary credentials request.
@@ -324,6 +440,29 @@ class Test__generate_plaintext_signature(object):
                      "ab%20cd&47%20f%24a")
 
 
+class Test_generate_body_hash(object):
+    def test_specification_example(self):
+        assert_equal(generate_body_hash(b"Hello World!"), "Lve95gjOVATpfV8EL5X4nxwjKHE=")
+        assert_equal(generate_body_hash(u"Hello World!"), "Lve95gjOVATpfV8EL5X4nxwjKHE=")
+
+    def test_empty_body(self):
+        assert_equal(generate_body_hash(None), "2jmj7l5rSw0yVb/vlWAYkK/YBwk=")
+        assert_equal(generate_body_hash(b""), "2jmj7l5rSw0yVb/vlWAYkK/YBwk=")
+
+    def test_streams_and_chunks(self):
+        import io
+        stream = io.BytesIO(b"skipped Hello World!")
+        stream.seek(8)
+        assert_equal(generate_body_hash(stream), "Lve95gjOVATpfV8EL5X4nxwjKHE=")
+        assert_equal(stream.tell(), 8)
+        assert_equal(generate_body_hash(iter([b"Hello ", b"World!"])),
+                     "Lve95gjOVATpfV8EL5X4nxwjKHE=")
+
+    def test_verify_body_hash(self):
+        assert_true(verify_body_hash("Lve95gjOVATpfV8EL5X4nxwjKHE=", b"Hello World!"))
+        assert_false(verify_body_hash("Lve95gjOVATpfV8EL5X4nxwjKHE=", b"Hello World"))
+
+
 class Test_generate_signature_base_string(object):
     def setUp(self):
         self.oauth_params = dict(
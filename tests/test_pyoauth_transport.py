@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+
+from nose.tools import assert_equal, assert_true, assert_raises
+from pyoauth.error import ConnectionPoolTimeoutError, InvalidUrlError, HttpError
+from pyoauth.http import RequestProxy
+from pyoauth.transport import HttpTransport
+from tests.stand_in_server import StandInOAuthServer, \
+    TEMPORARY_CREDENTIALS, TOKEN_CREDENTIALS, VERIFIER
+
+
+class Test_HttpTransport(object):
+    def setUp(self):
+        self.server = StandInOAuthServer().start()
+        self.key = ("http", "127.0.0.1", self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_three_legged_flow_reuses_one_connection(self):
+        transport = HttpTransport()
+        client = self.server.create_client()
+        _, temporary_credentials = client.parse_temporary_credentials_response(
+            transport.execute(client.build_temporary_credentials_request()))
+        assert_equal(temporary_credentials, TEMPORARY_CREDENTIALS)
+        _, token_credentials = client.parse_token_credentials_response(
+            transport.execute(client.build_token_credentials_request(temporary_credentials, VERIFIER)))
+        assert_equal(token_credentials, TOKEN_CREDENTIALS)
+        response = transport.execute(client.build_resource_request(
+            token_credentials, "POST", self.server.url("/photos"),
+            payload_params=dict(file="vacation.jpg")))
+        assert_equal(response.status_code, 200)
+        assert_equal(response.content_type, "application/json")
+
+        assert_equal(self.server.connections, 1)
+        metrics = transport.metrics()[self.key]
+        assert_equal(metrics["created"], 1)
+        assert_equal(metrics["reused"], 2)
+        assert_equal(metrics["in_use"], 0)
+        assert_equal(metrics["idle"], 1)
+        transport.close()
+
+    def test_pool_size_is_limited_across_threads(self):
+        transport = HttpTransport(max_connections_per_host=2)
+        def work():
+            for i in range(5):
+                transport.execute(RequestProxy("GET", self.server.url("/photos")))
+        threads = [threading.Thread(target=work) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics = transport.metrics()[self.key]
+        assert_true(metrics["peak_in_use"] <= 2)
+        assert_true(metrics["created"] <= 2)
+        assert_equal(metrics["created"] + metrics["reused"], 30)
+        assert_true(self.server.connections <= 2)
+        transport.close()
+
+    def test_body_hash_signed_file_upload(self):
+        import tempfile
+        transport = HttpTransport()
+        client = self.server.create_client()
+        upload = tempfile.TemporaryFile()
+        upload.write(b"header to skip;" + b"x" * 100000)
+        upload.seek(15)
+        request = client.build_resource_request(TOKEN_CREDENTIALS, "POST",
+                                                self.server.url("/photos"),
+                                                headers={"Content-Type": "image/jpeg"},
+                                                body=upload)
+        response = transport.execute(request)
+        assert_equal(response.status_code, 200)
+        assert_equal(self.server.requests[-1][2], b"x" * 100000)
+        assert_equal(upload.tell(), 15)
+        transport.close()
+
+    def test_file_body_leaves_request_headers_unchanged(self):
+        import io
+        class Request(object):
+            # Any object with the attributes of a request proxy will do;
+            # this one keeps its headers in a plain dictionary.
+            method = "POST"
+            url = self.server.url("/photos")
+            body = io.BytesIO(b"x" * 100)
+            headers = {"Content-Type": "application/octet-stream"}
+        transport = HttpTransport()
+        transport.execute(Request())
+        assert_equal(self.server.requests[-1][2], b"x" * 100)
+        assert_equal(Request.headers, {"Content-Type": "application/octet-stream"})
+        transport.close()
+
+    def test_idle_connections_are_evicted(self):
+        transport = HttpTransport(idle_timeout=0)
+        transport.execute(RequestProxy("GET", self.server.url("/photos")))
+        assert_equal(transport.evict_idle(), 1)
+        transport.execute(RequestProxy("GET", self.server.url("/photos")))
+        metrics = transport.metrics()[self.key]
+        assert_equal(metrics["created"], 2)
+        assert_equal(metrics["reused"], 0)
+        assert_equal(self.server.connections, 2)
+
+    def test_pool_timeout(self):
+        transport = HttpTransport(max_connections_per_host=1, pool_timeout=0.01)
+        pool = transport._get_pool(*self.key)
+        connection, _ = pool.acquire()
+        assert_raises(ConnectionPoolTimeoutError, transport.execute,
+                      RequestProxy("GET", self.server.url("/photos")))
+        pool.release(connection)
+        assert_equal(transport.metrics()[self.key]["waits"], 1)
+
+    def test_retries_when_server_closed_idle_connection(self):
+        transport = HttpTransport()
+        transport.execute(RequestProxy("GET", self.server.url("/photos")))
+        pool = transport._get_pool(*self.key)
+        # Simulate the server dropping the keep-alive connection.
+        pool._idle[0][0].sock.shutdown(socket.SHUT_RDWR)
+        response = transport.execute(RequestProxy("GET", self.server.url("/photos")))
+        assert_equal(response.status_code, 401)
+        assert_equal(self.server.connections, 2)
+
+    def test_InvalidUrlError_when_url_not_http(self):
+        assert_raises(InvalidUrlError, HttpTransport().execute,
+                      RequestProxy("GET", "ftp://example.com/"))
+
+
+class Test_clock_skew(object):
+    def setUp(self):
+        self.server = StandInOAuthServer(clock_skew=-3600).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_skew_is_learned_from_the_first_refusal(self):
+        transport = HttpTransport()
+        client = self.server.create_client()
+        request = client.build_temporary_credentials_request()
+        assert_raises(HttpError, client.parse_temporary_credentials_response,
+                      transport.execute(request))
+        assert_true(abs(client.timestamp_source.skew(request.url) + 3600) < 2)
+
+        _, temporary_credentials = client.parse_temporary_credentials_response(
+            transport.execute(client.build_temporary_credentials_request()))
+        _, token_credentials = client.parse_token_credentials_response(
+            transport.execute(client.build_token_credentials_request(temporary_credentials, VERIFIER)))
+        response = transport.execute(client.build_resource_request(
+            token_credentials, "GET", self.server.url("/photos")))
+        assert_equal(response.status_code, 200)
+        assert_equal(self.server.timestamps_refused, 1)
+        transport.close()
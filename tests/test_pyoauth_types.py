@@ -3,7 +3,10 @@
 
 from nose.tools import assert_equal, assert_false, assert_true, assert_raises
 from nose import SkipTest
-from pyoauth.types import is_unicode, is_bytes, is_bytes_or_unicode
+from pyoauth.types import is_unicode, is_bytes, is_bytes_or_unicode, \
+    is_buffer, buffer_to_bytes, bit_count, byte_count, bytes_to_int, \
+    int_to_bytes
+from pyoauth.types.codec import base64url_encode, base64url_decode
 
 import uuid
 
@@ -47,3 +50,55 @@ class Test_is_bytes_or_unicode(object):
         assert_false(is_bytes_or_unicode(()))
         assert_false(is_bytes_or_unicode({}))
         assert_false(is_bytes_or_unicode(object))
+
+
+class Test_is_buffer(object):
+    def test_valid(self):
+        assert_true(is_buffer(bytearray(random_bytes)))
+        assert_true(is_buffer(memoryview(random_bytes)))
+        assert_false(is_buffer(random_bytes))
+        assert_false(is_buffer(unicode_string))
+        assert_false(is_buffer(None))
+        assert_false(is_buffer([]))
+
+
+class Test_buffer_to_bytes(object):
+    def test_valid(self):
+        assert_equal(buffer_to_bytes(bytearray(random_bytes)), random_bytes)
+        assert_equal(buffer_to_bytes(memoryview(random_bytes)), random_bytes)
+        assert_true(buffer_to_bytes(random_bytes) is random_bytes)
+
+
+class Test_bit_count_and_byte_count(object):
+    def test_valid(self):
+        for num, bits, count in ((0, 0, 0), (1, 1, 1), (255, 8, 1),
+                                 (256, 9, 2), (2 ** 1024 - 1, 1024, 128)):
+            assert_equal(bit_count(num), bits)
+            assert_equal(byte_count(num), count)
+
+
+class Test_bytes_to_int_and_int_to_bytes(object):
+    def test_round_trip(self):
+        for byte_string in (b"\x01", b"\xff" * 8, b"\x12" + b"\x00" * 511):
+            num = bytes_to_int(byte_string)
+            assert_equal(int_to_bytes(num), byte_string)
+
+    def test_zero_and_padding(self):
+        assert_equal(bytes_to_int(b""), 0)
+        assert_equal(bytes_to_int(b"\x00\x00\x01"), 1)
+        assert_equal(int_to_bytes(0), b"\x00")
+        assert_equal(int_to_bytes(258, 4), b"\x00\x00\x01\x02")
+        assert_equal(int_to_bytes(258, 1), b"\x01\x02")
+
+    def test_accepts_buffers(self):
+        assert_equal(bytes_to_int(bytearray(b"\x01\x00")), 256)
+
+
+class Test_base64url(object):
+    def test_round_trip_without_padding(self):
+        for length in range(12):
+            byte_string = "\xfb\xff\xbf" * (length // 3) + "\xfe" * (length % 3)
+            encoded = base64url_encode(byte_string)
+            assert_true("=" not in encoded and "+" not in encoded and "/" not in encoded)
+            assert_equal(base64url_decode(encoded), byte_string)
+        assert_equal(base64url_encode("\xfb\xff"), "-_8")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import subprocess
+import sys
+
+from nose.tools import assert_equal, assert_true, assert_raises
+from pyoauth.types import number
+from pyoauth.types.number import available_backends, get_backend
+
+
+class Test_backends(object):
+    def setUp(self):
+        self.random = random.Random(1024)
+
+    def test_active_backend_is_first_available(self):
+        names = available_backends()
+        assert_true("builtin" in names)
+        assert_true("python" in names)
+        if not os.environ.get("PYOAUTH_NUMBER_BACKEND"):
+            assert_equal(number.BACKEND, names[0])
+        assert_equal(get_backend().name, number.BACKEND)
+        assert_true(number.pow_mod is get_backend().pow_mod)
+
+    def test_backends_agree(self):
+        reference = get_backend("python")
+        for name in available_backends():
+            backend = get_backend(name)
+            for bits in (64, 1024, 2048):
+                modulus = self.random.getrandbits(bits) | 1
+                base = self.random.getrandbits(bits) % modulus
+                power = self.random.getrandbits(bits)
+                assert_equal(backend.pow_mod(base, power, modulus),
+                             reference.pow_mod(base, power, modulus), name)
+                assert_equal(backend.inverse_mod(base, modulus),
+                             reference.inverse_mod(base, modulus), name)
+                assert_equal(backend.gcd(base, modulus),
+                             reference.gcd(base, modulus), name)
+                assert_equal(backend.lcm(base, modulus),
+                             reference.lcm(base, modulus), name)
+
+    def test_negative_power_and_missing_inverse(self):
+        for name in available_backends():
+            backend = get_backend(name)
+            assert_equal(backend.pow_mod(3, -1, 7), 5)
+            assert_equal(backend.inverse_mod(3, 7), 5)
+            assert_equal(backend.inverse_mod(2, 4), 0)
+            assert_raises(ValueError, backend.pow_mod, 2, -1, 4)
+            assert_raises(ValueError, backend.pow_mod, 6, -3, 9)
+
+    def test_unknown_backend(self):
+        assert_raises(ValueError, get_backend, "fortran")
+
+    def test_environment_override(self):
+        env = dict(os.environ, PYOAUTH_NUMBER_BACKEND="python")
+        output = subprocess.Popen(
+            [sys.executable, "-c",
+             "from pyoauth.types.number import BACKEND; print(BACKEND)"],
+            env=env, stdout=subprocess.PIPE).communicate()[0]
+        assert_equal(output.strip(), b"python")
+
+
+class Test_native_conversions(object):
+    def test_bytes_to_long_returns_backend_integer(self):
+        value = number.bytes_to_long(b"\x01\x00")
+        assert_equal(value, 256)
+        # Python 2 mixes int and long for the pure-Python backends.
+        assert_true(isinstance(value, (get_backend().mpz, int)))
+
+    def test_round_trip(self):
+        for byte_string in (b"\x00", b"\x01", b"\xff" * 129, b"\x12\x34\x56"):
+            value = number.bytes_to_long(byte_string)
+            assert_equal(number.long_to_bytes(value), byte_string)
+            assert_equal(number.bytes_to_long_original(byte_string), value)
+        assert_equal(number.long_to_bytes(1, 4), b"\x00\x00\x00\x01")
+        assert_equal(number.bytes_to_long(b""), 0)
@@ -215,6 +215,68 @@ class Test_percent_encode(object):
         assert_equal(percent_encode(True), "True")
         assert_equal(percent_encode(5), "5")
 
+    def test_buffers_are_encoded_like_bytes(self):
+        value = b"\x00a b~\xff"
+        assert_equal(percent_encode(bytearray(value)), percent_encode(value))
+        assert_equal(percent_encode(memoryview(value)), percent_encode(value))
+
+    def test_buffers_are_copied_at_most_once(self):
+        import pyoauth.types
+        import pyoauth.url
+
+        quoted = []
+        copies = []
+        original_quote = pyoauth.url.quote
+        original_buffer_to_bytes = pyoauth.url.buffer_to_bytes
+        original_url_bytes = pyoauth.url.bytes
+        original_types_bytes = pyoauth.types.bytes
+
+        def quote(value, safe):
+            quoted.append(value)
+            return original_quote(value, safe)
+
+        def buffer_to_bytes(value):
+            copies.append(value)
+            return original_buffer_to_bytes(value)
+
+        class _BytesType(type):
+            # isinstance() still sees byte strings; calling bytes() fails.
+            def __instancecheck__(cls, value):
+                return isinstance(value, type(b""))
+
+            def __call__(cls, value=b""):
+                raise AssertionError("bytes() copied %r" % (value,))
+
+        no_bytes = _BytesType("bytes", (object,), {})
+
+        pyoauth.url.quote = quote
+        pyoauth.url.buffer_to_bytes = buffer_to_bytes
+        try:
+            value = bytearray(b"a b")
+            assert_equal(percent_encode(value), "a%20b")
+            if pyoauth.url._QUOTE_ACCEPTS_BYTEARRAY:
+                assert_true(quoted[-1] is value)
+                assert_equal(copies, [])
+            else:
+                assert_equal(len(copies), 1)
+
+            del copies[:]
+            # Both modules call bytes() through their own ``bytes``
+            # global, so a copy made on top of tobytes() fails the test.
+            pyoauth.url.bytes = no_bytes
+            pyoauth.types.bytes = no_bytes
+            value = memoryview(b"a b")
+            assert_equal(percent_encode(value), "a%20b")
+            # The single copy made by tobytes() is handed to quote as is.
+            assert_equal(len(copies), 1)
+            assert_true(copies[0] is value)
+            assert_true(type(quoted[-1]) is type(b""))
+        finally:
+            pyoauth.url.quote = original_quote
+            pyoauth.url.buffer_to_bytes = original_buffer_to_bytes
+            pyoauth.url.bytes = original_url_bytes
+            pyoauth.types.bytes = original_types_bytes
+
 
 class Test_percent_decode(object):
     _unsafe_characters = [" ",
@@ -324,6 +386,14 @@ class Test_urlencode_sl(object):
         ]
         assert_equal(urlencode_sl(params), valid_params_list)
 
+    def test_buffer_values_are_not_treated_as_sequences(self):
+        params = {
+            "a": bytearray(b"b c"),
+            "d": [memoryview(b"e"), b"f"],
+        }
+        assert_equal(urlencode_sl(params),
+                     [("a", "b%20c"), ("d", "e"), ("d", "f")])
+
     def test_blank_list_value_not_preserved(self):
         params = {
             "blank_list_value_not_preserved": [],